@@ -13,9 +13,13 @@ setup(
     description='a simple gobang game',
     url='https://github.com/liujinliu/zobang',
     packages=find_packages(),
+    extras_require={
+        'numpy': ['numpy'],
+    },
     entry_points={
         'console_scripts': [
-            'zobang.start=zobang.cmd:game_start'
+            'zobang.start=zobang.cmd:game_start',
+            'zobang=zobang.cmd:main',
         ],
     },
 )
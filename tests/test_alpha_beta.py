@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+import time
+import pytest
+from zobang.chess_board.chess_board import ChessBoard
+from zobang.constant import ChessPieceType, BLACK_PIECE, WHITE_PIECE
+from zobang.strategy.action_message import ActionMessage
+from zobang.strategy.alpha_beta import AlphaBetaSearch
+from zobang.strategy.max_min_play import MaxMinPlay, WholeChessPosition
+
+WHITE, BLACK = ChessPieceType.WHITE_CHESS_PIECE, \
+    ChessPieceType.BLACK_CHESS_PIECE
+ENGINES = [dict(engine='max_min'), dict(engine='alpha_beta', depth=2)]
+OPENING = [(7, 7), (7, 8), (8, 8), (6, 6)]
+
+
+def new_play(moves, **kwargs):
+    """
+    AI执黑, moves从白棋开始轮流落子, 最后一步留给react
+    """
+    play = MaxMinPlay(ChessBoard(15), BLACK, **kwargs)
+    for i, (x, y) in enumerate(moves):
+        play.update(x, y, BLACK if i % 2 else WHITE)
+    return play
+
+
+@pytest.mark.parametrize('kwargs', ENGINES)
+def test_completes_its_own_five(kwargs):
+    # 黑棋7, 3到7, 6已经四连, 白棋没有威胁
+    play = new_play([(0, 0), (7, 3), (0, 2), (7, 4), (0, 4), (7, 5),
+                     (0, 6), (7, 6)], **kwargs)
+    ret = play.react(ActionMessage(row=14, col=14))
+    assert ret['finished'] and ret['win']
+    assert (ret['msg'].row, ret['msg'].col) in ((7, 2), (7, 7))
+
+
+@pytest.mark.parametrize('kwargs', ENGINES)
+def test_blocks_the_opponent_four(kwargs):
+    # 白棋8, 4到8, 7冲四, 8, 3被黑棋挡住, 只剩8, 8能连成五
+    play = new_play([(8, 4), (8, 3), (8, 5), (0, 0), (8, 6), (0, 14)],
+                    **kwargs)
+    ret = play.react(ActionMessage(row=8, col=7))
+    assert not ret['finished']
+    assert (ret['msg'].row, ret['msg'].col) == (8, 8)
+
+
+@pytest.mark.parametrize('kwargs', ENGINES)
+def test_full_board_is_a_draw(kwargs):
+    play = MaxMinPlay(ChessBoard(3, 3), BLACK, **kwargs)
+    for i, (x, y) in enumerate([(0, 0), (0, 1), (0, 2), (1, 1), (1, 0),
+                                (1, 2), (2, 1), (2, 0)]):
+        play.update(x, y, BLACK if i % 2 else WHITE)
+    ret = play.react(ActionMessage(row=2, col=2))
+    assert ret['finished'] and ret['equal'] and not ret['win']
+    assert ret['msg'] is None
+
+
+@pytest.mark.parametrize('kwargs', ENGINES)
+def test_plays_a_far_cell_when_no_near_cell_is_left(kwargs):
+    # 9路棋盘只剩左上角3个空位, 离双方最近的落子都很远
+    empty = {(0, 0), (0, 1), (1, 0), (8, 8)}
+    play = MaxMinPlay(ChessBoard(9, 5), BLACK, **kwargs)
+    cells = [(x, y) for x in range(9) for y in range(9)
+             if (x, y) not in empty]
+    for x, y in sorted(cells, key=lambda cell: cell == (8, 7)):
+        # 这样铺满哪一方都没有五连
+        play.update(x, y, WHITE if (x // 2 + y) % 2 else BLACK)
+    ret = play.react(ActionMessage(row=8, col=8))
+    assert not ret['equal']
+    assert (ret['msg'].row, ret['msg'].col) in empty - {(8, 8)}
+    assert play.chess_board.no_piece_info.count() == 2
+
+
+def test_time_budget_stops_iterative_deepening():
+    play = new_play(OPENING, engine='alpha_beta', depth=8,
+                    time_budget_ms=100)
+    start = time.monotonic()
+    ret = play.react(ActionMessage(row=9, col=9))
+    # 迭代加深到点就停, 返回最深一次完整搜索的结果
+    assert time.monotonic() - start < 2
+    assert 1 <= ret['depth'] < 8
+    assert play.chess_board.piece_at(ret['msg'].row, ret['msg'].col) \
+        == BLACK_PIECE
+
+
+def test_expired_deadline_still_returns_a_move():
+    position = WholeChessPosition(chess_board=ChessBoard(15),
+                                  player_piece_type=BLACK_PIECE)
+    for i, (x, y) in enumerate(OPENING + [(9, 9)]):
+        position.update(x, y, BLACK_PIECE if i % 2 else WHITE_PIECE)
+    search = AlphaBetaSearch(position, depth=6)
+    move, _ = search.search(deadline=time.monotonic() - 1)
+    assert move in position.possible_moves()
+    # 每CLOCK_CHECK_NODES个节点才看一次时间, 最浅的一层可能已经搜完
+    assert search.completed_depth <= 1
+    # 搜索结束后局面原样恢复
+    assert position.board.moves == OPENING + [(9, 9)]
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import io
+import json
+import pytest
+from zobang.analysis import analyze_game, analyze_games, read_games
+
+GAME = [(9, 9), (9, 10), (10, 10), (8, 8)]
+
+
+def four_in_a_row():
+    """
+    白棋在第4行连下四子, 黑棋在第5行跟着下
+    """
+    moves = []
+    for col in range(4):
+        moves += [(4, col), (5, col)]
+    return moves
+
+
+def test_read_games_accepts_both_line_formats():
+    lines = io.StringIO(json.dumps({'id': 'a', 'moves': [[1, 2]]}) + '\n\n'
+                        + json.dumps([[3, 4]]) + '\n'
+                        + json.dumps({'moves': [], 'win_len': 4}) + '\n')
+    assert list(read_games(lines)) == [('a', [[1, 2]], {}), (2, [[3, 4]], {}),
+                                       (3, [], {'win_len': 4})]
+
+
+@pytest.mark.parametrize('engine', ['max_min', 'alpha_beta'])
+def test_one_result_per_ply(engine):
+    results = list(analyze_game('g', GAME, engine=engine, depth=1))
+    assert [r['ply'] for r in results] == [0, 1, 2, 3, 4]
+    assert [r['side'] for r in results[:2]] == ['WHITE_CHESS_PIECE',
+                                                'BLACK_CHESS_PIECE']
+    assert [r['played'] for r in results] == GAME + [None]
+    for result in results:
+        assert result['best'] not in GAME[:result['ply']]
+        assert result['nodes'] > 0
+
+
+def test_analysis_stops_at_the_winning_move():
+    moves = []
+    for col in range(5):
+        moves += [(9, col), (10, col)]
+    results = list(analyze_game('g', moves, depth=1))
+    # 白棋第五子连成线后不再分析
+    assert results[-1]['played'] == (9, 4)
+    assert len(results) == 9
+
+
+def test_analysis_follows_the_board_rules():
+    results = list(analyze_game('g', four_in_a_row(), depth=1, board_len=9,
+                                win_len=4))
+    # 连四就赢, 白棋第四子之后不再分析
+    assert results[-1]['played'] == (4, 3)
+    assert all(0 <= x < 9 and 0 <= y < 9 for x, y in
+               (r['best'] for r in results))
+
+
+def test_game_rules_override_the_defaults():
+    games = [('a', four_in_a_row(), {'win_len': 4}),
+             ('b', four_in_a_row(), {})]
+    results = list(analyze_games(games, depth=1, board_len=9))
+    assert [r['game_id'] for r in results] == ['a'] * 7 + ['b'] * 9
+
+
+def test_workers_give_the_same_results_in_order():
+    games = [('a', GAME, {}), ('b', GAME[:2], {}), ('c', [], {})]
+    expected = list(analyze_games(games, depth=1))
+    assert list(analyze_games(iter(games), workers=1, window=1, depth=1)) \
+        == expected
+    assert [r['game_id'] for r in expected] == ['a'] * 5 + ['b'] * 3 + ['c']
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+from zobang.bench import compare, percentile, run_bench, seeded_positions
+
+
+def test_percentile():
+    values = [4, 1, 3, 2]
+    assert percentile(values, 0) == 1
+    assert percentile(values, 100) == 4
+    assert percentile([], 50) == 0
+
+
+def test_seeded_positions_are_reproducible():
+    assert seeded_positions(3, seed=7) == seeded_positions(3, seed=7)
+    assert len(seeded_positions(3, seed=7)) == 3
+
+
+def test_run_bench_reports_the_median_of_the_timed_runs():
+    report = run_bench(dict(engine='max_min'), positions=1, max_moves=2,
+                       repeats=3, warmup=0)
+    assert report['config']['repeats'] == 3
+    assert len(report['runs']) == 3
+    summary = report['summary']
+    assert summary['games'] == 5
+    assert summary['peak_memory_kb'] > 0
+    assert min(run['latency_p50_ms'] for run in report['runs']) \
+        <= summary['latency_p50_ms'] \
+        <= max(run['latency_p50_ms'] for run in report['runs'])
+
+
+def test_compare_uses_the_tolerance():
+    baseline = dict(summary=dict(latency_p50_ms=10, latency_p90_ms=20,
+                                 latency_p99_ms=30, evaluations_per_move=100,
+                                 peak_memory_kb=1000, nodes_per_sec=5000))
+    current = dict(summary=dict(baseline['summary'], latency_p50_ms=12,
+                                nodes_per_sec=3000))
+    assert compare(current, baseline) == [('nodes_per_sec', 5000, 3000)]
+    assert compare(current, baseline, tolerance=0.1) \
+        == [('latency_p50_ms', 10, 12), ('nodes_per_sec', 5000, 3000)]
+    # 基准里没有的指标不比较
+    assert compare(current, dict(summary={})) == []
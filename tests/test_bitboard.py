@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+import pytest
+from zobang.chess_board.bitboard import BitBoard
+
+
+def board_with(cells, row=15):
+    board = BitBoard(row)
+    for x, y in cells:
+        board.set(x, y)
+    return board
+
+
+def test_set_clear_and_iterate():
+    board = board_with([(0, 0), (3, 14), (14, 7)])
+    assert board.has(3, 14)
+    assert not board.has(3, 13)
+    assert board.popcount() == 3
+    assert sorted(board.iter_cells()) == [(0, 0), (3, 14), (14, 7)]
+    board.clear(3, 14)
+    assert not board.has(3, 14)
+    assert board.popcount() == 2
+
+
+def test_full_board_has_every_cell_and_no_padding():
+    board = BitBoard.full(5)
+    assert board.popcount() == 25
+    assert sorted(board.iter_cells()) == [(x, y) for x in range(5)
+                                          for y in range(5)]
+
+
+LINES = [
+    [(7, y) for y in range(3, 8)],
+    [(x, 2) for x in range(10, 15)],
+    [(i, i) for i in range(5)],
+    [(i, 14 - i) for i in range(10, 15)],
+]
+
+
+@pytest.mark.parametrize('cells', LINES)
+def test_five_in_a_row_in_every_direction(cells):
+    board = board_with(cells)
+    assert board.has_line(5)
+    board.clear(*cells[2])
+    assert not board.has_line(5)
+
+
+def test_four_is_not_a_line():
+    board = board_with([(7, y) for y in range(4)])
+    assert not board.has_line(5)
+    assert board.has_line(4)
+
+
+def test_lines_do_not_wrap_across_rows():
+    # 一行的最后三格接着下一行的前两格, 在位上是连续的, 但不能算连珠
+    board = board_with([(0, 12), (0, 13), (0, 14), (1, 0), (1, 1)])
+    assert not board.has_line(5)
+    # 反斜线方向也不能从棋盘左边绕到右边
+    board = board_with([(0, 1), (1, 0), (2, 14), (3, 13), (4, 12)])
+    assert not board.has_line(5)
+
+
+@pytest.mark.parametrize('cells', LINES)
+def test_has_line_at_in_every_direction(cells):
+    board = board_with(cells)
+    for x, y in cells:
+        assert board.has_line_at(x, y, 5)
+    board.clear(*cells[2])
+    assert not board.has_line_at(*cells[0], 5)
+    assert not board.has_line_at(*cells[4], 5)
+
+
+def test_has_line_at_does_not_wrap_across_rows():
+    board = board_with([(0, 12), (0, 13), (0, 14), (1, 0), (1, 1)])
+    assert not board.has_line_at(0, 14, 5)
+    assert not board.has_line_at(1, 0, 5)
+
+
+def test_has_line_at_only_looks_through_the_cell():
+    board = board_with([(7, y) for y in range(5)] + [(0, 0)])
+    assert board.has_line_at(7, 2, 5)
+    assert not board.has_line_at(0, 0, 5)
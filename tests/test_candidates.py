@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+from zobang.strategy.candidates import CandidateMoves
+
+
+def test_moves_are_the_empty_cells_around_stones():
+    candidates = CandidateMoves(15, radius=1)
+    candidates.add_stone(7, 7)
+    assert len(candidates) == 8
+    assert (7, 7) not in candidates.moves()
+    candidates.add_stone(0, 0)
+    assert len(candidates) == 11
+    assert candidates.neighbour_count(0, 1) == 1
+
+
+def test_remove_stone_restores_the_previous_moves():
+    candidates = CandidateMoves(15, radius=2)
+    candidates.add_stone(7, 7)
+    before = candidates.moves()
+    candidates.add_stone(7, 8)
+    candidates.remove_stone(7, 8)
+    assert candidates.moves() == before
+    # 提掉的子周围还有棋子, 它自己又成了候选
+    candidates.add_stone(7, 8)
+    candidates.remove_stone(7, 7)
+    assert (7, 7) in candidates.moves()
+    candidates.remove_stone(7, 8)
+    assert not candidates
+
+
+def test_default_order_puts_dense_cells_first():
+    candidates = CandidateMoves(15, radius=1)
+    candidates.add_stone(7, 7)
+    candidates.add_stone(7, 9)
+    moves = candidates.ordered_moves()
+    assert moves[:3] == [(6, 8), (7, 8), (8, 8)]
+    assert moves == sorted(moves, key=candidates.density_key)
+
+
+def test_custom_order():
+    center = (7, 7)
+
+    def distance(move):
+        return abs(move[0] - center[0]) + abs(move[1] - center[1]), move
+
+    candidates = CandidateMoves(15, radius=1, key=distance)
+    candidates.add_stone(6, 6)
+    candidates.add_stone(10, 10)
+    assert candidates.ordered_moves()[0] == (7, 7)
+    assert candidates.ordered_moves(key=lambda move: move)[0] == (5, 5)
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+from zobang.chess_board.chess_board import ChessBoard
+from zobang.constant import (ChessPieceType, NO_PIECE, WHITE_PIECE,
+                             BLACK_PIECE)
+
+
+def play(board, moves):
+    """
+    白棋先走, 交替落子
+    """
+    piece = WHITE_PIECE
+    for row, col in moves:
+        board.place(row, col, piece)
+        piece = BLACK_PIECE if piece == WHITE_PIECE else WHITE_PIECE
+    return board
+
+
+WHITE_WINS = [(7, 3), (8, 3), (7, 4), (8, 4), (7, 5), (8, 5), (7, 6), (8, 6),
+              (7, 7)]
+
+
+def test_place_and_take_keep_the_win_flag():
+    board = play(ChessBoard(), WHITE_WINS)
+    assert board.white_position_info.is_win()
+    assert not board.black_position_info.is_win()
+    board.take(7, 7, WHITE_PIECE)
+    assert not board.white_position_info.is_win()
+    assert board.no_piece_info.has(7, 7)
+    assert board.moves == WHITE_WINS[:-1]
+
+
+def test_take_out_of_order_rebuilds_the_win_flag():
+    board = play(ChessBoard(), WHITE_WINS + [(0, 0), (14, 14)])
+    assert board.white_position_info.is_win()
+    # 拆掉五连中间的一子, 之后的落子仍然在栈上
+    board.take(7, 5, WHITE_PIECE)
+    assert not board.white_position_info.is_win()
+    assert (7, 5) not in board.moves
+    board.take(14, 14, WHITE_PIECE)
+    board.take(0, 0, BLACK_PIECE)
+    assert not board.white_position_info.is_win()
+    board.place(7, 5, WHITE_PIECE)
+    assert board.white_position_info.is_win()
+
+
+def test_update_the_same_move_twice_records_it_once():
+    board = ChessBoard()
+    board.update(7, 7, ChessPieceType.WHITE_CHESS_PIECE)
+    board.update(7, 7, ChessPieceType.WHITE_CHESS_PIECE)
+    assert board.moves == [(7, 7)]
+    assert board.white_position_info.count() == 1
+
+
+def test_piece_grid():
+    board = play(ChessBoard(9, 5), [(4, 4), (0, 8)])
+    grid = board.piece_grid()
+    assert len(grid) == 9
+    assert grid[4][4] == WHITE_PIECE
+    assert grid[0][8] == BLACK_PIECE
+    assert sum(cell != NO_PIECE for row in grid for cell in row) == 2
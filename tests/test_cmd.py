@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import subprocess
+import sys
+import pytest
+from zobang.chess_board.game_log import GameLogWriter
+from zobang.cmd import main
+from zobang.constant import WHITE_PIECE, BLACK_PIECE
+
+BENCH_ARGS = ['bench', '--positions', '0', '--max-moves', '1', '--depth',
+              '1']
+
+
+def read_jsonl(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_analyze_jsonl(tmp_path):
+    games = tmp_path / 'games.jsonl'
+    games.write_text(json.dumps({'id': 'a', 'moves': [[9, 9], [9, 10]]})
+                     + '\n\n' + json.dumps([[9, 9]]) + '\n', encoding='utf-8')
+    output = tmp_path / 'analysis.jsonl'
+    assert main(['analyze', str(games), '--depth', '1', '--output',
+                 str(output)]) == 0
+    results = read_jsonl(output)
+    # 每局在每一步之前和最后都分析一次
+    assert [(r['game_id'], r['ply']) for r in results] \
+        == [('a', 0), ('a', 1), ('a', 2), (2, 0), (2, 1)]
+    assert [r['side'] for r in results[:3]] \
+        == ['WHITE_CHESS_PIECE', 'BLACK_CHESS_PIECE', 'WHITE_CHESS_PIECE']
+    assert results[1]['played'] == [9, 10]
+
+
+def test_analyze_game_log_with_workers(tmp_path):
+    path = tmp_path / 'games.zgl'
+    with GameLogWriter(path) as writer:
+        writer.start_game(20, 5)
+        writer.move(9, 9, WHITE_PIECE)
+        writer.move(9, 10, BLACK_PIECE)
+        writer.end_game()
+    output = tmp_path / 'analysis.jsonl'
+    assert main(['analyze', str(path), '--game-log', '--engine', 'max_min',
+                 '--workers', '1', '--output', str(output)]) == 0
+    assert [r['ply'] for r in read_jsonl(output)] == [0, 1, 2]
+
+
+def test_analyze_uses_the_logged_board_rules(tmp_path):
+    path = tmp_path / 'games.zgl'
+    with GameLogWriter(path) as writer:
+        writer.start_game(9, 4)
+        for col in range(4):
+            writer.move(4, col, WHITE_PIECE)
+            writer.move(5, col, BLACK_PIECE)
+        writer.end_game()
+    output = tmp_path / 'analysis.jsonl'
+    assert main(['analyze', str(path), '--game-log', '--depth', '1',
+                 '--output', str(output)]) == 0
+    # 按记录里的连四规则, 白棋第四子就赢了
+    assert [r['ply'] for r in read_jsonl(output)] == list(range(7))
+
+
+def test_analyze_jsonl_board_rules(tmp_path):
+    games = tmp_path / 'games.jsonl'
+    moves = [[4 + ply % 2, ply // 2] for ply in range(8)]
+    games.write_text(json.dumps(moves) + '\n', encoding='utf-8')
+    output = tmp_path / 'analysis.jsonl'
+    assert main(['analyze', str(games), '--depth', '1', '--board-len', '9',
+                 '--win-len', '4', '--output', str(output)]) == 0
+    results = read_jsonl(output)
+    assert len(results) == 7
+    assert all(0 <= x < 9 and 0 <= y < 9 for x, y in
+               (r['best'] for r in results))
+
+
+def test_bench(tmp_path, capsys):
+    report = tmp_path / 'bench.json'
+    assert main(BENCH_ARGS + ['--output', str(report)]) == 0
+    summary = json.loads(capsys.readouterr().out)
+    assert summary['games'] == 4
+    with open(report, encoding='utf-8') as f:
+        assert json.load(f)['summary'] == summary
+
+
+def test_bench_regression_exit_code(tmp_path, capsys):
+    baseline = tmp_path / 'baseline.json'
+    baseline.write_text(json.dumps({'summary': {'evaluations_per_move': 1}}),
+                        encoding='utf-8')
+    assert main(BENCH_ARGS + ['--baseline', str(baseline)]) == 1
+    assert 'REGRESSION evaluations_per_move' in capsys.readouterr().err
+
+
+@pytest.mark.parametrize('argv', [[], ['fly'], ['serve', '--fast'],
+                                  ['play', '--engine', 'mcts']])
+def test_bad_arguments(argv):
+    with pytest.raises(SystemExit):
+        main(argv)
+
+
+def test_window_mode_cannot_play_black(capsys):
+    with pytest.raises(SystemExit) as exc_info:
+        main(['play', '--piece', 'black'])
+    assert exc_info.value.code == 2
+    assert 'only supports playing white' in capsys.readouterr().err
+
+
+@pytest.mark.parametrize('module', ['zobang.cmd', 'zobang.analysis',
+                                    'zobang.strategy.max_min_play',
+                                    'zobang.strategy.mcts'])
+def test_import_does_not_load_executors(module):
+    # 在新进程里import, 不受测试进程里已经加载的模块影响
+    code = (f'import sys, {module}; print(",".join(name for name in '
+            f'("concurrent.futures", "dataclasses") if name in sys.modules))')
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    loaded = subprocess.run([sys.executable, '-c', code], cwd=root,
+                            check=True, capture_output=True, text=True)
+    assert loaded.stdout.strip() == ''
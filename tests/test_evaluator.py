@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import random
+from zobang.chess_board.chess_board import ChessBoard
+from zobang.constant import WHITE_PIECE, BLACK_PIECE
+from zobang.strategy.evaluator import IncrementalEvaluator
+from zobang.strategy.pattern import line_score
+
+
+def full_score(board, piece_type):
+    """
+    不用增量, 逐条线重新打分
+    """
+    grid = board.piece_grid()
+    return sum(line_score(piece_type=piece_type,
+                          row_position=[grid[x][y] for x, y in line],
+                          win_len=board.win_len)
+               for line in board.geometry.lines)
+
+
+def assert_matches_rescore(evaluator, board):
+    for piece_type in (WHITE_PIECE, BLACK_PIECE):
+        assert evaluator.total(piece_type) == full_score(board, piece_type)
+    assert evaluator.score(WHITE_PIECE) == -evaluator.score(BLACK_PIECE)
+
+
+def test_update_and_rollback_match_a_full_rescore():
+    rand = random.Random(7)
+    board = ChessBoard(11, 5)
+    evaluator = IncrementalEvaluator(board, board.geometry)
+    cells = [(x, y) for x in range(11) for y in range(11)]
+    rand.shuffle(cells)
+    played, piece = [], WHITE_PIECE
+    for x, y in cells[:30]:
+        board.place(x, y, piece)
+        evaluator.update(x, y, piece)
+        played.append((x, y, piece))
+        piece = BLACK_PIECE if piece == WHITE_PIECE else WHITE_PIECE
+        assert_matches_rescore(evaluator, board)
+    while played:
+        x, y, piece = played.pop()
+        board.take(x, y, piece)
+        evaluator.rollback()
+        assert_matches_rescore(evaluator, board)
+    assert evaluator.total(WHITE_PIECE) == 0
+
+
+def test_starts_from_the_stones_already_on_the_board():
+    board = ChessBoard(9, 5)
+    for x, y, piece in ((4, 4, WHITE_PIECE), (4, 5, WHITE_PIECE),
+                        (3, 3, BLACK_PIECE)):
+        board.place(x, y, piece)
+    evaluator = IncrementalEvaluator(board, board.geometry)
+    assert_matches_rescore(evaluator, board)
+    assert evaluator.score(WHITE_PIECE) > 0
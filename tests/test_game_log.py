@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+import pytest
+from zobang.chess_board.chess_board import ChessBoard
+from zobang.chess_board.game_log import GameLogReader, GameLogWriter
+from zobang.constant import (ChessPieceType, NO_PIECE, WHITE_PIECE,
+                             BLACK_PIECE)
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / 'games.zgl'
+    with GameLogWriter(path) as writer:
+        writer.start_game(15, 5)
+        writer.move(7, 7, WHITE_PIECE)
+        writer.move(7, 8, BLACK_PIECE)
+        writer.end_game(WHITE_PIECE)
+        writer.start_game(9, 4)
+        writer.move(4, 4, WHITE_PIECE)
+        writer.end_game(NO_PIECE)
+    with GameLogReader(path) as reader:
+        assert len(reader) == 2
+        first = reader.game(0)
+        assert (first.board_len, first.win_len, first.winner) == (15, 5,
+                                                                  WHITE_PIECE)
+        del first
+        assert list(reader.iter_moves(0)) == [(7, 7, WHITE_PIECE),
+                                              (7, 8, BLACK_PIECE)]
+        assert reader.plies(1) == 1
+        assert reader.game(1).winner == NO_PIECE
+        assert list(reader.iter_games()) == [
+            (0, [(7, 7), (7, 8)], dict(board_len=15, win_len=5)),
+            (1, [(4, 4)], dict(board_len=9, win_len=4))]
+
+
+def test_appending_keeps_earlier_games(tmp_path):
+    path = tmp_path / 'games.zgl'
+    for row in (1, 2):
+        with GameLogWriter(path) as writer:
+            writer.start_game(15, 5)
+            writer.move(row, row, WHITE_PIECE)
+            writer.end_game()
+    with GameLogReader(path) as reader:
+        assert [moves for _, moves, _ in reader.iter_games()] \
+            == [[(1, 1)], [(2, 2)]]
+
+
+def test_unfinished_game_and_half_move_are_readable(tmp_path):
+    path = tmp_path / 'games.zgl'
+    with GameLogWriter(path) as writer:
+        writer.start_game(15, 5)
+        writer.move(7, 7, WHITE_PIECE)
+        writer.move(7, 8, BLACK_PIECE)
+    # 模拟写到一半崩溃: 最后一步只写下了一个字节
+    with open(path, 'ab') as f:
+        f.write(bytes((9,)))
+    with GameLogReader(path) as reader:
+        assert len(reader) == 1
+        assert reader.game(0).winner is None
+        assert reader.plies(0) == 2
+
+
+def test_board_at(tmp_path):
+    path = tmp_path / 'games.zgl'
+    with GameLogWriter(path) as writer:
+        writer.start_game(15, 5)
+        for i, (row, col) in enumerate([(7, 7), (7, 8), (8, 8)]):
+            writer.move(row, col, BLACK_PIECE if i % 2 else WHITE_PIECE)
+    with GameLogReader(path) as reader:
+        board = reader.board_at(0, ply=2)
+        assert board.moves == [(7, 7), (7, 8)]
+        assert board.piece_at(7, 8) == BLACK_PIECE
+        assert reader.board_at(0).piece_at(8, 8) == WHITE_PIECE
+
+
+def test_attach_records_the_moves_played_on_a_board(tmp_path):
+    path = tmp_path / 'games.zgl'
+    board = ChessBoard(15, 5)
+    board.update(7, 7, ChessPieceType.WHITE_CHESS_PIECE)
+    with GameLogWriter(path) as writer:
+        writer.attach(board)
+        for col in range(8, 12):
+            board.update(8, col, ChessPieceType.BLACK_CHESS_PIECE)
+            board.update(7, col, ChessPieceType.WHITE_CHESS_PIECE)
+        # 分出胜负后自动结束这一局, 之后的落子不再记录
+        assert board.recorder is None
+        assert not writer.in_game
+    with GameLogReader(path) as reader:
+        assert reader.game(0).winner == WHITE_PIECE
+        assert reader.plies(0) == 9
+
+
+@pytest.mark.parametrize('content', [b'', b'ZGL', b'XXXX', b'ZGL\x09'])
+def test_not_a_game_log(tmp_path, content):
+    path = tmp_path / 'bad.zgl'
+    path.write_bytes(content)
+    with pytest.raises(Exception, match='not a game log'):
+        GameLogReader(path)
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import pytest
+from zobang.chess_board.chess_board import ChessBoard
+from zobang.constant import ChessPieceType
+from zobang.strategy.action_message import ActionMessage
+from zobang.strategy.max_min_play import MaxMinPlay
+
+WHITE, BLACK = ChessPieceType.WHITE_CHESS_PIECE, \
+    ChessPieceType.BLACK_CHESS_PIECE
+OPENING = [(7, 7), (7, 8), (8, 8), (6, 6)]
+
+
+def search_stats(**kwargs):
+    play = MaxMinPlay(ChessBoard(15), BLACK, **kwargs)
+    for i, (x, y) in enumerate(OPENING):
+        play.update(x, y, BLACK if i % 2 else WHITE)
+    ret = play.react(ActionMessage(row=9, col=9))
+    return ret, ret.get('stats')
+
+
+def test_stats_are_off_by_default():
+    ret, stats = search_stats(engine='alpha_beta', depth=2)
+    assert stats is None
+    assert ret['nodes'] > 0
+
+
+def test_alpha_beta_stats():
+    ret, stats = search_stats(engine='alpha_beta', depth=2, instrument=True)
+    assert (stats['nodes'], stats['evaluations']) \
+        == (ret['nodes'], ret['evaluations'])
+    # 迭代加深: 根节点在第1层和第2层各展开一次
+    assert stats['ply_nodes'][0] == 2
+    root_moves = stats['branching_factor'][0]
+    assert root_moves > 1
+    assert stats['effective_branching_factor'][0] == root_moves
+    # 第二层有剪枝, 实际搜索的比生成的少
+    assert stats['effective_branching_factor'][1] \
+        < stats['branching_factor'][1]
+    assert stats['cutoffs'] > 0
+    assert stats['tt_misses'] > 0
+    # 试走时重算的线都经过line_scores的缓存
+    assert stats['pattern_cache_hits'] > 0
+    assert stats['total_ms'] >= stats['eval_ms'] > 0
+
+
+def test_max_min_stats():
+    ret, stats = search_stats(engine='max_min', instrument=True)
+    assert stats['nodes'] == ret['nodes']
+    assert stats['ply_nodes'][0] == 1
+    # 固定两层不剪枝, 每个根走法的应手都要看完
+    assert stats['effective_branching_factor'] == stats['branching_factor']
+    assert stats['cutoffs'] == 0
+    assert stats['pattern_cache_hits'] > 0
+
+
+def test_stats_callback_gets_the_search_stats():
+    received = []
+    ret, stats = search_stats(engine='alpha_beta', depth=2,
+                              stats_callback=received.append)
+    assert received == [stats]
+    assert ret['nodes'] > 0
+
+
+@pytest.mark.parametrize('engine', ['max_min', 'alpha_beta'])
+def test_stats_are_per_move(engine):
+    play = MaxMinPlay(ChessBoard(15), BLACK, engine=engine, depth=2,
+                      instrument=True)
+    first = play.react(ActionMessage(row=7, col=7))
+    second = play.react(ActionMessage(row=9, col=9))
+    assert first['stats']['nodes'] == first['nodes']
+    assert second['stats']['nodes'] == second['nodes']
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+import pytest
+from zobang.chess_board.chess_board import ChessBoard
+from zobang.constant import ChessPieceType
+from zobang.strategy.max_min_play import MaxMinPlay, SearchOptions
+
+BLACK = ChessPieceType.BLACK_CHESS_PIECE
+
+
+def test_keyword_arguments_override_the_options():
+    options = SearchOptions(engine='alpha_beta', depth=3, width=8)
+    play = MaxMinPlay(ChessBoard(15), BLACK, options, depth=2)
+    assert (play.options.engine, play.options.depth, play.options.width) \
+        == ('alpha_beta', 2, 8)
+    assert play.engine.depth == 2
+    # options本身不被改动
+    assert options.depth == 3
+    assert play.options == options.replace(depth=2)
+    assert play.options != options
+
+
+def test_options_validation():
+    with pytest.raises(Exception, match='unknown engine mcts'):
+        SearchOptions(engine='mcts')
+    assert SearchOptions(stats_callback=print).instrument
+    with pytest.raises(Exception, match='unknown engine mcts'):
+        SearchOptions().replace(engine='mcts')
+    with pytest.raises(TypeError):
+        SearchOptions(engines='alpha_beta')
+    assert MaxMinPlay(ChessBoard(15), BLACK).engine is None
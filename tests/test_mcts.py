@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import pytest
+from zobang.chess_board.chess_board import ChessBoard
+from zobang.constant import ChessPieceType, NO_PIECE, WHITE_PIECE
+from zobang.strategy.action_message import ActionMessage
+from zobang.strategy.mcts import (MctsOptions, MctsPlay, MonteCarloTreeSearch,
+                                  Node, PlayoutBoard)
+
+WHITE, BLACK = ChessPieceType.WHITE_CHESS_PIECE, \
+    ChessPieceType.BLACK_CHESS_PIECE
+
+
+def test_playout_board_copy_is_independent():
+    board = PlayoutBoard(15, 5)
+    board.place(7 * 15 + 7, WHITE_PIECE)
+    assert sorted(board.candidates) == sorted(board.positions)
+    assert len(board.candidates) == 8
+    copied = board.copy()
+    copied.place(7 * 15 + 8, WHITE_PIECE)
+    assert board.cells[7 * 15 + 8] == NO_PIECE
+    assert len(board.candidates) == 8
+    assert 7 * 15 + 8 not in copied.positions
+    # 邻居表是共用的
+    assert copied.tables[0] is board.tables[0]
+
+
+def test_playout_board_win():
+    board = PlayoutBoard(15, 5)
+    for y in range(3, 7):
+        board.place(7 * 15 + y, WHITE_PIECE)
+    assert board.is_win(7 * 15 + 7, WHITE_PIECE)
+    assert board.is_win(7 * 15 + 2, WHITE_PIECE)
+    assert not board.is_win(8 * 15 + 7, WHITE_PIECE)
+
+
+def test_options_validation():
+    with pytest.raises(Exception, match='either playouts or time_budget_ms'):
+        MctsOptions(playouts=None)
+    assert MctsOptions(candidate_radius=None).candidate_radius == 1
+    play = MctsPlay(ChessBoard(15), BLACK, MctsOptions(playouts=10),
+                    exploration=0.5)
+    assert (play.options.playouts, play.options.exploration) == (10, 0.5)
+
+
+def test_search_runs_the_requested_playouts():
+    board = PlayoutBoard.from_chess_board(ChessBoard(9, 5))
+    root = Node(None, WHITE_PIECE)
+    search = MonteCarloTreeSearch(MctsOptions(playouts=50), seed=1)
+    assert search.run(root, board, playouts=50) == 50
+    assert root.visits == 50
+    assert sum(child.visits for child in root.children.values()) == 50
+
+
+def test_forced_move_blocks_the_opponent_four():
+    play = MctsPlay(ChessBoard(15), BLACK, playouts=20, seed=1)
+    for i, (x, y) in enumerate([(8, 4), (8, 3), (8, 5), (0, 0), (8, 6),
+                                (0, 14)]):
+        play.update(x, y, BLACK if i % 2 else WHITE)
+    ret = play.react(ActionMessage(row=8, col=7))
+    assert (ret['msg'].row, ret['msg'].col) == (8, 8)
+    assert ret['playouts'] == 0
+
+
+def test_same_seed_same_move():
+    moves = []
+    for _ in range(2):
+        play = MctsPlay(ChessBoard(9, 5), BLACK, playouts=200, seed=3)
+        ret = play.react(ActionMessage(row=4, col=4))
+        assert ret['playouts'] == 200
+        moves.append((ret['msg'].row, ret['msg'].col))
+    assert moves[0] == moves[1]
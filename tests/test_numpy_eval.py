@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import random
+import pytest
+from zobang.chess_board.chess_board import ChessBoard
+from zobang.constant import ChessPieceType, NO_PIECE, WHITE_PIECE, BLACK_PIECE
+from zobang.strategy.action_message import ActionMessage
+from zobang.strategy.max_min_play import MaxMinPlay
+from zobang.strategy.numpy_eval import NumpyBoard
+
+pytest.importorskip('numpy')
+
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+def side_value(cells, x, y, own, win_len):
+    """
+    逐个窗口算: (x, y)所在的每个没有对方棋子的窗口, 得10 ** 己方棋子数分,
+    没有己方棋子或已经连满的窗口不得分
+    """
+    board_len = len(cells)
+    total = 0
+    for dx, dy in DIRECTIONS:
+        for start in range(-win_len + 1, 1):
+            window = [(x + (start + k) * dx, y + (start + k) * dy)
+                      for k in range(win_len)]
+            if not all(0 <= a < board_len and 0 <= b < board_len
+                       for a, b in window):
+                continue
+            values = [cells[a][b] for a, b in window]
+            if any(v not in (NO_PIECE, own) for v in values):
+                continue
+            count = values.count(own)
+            if 0 < count < win_len:
+                total += 10 ** count
+    return total
+
+
+def python_move_scores(cells, moves, piece, win_len):
+    peer = BLACK_PIECE if piece == WHITE_PIECE else WHITE_PIECE
+    return {(x, y): float(side_value(cells, x, y, piece, win_len)
+                          + side_value(cells, x, y, peer, win_len))
+            for x, y in moves}
+
+
+@pytest.mark.parametrize('board_len,win_len,seed', [(15, 5, 1), (9, 4, 2),
+                                                    (11, 5, 3)])
+def test_move_scores_match_the_pure_python_windows(board_len, win_len, seed):
+    rand = random.Random(seed)
+    board = NumpyBoard(board_len, win_len)
+    cells = [[NO_PIECE] * board_len for _ in range(board_len)]
+    all_cells = [(x, y) for x in range(board_len) for y in range(board_len)]
+    rand.shuffle(all_cells)
+    for i, (x, y) in enumerate(all_cells[:board_len * 2]):
+        piece = BLACK_PIECE if i % 2 else WHITE_PIECE
+        board.update(x, y, piece)
+        cells[x][y] = piece
+    moves = all_cells[board_len * 2:]
+    for piece in (WHITE_PIECE, BLACK_PIECE):
+        assert board.move_scores(moves, piece) \
+            == python_move_scores(cells, moves, piece, win_len)
+    x, y = all_cells[0]
+    board.rollback(x, y)
+    cells[x][y] = NO_PIECE
+    assert board.move_scores([(x, y)], WHITE_PIECE) \
+        == python_move_scores(cells, [(x, y)], WHITE_PIECE, win_len)
+
+
+def test_occupied_cells_score_minus_one():
+    board = NumpyBoard(9, 5)
+    board.update(4, 4, WHITE_PIECE)
+    assert board.score_map(WHITE_PIECE)[4, 4] == -1
+
+
+def test_numpy_ordering_still_blocks_the_four():
+    play = MaxMinPlay(ChessBoard(15), ChessPieceType.BLACK_CHESS_PIECE,
+                      engine='alpha_beta', depth=2, use_numpy=True)
+    assert play.player.cheap_move_scores
+    for i, (x, y) in enumerate([(8, 4), (8, 3), (8, 5), (0, 0), (8, 6),
+                                (0, 14)]):
+        play.update(x, y, ChessPieceType.BLACK_CHESS_PIECE if i % 2
+                    else ChessPieceType.WHITE_CHESS_PIECE)
+    ret = play.react(ActionMessage(row=8, col=7))
+    assert (ret['msg'].row, ret['msg'].col) == (8, 8)
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+import pytest
+from zobang.chess_board.chess_board import ChessBoard
+from zobang.chess_board.symmetry import SYMMETRY_NUM, transform
+from zobang.constant import CONFIG, ChessPieceType
+from zobang.strategy.action_message import ActionMessage
+from zobang.strategy.book_builder import build_book
+from zobang.strategy.max_min_play import MaxMinPlay
+from zobang.strategy.opening_book import (OpeningBook, canonical_key,
+                                          write_book)
+
+BOARD_LEN = CONFIG['CHESS_MAX_ROW']
+WHITE, BLACK, REPLY = [(9, 9), (7, 8)], [(9, 10)], (8, 10)
+
+
+def open_book(path, board_len=BOARD_LEN):
+    key, symmetry = canonical_key(WHITE, BLACK, board_len)
+    write_book(path, {key: (transform(symmetry, *REPLY, board_len), 4)},
+               board_len=board_len, max_stones=3)
+    return OpeningBook(path)
+
+
+@pytest.fixture(name='book')
+def book_fixture(tmp_path):
+    book = open_book(tmp_path / 'opening.book')
+    yield book
+    book.close()
+
+
+def test_lookup(book):
+    assert len(book) == 1
+    assert book.lookup(WHITE, BLACK) == REPLY
+    assert book.lookup([(9, 9)], BLACK) is None
+
+
+@pytest.mark.parametrize('symmetry', range(SYMMETRY_NUM))
+def test_lookup_in_every_symmetric_position(book, symmetry):
+    def moved(cells):
+        return [transform(symmetry, x, y, BOARD_LEN) for x, y in cells]
+
+    assert book.lookup(moved(WHITE), moved(BLACK)) \
+        == transform(symmetry, *REPLY, BOARD_LEN)
+
+
+def test_lookup_canonical_checks_the_stones(book):
+    key, symmetry = canonical_key(WHITE, BLACK, BOARD_LEN)
+    assert book.lookup_canonical(key, symmetry, 3) == REPLY
+    assert book.lookup_canonical(key, symmetry, 4) is None
+
+
+def test_chess_board_canonical_key_matches_the_book_key():
+    board = ChessBoard()
+    board.update(*WHITE[0], ChessPieceType.WHITE_CHESS_PIECE)
+    board.update(*BLACK[0], ChessPieceType.BLACK_CHESS_PIECE)
+    board.update(*WHITE[1], ChessPieceType.WHITE_CHESS_PIECE)
+    assert board.canonical_key() == canonical_key(WHITE, BLACK, BOARD_LEN)
+
+
+def test_lookup_checks_the_board_rules(tmp_path):
+    book = open_book(tmp_path / 'opening.book', board_len=15)
+    try:
+        assert book.lookup(WHITE, BLACK, board_len=15) == REPLY
+        # 不给规则时按默认的20路棋盘, 与这本开局库对不上
+        assert book.lookup(WHITE, BLACK) is None
+        key, symmetry = canonical_key(WHITE, BLACK, 15)
+        assert book.lookup_canonical(key, symmetry, 3, board_len=15) \
+            == REPLY
+        assert book.lookup_canonical(key, symmetry, 3, board_len=15,
+                                     win_len=4) is None
+    finally:
+        book.close()
+
+
+def test_not_an_opening_book(tmp_path):
+    path = tmp_path / 'bad.book'
+    path.write_bytes(b'\0' * 32)
+    with pytest.raises(Exception, match='not an opening book'):
+        OpeningBook(path)
+
+
+def test_built_book_is_used_by_the_engine(tmp_path):
+    path = str(tmp_path / 'opening.book')
+    assert build_book(path, plies=1, depth=1, radius=0) == 1
+    mid = BOARD_LEN // 2
+    play = MaxMinPlay(ChessBoard(), ChessPieceType.BLACK_CHESS_PIECE,
+                      opening_book=path)
+    try:
+        ret = play.react(ActionMessage(row=mid, col=mid))
+    finally:
+        play.close()
+    assert ret['book']
+    assert ret['nodes'] == 0
+
+
+def test_built_book_records_its_rules(tmp_path):
+    path = str(tmp_path / 'opening.book')
+    assert build_book(path, plies=1, depth=1, radius=0, board_len=9,
+                      win_len=4) == 1
+    book = OpeningBook(path)
+    try:
+        assert (book.board_len, book.win_len) == (9, 4)
+    finally:
+        book.close()
+    play = MaxMinPlay(ChessBoard(9, 4), ChessPieceType.BLACK_CHESS_PIECE,
+                      opening_book=path)
+    try:
+        ret = play.react(ActionMessage(row=4, col=4))
+    finally:
+        play.close()
+    assert ret['book']
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+import pytest
+from zobang.chess_board.chess_board import ChessBoard
+from zobang.constant import ChessPieceType
+from zobang.strategy.action_message import ActionMessage
+from zobang.strategy.max_min_play import MaxMinPlay
+
+WHITE, BLACK = ChessPieceType.WHITE_CHESS_PIECE, \
+    ChessPieceType.BLACK_CHESS_PIECE
+OPENING = [(7, 7), (7, 8), (8, 8), (6, 6)]
+
+
+def new_play(**kwargs):
+    play = MaxMinPlay(ChessBoard(15), BLACK, **kwargs)
+    for i, (x, y) in enumerate(OPENING):
+        play.update(x, y, BLACK if i % 2 else WHITE)
+    return play
+
+
+@pytest.mark.parametrize('kwargs', [dict(engine='max_min'),
+                                    dict(engine='alpha_beta', depth=2)])
+def test_parallel_search_agrees_with_the_single_process_search(kwargs):
+    single = new_play(**kwargs)
+    parallel = new_play(workers=2, **kwargs)
+    try:
+        expected = single.react(ActionMessage(row=9, col=9))['msg']
+        ret = parallel.react(ActionMessage(row=9, col=9))
+    finally:
+        parallel.close()
+    assert (ret['msg'].row, ret['msg'].col) == (expected.row, expected.col)
+    assert ret['nodes'] > 0
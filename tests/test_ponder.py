@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import time
+import pytest
+from zobang.chess_board.chess_board import ChessBoard
+from zobang.constant import ChessPieceType, WHITE_PIECE, BLACK_PIECE
+from zobang.strategy.action_message import ActionMessage
+from zobang.strategy.max_min_play import MaxMinPlay, WholeChessPosition
+from zobang.strategy.ponder import Ponderer
+
+BLACK = ChessPieceType.BLACK_CHESS_PIECE
+
+
+def wait(ponderer, timeout=10):
+    deadline = time.monotonic() + timeout
+    while ponderer.running and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not ponderer.running
+
+
+@pytest.fixture(name='play')
+def play_fixture():
+    play = MaxMinPlay(ChessBoard(15), BLACK, engine='alpha_beta', depth=2,
+                      ponder=True)
+    play.react(ActionMessage(row=7, col=7))
+    wait(play.ponderer)
+    yield play
+    play.close()
+
+
+def test_ponderer_guesses_replies_on_a_copy():
+    position = WholeChessPosition(chess_board=ChessBoard(15),
+                                  player_piece_type=BLACK_PIECE)
+    position.update(7, 7, WHITE_PIECE)
+    position.update(6, 6, BLACK_PIECE)
+    ponderer = Ponderer(depth=2, replies=2)
+    ponderer.start(position)
+    wait(ponderer)
+    assert len(ponderer.results) == 2
+    for reply, (move, _, depth) in ponderer.results.items():
+        assert depth == 2
+        assert move != reply and position.board.no_piece_info.has(*move)
+    # 后台线程在快照上搜索, 调用方的局面没有变
+    assert position.board.moves == [(7, 7), (6, 6)]
+    assert ponderer.take((0, 0)) is None
+
+
+def test_ponder_hit_plays_the_pondered_move(play):
+    reply = min(play.ponderer.results)
+    expected = play.ponderer.results[reply][0]
+    moves = list(play.chess_board.moves)
+    ret = play.react(ActionMessage(row=reply[0], col=reply[1]))
+    assert ret['ponder'] and ret['nodes'] == 0
+    assert (ret['msg'].row, ret['msg'].col) == expected
+    # 与不预先搜索时同样的局面搜出来的走法一样
+    fresh = MaxMinPlay(ChessBoard(15), BLACK, engine='alpha_beta', depth=2)
+    fresh.update(*moves[0], ChessPieceType.WHITE_CHESS_PIECE)
+    fresh.update(*moves[1], BLACK)
+    fresh_ret = fresh.react(ActionMessage(row=reply[0], col=reply[1]))
+    assert (fresh_ret['msg'].row, fresh_ret['msg'].col) == expected
+
+
+def test_ponder_miss_searches_as_usual(play):
+    assert (0, 0) not in play.ponderer.results
+    ret = play.react(ActionMessage(row=0, col=0))
+    assert not ret['ponder'] and ret['nodes'] > 0
+
+
+def test_interrupted_ponder_is_not_used():
+    ponderer = Ponderer(depth=6, replies=3)
+    position = WholeChessPosition(chess_board=ChessBoard(15),
+                                  player_piece_type=BLACK_PIECE)
+    for i, (x, y) in enumerate([(7, 7), (7, 8), (8, 8), (6, 6)]):
+        position.update(x, y, BLACK_PIECE if i % 2 else WHITE_PIECE)
+    ponderer.start(position)
+    ponderer.stop()
+    assert not ponderer.running
+    # 被打断的那个应手不留结果, 留下的都是搜满了深度的
+    assert all(depth == 6 for _, _, depth in ponderer.results.values())
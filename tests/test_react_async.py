@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from zobang.chess_board.chess_board import ChessBoard
+from zobang.constant import ChessPieceType, WHITE_PIECE, BLACK_PIECE
+from zobang.strategy.action_message import ActionMessage
+from zobang.strategy.max_min_play import MaxMinPlay, WholeChessPosition
+
+WHITE, BLACK = ChessPieceType.WHITE_CHESS_PIECE, \
+    ChessPieceType.BLACK_CHESS_PIECE
+OPENING = [(7, 7), (7, 8), (8, 8), (6, 6)]
+
+
+def new_play(**kwargs):
+    play = MaxMinPlay(ChessBoard(15), BLACK, **kwargs)
+    for i, (x, y) in enumerate(OPENING):
+        play.update(x, y, BLACK if i % 2 else WHITE)
+    return play
+
+
+def test_react_async_returns_the_react_result():
+    play = new_play(engine='alpha_beta', depth=2)
+    done = threading.Event()
+    try:
+        future = play.react_async(ActionMessage(row=9, col=9),
+                                  callback=lambda _: done.set())
+        ret = future.result(timeout=30)
+        assert done.wait(timeout=5)
+    finally:
+        play.close()
+    expected = new_play(engine='alpha_beta', depth=2).react(
+        ActionMessage(row=9, col=9))['msg']
+    assert (ret['msg'].row, ret['msg'].col) == (expected.row, expected.col)
+    assert play.chess_board.moves == OPENING + [
+        (9, 9), (expected.row, expected.col)]
+
+
+def test_stop_search_plays_the_best_move_so_far():
+    play = new_play(engine='alpha_beta', depth=20)
+    try:
+        future = play.react_async(ActionMessage(row=9, col=9))
+        time.sleep(0.05)
+        start = time.monotonic()
+        play.stop_search()
+        ret = future.result(timeout=30)
+        assert time.monotonic() - start < 5
+    finally:
+        play.close()
+    assert ret['depth'] < 20
+    assert play.chess_board.piece_at(ret['msg'].row, ret['msg'].col) \
+        == BLACK.value
+
+
+def test_stop_right_after_submitting():
+    play = new_play(engine='alpha_beta', depth=20)
+    try:
+        # 提交时清掉叫停信号, 之后的叫停不会因为搜索还没开始而丢失
+        future = play.react_async(ActionMessage(row=9, col=9))
+        play.stop_search()
+        ret = future.result(timeout=5)
+    finally:
+        play.close()
+    assert ret['msg'] is not None
+    assert play.chess_board.moves[-2] == (9, 9)
+
+
+def test_max_min_search_stops_after_the_first_root_move():
+    position = WholeChessPosition(chess_board=ChessBoard(15),
+                                  player_piece_type=BLACK_PIECE)
+    for i, (x, y) in enumerate(OPENING[:3]):
+        position.update(x, y, BLACK_PIECE if i % 2 else WHITE_PIECE)
+    full_move = position.max_min_search()
+    full_nodes = position.search_nodes
+    stop_event = threading.Event()
+    stop_event.set()
+    move = position.max_min_search(stop_event)
+    assert move in position.possible_moves()
+    assert position.search_nodes < full_nodes
+    assert full_move in position.possible_moves()
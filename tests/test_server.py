@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from zobang.server import JsonLineServer, SessionManager
+
+
+@pytest.fixture(name='server')
+def server_fixture():
+    # 线程池代替工作进程, 协议的行为是一样的
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        manager = SessionManager(executor=executor, engine='alpha_beta',
+                                 depth=1)
+        yield JsonLineServer(manager)
+        manager.close()
+
+
+def request(server, **kwargs):
+    return asyncio.run(server.handle_request(kwargs))
+
+
+def test_new_game_with_ai_first(server):
+    state = request(server, op='new', game_id='g', piece='black', size=15)
+    assert (state['game_id'], state['ai_piece'], state['size']) \
+        == ('g', 'WHITE_CHESS_PIECE', 15)
+    assert state['moves'] == [(7, 7)]
+    with pytest.raises(Exception, match='already exists'):
+        request(server, op='new', game_id='g')
+
+
+def test_move_state_and_close(server):
+    request(server, op='new', game_id='game', size=9, win_len=4)
+    ret = request(server, op='move', game_id='game', row=4, col=4)
+    assert ret['game_id'] == 'game'
+    assert not ret['finished']
+    state = request(server, op='state', game_id='game')
+    assert state['moves'] == [(4, 4), tuple(ret['move'])]
+    assert request(server, op='close', game_id='game') \
+        == dict(game_id='game')
+    with pytest.raises(Exception, match='not found'):
+        request(server, op='state', game_id='game')
+
+
+def test_bad_requests(server):
+    request(server, op='new', game_id='bad', size=9)
+    request(server, op='move', game_id='bad', row=4, col=4)
+    with pytest.raises(Exception, match='is occupied'):
+        request(server, op='move', game_id='bad', row=4, col=4)
+    with pytest.raises(Exception, match='out of board'):
+        request(server, op='move', game_id='bad', row=9, col=0)
+    with pytest.raises(Exception, match='bad board size'):
+        request(server, op='new', size=4, win_len=5)
+    with pytest.raises(Exception, match='unknown op jump'):
+        request(server, op='jump')
+
+
+def test_json_lines_over_tcp(server):
+    async def talk():
+        tcp = await asyncio.start_server(server.handle_connection,
+                                         '127.0.0.1', 0)
+        port = tcp.sockets[0].getsockname()[1]
+        async with tcp:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            for line in (dict(id=1, op='new', game_id='tcp', size=9),
+                         dict(id=2, op='move', game_id='tcp', row=4, col=4),
+                         dict(id=3, op='nothing')):
+                writer.write(json.dumps(line).encode() + b'\n')
+                await writer.drain()
+            writer.write(b'not json\n')
+            writer.write_eof()
+            responses = [json.loads(line) for line in
+                         (await reader.read()).splitlines()]
+            writer.close()
+        return responses
+
+    responses = asyncio.run(talk())
+    assert len(responses) == 4
+    by_id = {response.get('id'): response for response in responses}
+    assert by_id[1]['ok'] and by_id[1]['game_id'] == 'tcp'
+    assert by_id[2]['ok'] and len(by_id[2]['move']) == 2
+    assert not by_id[3]['ok'] and by_id[3]['error'] == 'unknown op nothing'
+    assert not by_id[None]['ok']
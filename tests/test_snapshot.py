@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+import pytest
+from zobang.chess_board.chess_board import ChessBoard
+from zobang.chess_board.snapshot import BoardSnapshot
+from zobang.constant import (ChessPieceType, NO_PIECE, WHITE_PIECE,
+                             BLACK_PIECE)
+from zobang.strategy.max_min_play import WholeChessPosition
+
+
+def play(board, moves):
+    """
+    白棋先走, 交替落子
+    """
+    piece = WHITE_PIECE
+    for row, col in moves:
+        board.place(row, col, piece)
+        piece = BLACK_PIECE if piece == WHITE_PIECE else WHITE_PIECE
+    return board
+
+
+WHITE_WINS = [(7, 3), (8, 3), (7, 4), (8, 4), (7, 5), (8, 5), (7, 6), (8, 6),
+              (7, 7)]
+
+
+def test_clone_is_independent():
+    board = play(ChessBoard(), [(7, 7), (7, 8)])
+    copy = board.clone()
+    copy.place(8, 8, WHITE_PIECE)
+    assert copy.piece_at(8, 8) == WHITE_PIECE
+    assert board.piece_at(8, 8) == NO_PIECE
+    assert board.moves == [(7, 7), (7, 8)]
+    assert copy.row_num == board.row_num and copy.win_len == board.win_len
+
+
+def test_snapshot_round_trip():
+    board = play(ChessBoard(11, 4), [(5, 5), (5, 6), (6, 6), (0, 10)])
+    data = board.to_bytes()
+    snapshot = BoardSnapshot(memoryview(data))
+    assert (snapshot.board_len, snapshot.win_len) == (11, 4)
+    assert list(snapshot.iter_moves()) == board.moves
+    copy, side = ChessBoard.from_bytes(data)
+    assert side == ChessPieceType.WHITE_CHESS_PIECE
+    assert copy.moves == board.moves
+    assert copy.piece_grid() == board.piece_grid()
+    assert copy.white_position_info.last_chess == (6, 6)
+    assert copy.black_position_info.last_chess == (0, 10)
+    assert copy.no_piece_info.count() == 11 * 11 - 4
+
+
+def test_snapshot_keeps_the_win_flag():
+    board = play(ChessBoard(), WHITE_WINS)
+    copy, side = ChessBoard.from_bytes(board.to_bytes())
+    assert side == ChessPieceType.BLACK_CHESS_PIECE
+    assert copy.white_position_info.is_win()
+    assert not copy.black_position_info.is_win()
+
+
+@pytest.mark.parametrize('restore', [
+    lambda board: board.clone(),
+    lambda board: ChessBoard.from_bytes(board.to_bytes())[0]])
+def test_restored_board_rolls_back_past_the_copy(restore):
+    board = restore(play(ChessBoard(), WHITE_WINS))
+    # 逐步退回到空棋盘, 每一步的连线标记都和原来下棋时一样
+    for i, (row, col) in reversed(list(enumerate(WHITE_WINS))):
+        piece = BLACK_PIECE if i % 2 else WHITE_PIECE
+        board.take(row, col, piece)
+        assert not board.white_position_info.is_win()
+        assert not board.black_position_info.is_win()
+    assert board.moves == [] and board.no_piece_info.count() == 20 * 20
+    play(board, WHITE_WINS)
+    assert board.white_position_info.is_win()
+
+
+def test_truncated_snapshot_is_rejected():
+    data = play(ChessBoard(), [(7, 7), (7, 8)]).to_bytes()
+    with pytest.raises(Exception, match='truncated'):
+        BoardSnapshot(data[:-1])
+
+
+def test_position_snapshot_round_trip():
+    position = WholeChessPosition(chess_board=ChessBoard(15),
+                                  player_piece_type=WHITE_PIECE)
+    for i, (x, y) in enumerate([(7, 7), (7, 8), (8, 8), (6, 6)]):
+        position.update(x, y, BLACK_PIECE if i % 2 else WHITE_PIECE)
+    copied = WholeChessPosition.from_snapshot(position.snapshot())
+    assert copied.player_piece_type == WHITE_PIECE
+    assert copied.hash == position.hash
+    assert copied.evaluate() == position.evaluate()
+    assert copied.possible_moves() == position.possible_moves()
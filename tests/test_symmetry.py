@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+from zobang.chess_board.chess_board import ChessBoard
+from zobang.constant import WHITE_PIECE, BLACK_PIECE
+
+
+def play(board, moves):
+    """
+    白棋先走, 交替落子
+    """
+    piece = WHITE_PIECE
+    for row, col in moves:
+        board.place(row, col, piece)
+        piece = BLACK_PIECE if piece == WHITE_PIECE else WHITE_PIECE
+    return board
+
+
+def test_canonical_key_is_the_same_for_symmetric_positions():
+    board = play(ChessBoard(15), [(7, 7), (6, 8), (5, 5)])
+    # 15路棋盘上左右翻转
+    mirror = play(ChessBoard(15), [(7, 7), (6, 6), (5, 9)])
+    assert board.canonical_key()[0] == mirror.canonical_key()[0]
+
+
+def test_tracked_symmetric_hash_matches_on_demand_hash():
+    board = ChessBoard()
+    board.track_symmetry()
+    tracked = play(board, [(7, 7), (6, 8), (5, 5), (9, 2)])
+    untracked = play(ChessBoard(), [(7, 7), (6, 8), (5, 5), (9, 2)])
+    assert tracked.canonical_key() == untracked.canonical_key()
+    tracked.take(9, 2, BLACK_PIECE)
+    untracked.take(9, 2, BLACK_PIECE)
+    assert tracked.canonical_key() == untracked.canonical_key()
+    assert tracked.clone().canonical_key() == tracked.canonical_key()
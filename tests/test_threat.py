@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+from zobang.chess_board.bitboard import BitBoard
+from zobang.chess_board.chess_board import ChessBoard
+from zobang.constant import ChessPieceType, NO_PIECE, WHITE_PIECE, BLACK_PIECE
+from zobang.strategy.action_message import ActionMessage
+from zobang.strategy.max_min_play import MaxMinPlay
+from zobang.strategy.pattern import line_threats
+from zobang.strategy.threat import ThreatSolver
+
+BOARD_LEN = 15
+# 白棋6, 6冲四后黑棋只能挡一头, 之后白棋能一直冲四直到连成五
+WHITE = [(7, 4), (7, 5), (7, 6), (8, 8), (9, 9), (6, 3), (6, 4), (6, 5)]
+BLACK = [(7, 3), (10, 10), (6, 2), (0, 0), (0, 2), (0, 4), (0, 6), (0, 8)]
+
+
+def grid(white, black):
+    cells = [[NO_PIECE] * BOARD_LEN for _ in range(BOARD_LEN)]
+    for x, y in white:
+        cells[x][y] = WHITE_PIECE
+    for x, y in black:
+        cells[x][y] = BLACK_PIECE
+    return cells
+
+
+def five_points(cells, piece_type):
+    """
+    piece_type再下一子就能连成五的空位
+    """
+    board = BitBoard(BOARD_LEN)
+    for x in range(BOARD_LEN):
+        for y in range(BOARD_LEN):
+            if cells[x][y] == piece_type:
+                board.set(x, y)
+    points = set()
+    for x in range(BOARD_LEN):
+        for y in range(BOARD_LEN):
+            if cells[x][y] == NO_PIECE:
+                board.set(x, y)
+                if board.has_line_at(x, y, 5):
+                    points.add((x, y))
+                board.clear(x, y)
+    return points
+
+
+def test_solution_is_a_sequence_of_forcing_fours():
+    cells = grid(WHITE, BLACK)
+    sequence = ThreatSolver(cells, win_len=5).solve(WHITE_PIECE)
+    assert sequence is not None and len(sequence) % 2 == 1
+    for i, (x, y) in enumerate(sequence):
+        assert cells[x][y] == NO_PIECE
+        if i % 2:
+            # 防守方挡的正是进攻方唯一的成五点
+            assert five_points(cells, WHITE_PIECE) == {(x, y)}
+            cells[x][y] = BLACK_PIECE
+            assert not five_points(cells, BLACK_PIECE)
+        else:
+            cells[x][y] = WHITE_PIECE
+    # 最后一手之后白棋至少有两个成五点, 黑棋挡不住
+    assert len(five_points(cells, WHITE_PIECE)) >= 2
+
+
+def test_immediate_five_is_returned_alone():
+    cells = grid([(7, 4), (7, 5), (7, 6), (7, 7)], [(7, 3)])
+    assert ThreatSolver(cells, win_len=5).solve(WHITE_PIECE) == [(7, 8)]
+
+
+def test_must_defend_when_the_opponent_has_a_four():
+    cells = grid([(7, 4), (7, 5), (7, 6), (7, 7)], [(7, 3)])
+    assert ThreatSolver(cells, win_len=5).solve(BLACK_PIECE) is None
+
+
+def test_no_solution_without_threats():
+    cells = grid([(7, 7)], [(0, 0)])
+    assert ThreatSolver(cells, win_len=5).solve(WHITE_PIECE) is None
+
+
+def test_node_budget():
+    solver = ThreatSolver(grid(WHITE, BLACK), win_len=5, max_nodes=1)
+    assert solver.solve(WHITE_PIECE) is None
+    # 第一个节点之后就超出预算
+    assert solver.nodes == 2
+
+
+def test_depth_limit():
+    solver = ThreatSolver(grid(WHITE, BLACK), win_len=5, max_depth=1)
+    assert solver.solve(WHITE_PIECE) is None
+    # 浅的深度找不到, 再深一层就能找到, 每一层是一攻一守
+    for depth in range(2, 10):
+        solver.max_depth = depth
+        sequence = solver.solve(WHITE_PIECE)
+        assert sequence is not None and len(sequence) <= 2 * depth - 1
+
+
+def test_line_threats():
+    row = bytes([NO_PIECE, WHITE_PIECE, WHITE_PIECE, WHITE_PIECE, NO_PIECE,
+                 WHITE_PIECE, NO_PIECE, NO_PIECE, BLACK_PIECE])
+    # 1到5的窗口只差4, 0到4和2到6的窗口各差两个空位, 4到8的窗口里有黑棋
+    assert line_threats(row, WHITE_PIECE, 5) == ((4,), (0, 4, 6))
+    assert line_threats(row, BLACK_PIECE, 5) == ((), ())
+
+
+def test_engine_plays_the_vcf_move_without_searching():
+    # 颜色对调: AI执黑走上面白棋的杀棋, 防守方的最后一子留给react
+    play = MaxMinPlay(ChessBoard(BOARD_LEN), ChessPieceType.BLACK_CHESS_PIECE,
+                      engine='alpha_beta', depth=2, vcf_nodes=2000)
+    for x, y in WHITE:
+        play.update(x, y, ChessPieceType.BLACK_CHESS_PIECE)
+    for x, y in BLACK[:-1]:
+        play.update(x, y, ChessPieceType.WHITE_CHESS_PIECE)
+    ret = play.react(ActionMessage(row=BLACK[-1][0], col=BLACK[-1][1]))
+    sequence = list(ret['vcf'] or ())
+    assert sequence and (ret['msg'].row, ret['msg'].col) == sequence[0]
+    assert ret['depth'] == 0
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+from zobang.constant import WHITE_PIECE, BLACK_PIECE
+from zobang.strategy.transposition import TranspositionTable, ZobristHash
+
+EXACT = TranspositionTable.EXACT
+
+
+def test_store_and_probe():
+    table = TranspositionTable(size=16)
+    assert table.probe(5) is None
+    table.store(5, depth=2, score=10, bound=EXACT, move=(1, 2))
+    assert table.probe(5) == (2, 10, EXACT, (1, 2))
+    assert (table.hits, table.misses) == (1, 1)
+
+
+def test_size_is_rounded_up_to_a_power_of_two():
+    table = TranspositionTable(size=10)
+    # 16个桶: 3和19在同一个桶的两个槽位里, 11在另一个桶,
+    # 只有8个桶的话11会把19挤掉
+    table.store(3, depth=2, score=1, bound=EXACT)
+    table.store(19, depth=1, score=2, bound=EXACT)
+    table.store(11, depth=1, score=3, bound=EXACT)
+    assert [table.probe(key)[1] for key in (3, 19, 11)] == [1, 2, 3]
+
+
+def test_deeper_entry_keeps_the_depth_slot():
+    table = TranspositionTable(size=16)
+    table.store(1, depth=5, score=50, bound=EXACT)
+    # 同一个桶里更浅的结果只能放进总是覆盖的槽位
+    table.store(17, depth=2, score=20, bound=EXACT)
+    table.store(33, depth=1, score=10, bound=EXACT)
+    assert table.probe(1) == (5, 50, EXACT, None)
+    assert table.probe(17) is None
+    assert table.probe(33) == (1, 10, EXACT, None)
+
+
+def test_same_key_or_deeper_search_replaces_the_depth_slot():
+    table = TranspositionTable(size=16)
+    table.store(1, depth=5, score=50, bound=EXACT)
+    table.store(1, depth=1, score=11, bound=TranspositionTable.LOWER_BOUND)
+    assert table.probe(1) == (1, 11, TranspositionTable.LOWER_BOUND, None)
+    table.store(17, depth=3, score=30, bound=EXACT)
+    assert table.probe(17)[0] == 3
+    # 被挤出去的1不会再留在深度槽位里
+    assert table.probe(1) is None
+
+
+def test_clear():
+    table = TranspositionTable(size=16)
+    table.store(1, depth=5, score=50, bound=EXACT)
+    table.store(17, depth=1, score=10, bound=EXACT)
+    table.probe(1)
+    table.clear()
+    assert (table.hits, table.misses) == (0, 0)
+    assert table.probe(1) is None
+    assert table.probe(17) is None
+
+
+def test_zobrist_toggle_is_its_own_inverse():
+    zobrist = ZobristHash(15)
+    zobrist.toggle(7, 7, WHITE_PIECE)
+    after_white = zobrist.toggle(7, 8, BLACK_PIECE)
+    assert after_white != 0
+    zobrist.toggle(7, 8, BLACK_PIECE)
+    assert zobrist.toggle(7, 7, WHITE_PIECE) == 0
+    assert zobrist.key(7, 7, WHITE_PIECE) != zobrist.key(7, 7, BLACK_PIECE)
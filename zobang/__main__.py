@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+import sys
+from zobang.cmd import main
+
+sys.exit(main())
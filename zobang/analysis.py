@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+批量分析对局, 每个局面给出最好的走法和分数:
+    python -m zobang.analysis games.jsonl --engine alpha_beta --depth 3 \\
+        --workers 4 --output analysis.jsonl
+输入每行一局: 着法列表[[row, col], ...], 或者{"id": ..., "moves": [...]},
+白棋先走, 棋盘大小和连珠长度按--board-len和--win-len, 也可以在每局的
+"board_len"和"win_len"里给出; 或者用--game-log读二进制对局记录
+(见zobang.chess_board.game_log), 每局按记录里的棋盘规则.
+结果每个局面一行, 边算边写, 内存占用与对局数量无关
+"""
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from contextlib import ExitStack
+from zobang.chess_board.chess_board import ChessBoard
+from zobang.chess_board.game_log import GameLogReader
+from zobang.constant import ChessPieceType, WHITE_PIECE
+from zobang.strategy.alpha_beta import AlphaBetaSearch
+from zobang.strategy.max_min_play import WholeChessPosition
+
+
+RULE_KEYS = ('board_len', 'win_len')
+
+
+def read_games(lines):
+    """
+    lines是JSONL文件对象或任意字符串迭代器, 逐行产生(game_id, moves, rules),
+    rules是这一局自己给出的board_len和win_len, 没给的不在里面
+    """
+    for index, line in enumerate(lines):
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if isinstance(record, dict):
+            rules = {key: record[key] for key in RULE_KEYS if key in record}
+            yield record.get('id', index), record['moves'], rules
+        else:
+            yield index, record, {}
+
+
+def _best_move(position, search):
+    if search is None:
+        move = position.max_min_search()
+        if move is None:
+            return None, 0
+        return move, position.root_move_score(*move)
+    return search.search()
+
+
+# pylint: disable=too-many-arguments
+def analyze_game(game_id, moves, engine='alpha_beta', depth=2, width=None,
+                 use_numpy=False, candidate_radius=None, board_len=None,
+                 win_len=None):
+    """
+    在同一个局面上逐步重放一局棋, 每一步之前分析轮到走的一方:
+    产生{game_id, ply, side, played, best, score, nodes}, score是站在side
+    一方的分数. 有一方连成线后停止. board_len和win_len不传时用CONFIG里的
+    """
+    position = WholeChessPosition(chess_board=ChessBoard(board_len, win_len),
+                                  player_piece_type=WHITE_PIECE,
+                                  use_numpy=use_numpy,
+                                  candidate_radius=candidate_radius)
+    search = None
+    if engine == 'alpha_beta':
+        search = AlphaBetaSearch(position, depth=depth, width=width)
+    elif engine != 'max_min':
+        raise Exception(f'unknown engine {engine}')
+    moves = [tuple(move) for move in moves]
+    for ply in range(len(moves) + 1):
+        played = moves[ply] if ply < len(moves) else None
+        position.search_nodes = 0
+        best, score = _best_move(position, search)
+        yield dict(game_id=game_id, ply=ply,
+                   side=ChessPieceType(position.player_piece_type).name,
+                   played=played, best=best, score=score,
+                   nodes=search.nodes if search else position.search_nodes)
+        if played is None:
+            break
+        position.update(played[0], played[1], position.player_piece_type)
+        if position.is_win(position.player_piece_type):
+            break
+        position.switch_side()
+
+
+def _analyze_in_worker(game_id, moves, engine_kwargs):
+    return list(analyze_game(game_id, moves, **engine_kwargs))
+
+
+def analyze_games(games, workers=None, window=None, **engine_kwargs):
+    """
+    games是(game_id, moves, rules)的迭代器, rules里的board_len和win_len
+    优先于engine_kwargs里的. 按输入顺序逐个产生每个局面的结果.
+    workers不为None时按局分给进程池(0表示CPU个数), 同时在算的对局
+    不超过window个, 所以输入可以是读不完的大文件
+    """
+    if workers is None:
+        for game_id, moves, rules in games:
+            yield from analyze_game(game_id, moves,
+                                    **dict(engine_kwargs, **rules))
+        return
+    # 用到时才import, 单进程分析不用加载concurrent.futures
+    # pylint: disable=import-outside-toplevel
+    from concurrent.futures import ProcessPoolExecutor
+    workers = workers or os.cpu_count()
+    window = window or 4 * workers
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for game_id, moves, rules in games:
+            pending.append(executor.submit(_analyze_in_worker, game_id, moves,
+                                           dict(engine_kwargs, **rules)))
+            if len(pending) >= window:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='zobang batch analysis')
+    parser.add_argument('input', help="JSONL games, '-' for stdin")
+    parser.add_argument('--game-log', action='store_true',
+                        help='input is a binary game log')
+    parser.add_argument('--output', help='JSONL results, stdout by default')
+    parser.add_argument('--engine', default='alpha_beta',
+                        choices=['max_min', 'alpha_beta'])
+    parser.add_argument('--depth', type=int, default=2)
+    parser.add_argument('--width', type=int, default=None)
+    parser.add_argument('--use-numpy', action='store_true')
+    parser.add_argument('--candidate-radius', type=int, default=None)
+    parser.add_argument('--board-len', type=int, default=None,
+                        help='board size of JSONL games without board_len')
+    parser.add_argument('--win-len', type=int, default=None,
+                        help='line length of JSONL games without win_len')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='worker processes, 0 for one per CPU')
+    args = parser.parse_args(argv)
+    engine_kwargs = dict(engine=args.engine, depth=args.depth,
+                         width=args.width, use_numpy=args.use_numpy,
+                         candidate_radius=args.candidate_radius,
+                         board_len=args.board_len, win_len=args.win_len)
+    with ExitStack() as stack:
+        if args.game_log:
+            games = stack.enter_context(
+                GameLogReader(args.input)).iter_games()
+        elif args.input == '-':
+            games = read_games(sys.stdin)
+        else:
+            games = read_games(stack.enter_context(
+                open(args.input, encoding='utf-8')))
+        output = sys.stdout
+        if args.output:
+            output = stack.enter_context(
+                open(args.output, 'w', encoding='utf-8'))
+        for result in analyze_games(games, workers=args.workers,
+                                    **engine_kwargs):
+            output.write(json.dumps(result) + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
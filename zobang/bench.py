@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+"""
+自我对弈的性能基准:
+    python -m zobang.bench --engine alpha_beta --depth 4 --output bench.json
+    python -m zobang.bench --engine alpha_beta --depth 4 --baseline bench.json
+先空跑--warmup轮, 再计时跑--repeats轮, 每个指标取各轮的中位数.
+带--baseline时与保存的结果比较, 有指标变差超过--tolerance时退出码为1
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from zobang.chess_board.chess_board import ChessBoard
+from zobang.constant import ChessPieceType, CONFIG
+from zobang.strategy.action_message import ActionMessage
+from zobang.strategy.max_min_play import MaxMinPlay
+from zobang.strategy.mcts import MctsPlay
+from zobang.strategy.pattern import opposite_piece_type
+
+
+# 以棋盘中心为原点的开局定式, 白棋先走
+SCRIPTED_OPENINGS = {
+    'center': [(0, 0)],
+    'direct': [(0, 0), (-1, 0), (-1, 1)],
+    'indirect': [(0, 0), (-1, 1), (1, 1)],
+    'line': [(0, 0), (1, 1), (0, 1), (2, 2)],
+}
+# 越小越好的指标, 其余(nodes_per_sec)越大越好
+LOWER_IS_BETTER = ('latency_p50_ms', 'latency_p90_ms', 'latency_p99_ms',
+                   'evaluations_per_move', 'peak_memory_kb')
+HIGHER_IS_BETTER = ('nodes_per_sec',)
+
+
+def scripted_positions(board_len=None):
+    board_len = board_len or CONFIG['CHESS_MAX_ROW']
+    mid = board_len // 2
+    return [(name, [(mid + x, mid + y) for x, y in opening])
+            for name, opening in sorted(SCRIPTED_OPENINGS.items())]
+
+
+def seeded_positions(number, seed, stones=6, board_len=None):
+    """
+    在中心6x6的区域里随机交替落子, 同样的seed得到同样的局面
+    """
+    board_len = board_len or CONFIG['CHESS_MAX_ROW']
+    mid = board_len // 2
+    rand = random.Random(seed)
+    cells = [(x, y) for x in range(mid - 3, mid + 3)
+             for y in range(mid - 3, mid + 3)]
+    return [(f'seed{seed}-{i}', rand.sample(cells, stones))
+            for i in range(number)]
+
+
+def percentile(values, percent):
+    if not values:
+        return 0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(percent / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def peak_memory_kb(func, *args):
+    """
+    func(*args)执行期间新分配的内存峰值(tracemalloc), 不含执行前已有的
+    缓存, 也不含子进程
+    """
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def _new_player(piece_type, moves, engine_kwargs):
+    if engine_kwargs.get('engine') == 'mcts':
+        kwargs = dict(engine_kwargs)
+        del kwargs['engine']
+        play = MctsPlay(chess_board=ChessBoard(), piece_type=piece_type,
+                        **kwargs)
+    else:
+        play = MaxMinPlay(chess_board=ChessBoard(), piece_type=piece_type,
+                          **engine_kwargs)
+    move_piece_type = ChessPieceType.WHITE_CHESS_PIECE
+    for row, col in moves:
+        play.update(row, col, move_piece_type)
+        move_piece_type = opposite_piece_type(move_piece_type)
+    return play
+
+
+def play_game(name, opening, engine_kwargs, max_moves=20):
+    """
+    从opening出发让两个同样配置的MaxMinPlay对下, 记录每一步的耗时和搜索量
+    """
+    # 白棋先走, 下一步该谁走由开局的步数决定
+    to_move = (ChessPieceType.BLACK_CHESS_PIECE if len(opening) % 2
+               else ChessPieceType.WHITE_CHESS_PIECE)
+    players = {
+        to_move: _new_player(to_move, opening[:-1], engine_kwargs),
+        opposite_piece_type(to_move): _new_player(
+            opposite_piece_type(to_move), opening, engine_kwargs),
+    }
+    msg = ActionMessage(row=opening[-1][0], col=opening[-1][1])
+    moves, result = [], 'unfinished'
+    for _ in range(max_moves):
+        start = time.perf_counter()
+        ret = players[to_move].react(action_msg=msg)
+        elapsed = time.perf_counter() - start
+        msg = ret['msg']
+        if msg is None:
+            # 对方那一步下满了棋盘
+            result = 'draw'
+            break
+        moves.append(dict(move=(msg.row, msg.col), latency=elapsed,
+                          nodes=ret['nodes'], depth=ret['depth'],
+                          evaluations=ret['evaluations']))
+        if ret['finished']:
+            result = 'draw' if ret['equal'] else f'{to_move.name} win'
+            break
+        to_move = opposite_piece_type(to_move)
+    for play in players.values():
+        play.close()
+    return dict(name=name, opening=opening, result=result, moves=moves)
+
+
+def summarize(games):
+    moves = [move for game in games for move in game['moves']]
+    latencies = [move['latency'] * 1000 for move in moves]
+    total_time = sum(move['latency'] for move in moves)
+    nodes = sum(move['nodes'] for move in moves)
+    evaluations = sum(move['evaluations'] for move in moves)
+    return dict(
+        games=len(games), moves=len(moves), total_time=total_time,
+        nodes=nodes, nodes_per_sec=nodes / total_time if total_time else 0,
+        latency_p50_ms=percentile(latencies, 50),
+        latency_p90_ms=percentile(latencies, 90),
+        latency_p99_ms=percentile(latencies, 99),
+        latency_max_ms=max(latencies, default=0),
+        evaluations_per_move=evaluations / len(moves) if moves else 0)
+
+
+def play_games(openings, engine_kwargs, max_moves):
+    return [play_game(name, opening, engine_kwargs, max_moves)
+            for name, opening in openings]
+
+
+# pylint: disable=too-many-arguments
+def run_bench(engine_kwargs, positions=4, seed=1, max_moves=20, repeats=5,
+              warmup=1):
+    """
+    先空跑warmup轮让各种缓存就位, 再计时跑repeats轮, summary里每个指标
+    取各轮的中位数. 内存峰值另外跑一轮用tracemalloc量, 计时的轮次
+    不受tracemalloc拖慢
+    """
+    openings = scripted_positions() + seeded_positions(positions, seed)
+    for _ in range(warmup):
+        play_games(openings, engine_kwargs, max_moves)
+    runs = [play_games(openings, engine_kwargs, max_moves)
+            for _ in range(max(1, repeats))]
+    summaries = [summarize(games) for games in runs]
+    summary = {key: statistics.median(run[key] for run in summaries)
+               for key in summaries[0]}
+    summary['peak_memory_kb'] = peak_memory_kb(play_games, openings,
+                                               engine_kwargs, max_moves)
+    return dict(config=dict(engine_kwargs, positions=positions, seed=seed,
+                            max_moves=max_moves, repeats=len(runs),
+                            warmup=warmup),
+                summary=summary, runs=summaries, games=runs[0])
+
+
+def compare(current, baseline, tolerance=0.25):
+    """
+    返回变差超过tolerance(比例)的指标: [(指标, 基准值, 当前值), ...]
+    """
+    regressions = []
+    now, before = current['summary'], baseline['summary']
+    for key in LOWER_IS_BETTER:
+        if before.get(key) and now[key] > before[key] * (1 + tolerance):
+            regressions.append((key, before[key], now[key]))
+    for key in HIGHER_IS_BETTER:
+        if before.get(key) and now[key] < before[key] * (1 - tolerance):
+            regressions.append((key, before[key], now[key]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='zobang self-play benchmark')
+    parser.add_argument('--engine', default='max_min',
+                        choices=['max_min', 'alpha_beta', 'mcts'])
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--width', type=int, default=None)
+    parser.add_argument('--time-budget-ms', type=int, default=None)
+    parser.add_argument('--use-numpy', action='store_true')
+    parser.add_argument('--vcf-nodes', type=int, default=None,
+                        help='node budget of the forcing-win solver')
+    parser.add_argument('--candidate-radius', type=int, default=None,
+                        help='keep candidates around every stone')
+    parser.add_argument('--playouts', type=int, default=2000,
+                        help='mcts playouts per move')
+    parser.add_argument('--pattern-rollout', action='store_true',
+                        help='mcts rollouts guided by pattern scores')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='mcts worker processes, 0 for one per CPU')
+    parser.add_argument('--positions', type=int, default=4,
+                        help='number of seeded random positions')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--max-moves', type=int, default=20)
+    parser.add_argument('--repeats', type=int, default=5,
+                        help='timed runs, the summary is their median')
+    parser.add_argument('--warmup', type=int, default=1,
+                        help='untimed runs before the timed ones')
+    parser.add_argument('--output', help='write the JSON report here')
+    parser.add_argument('--baseline', help='JSON report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed relative change, above run-to-run noise')
+    args = parser.parse_args(argv)
+    if args.engine == 'mcts':
+        engine_kwargs = dict(engine=args.engine, playouts=args.playouts,
+                             time_budget_ms=args.time_budget_ms,
+                             pattern_rollout=args.pattern_rollout,
+                             candidate_radius=args.candidate_radius,
+                             workers=args.workers)
+    else:
+        engine_kwargs = dict(engine=args.engine, depth=args.depth,
+                             width=args.width,
+                             time_budget_ms=args.time_budget_ms,
+                             use_numpy=args.use_numpy,
+                             vcf_nodes=args.vcf_nodes,
+                             candidate_radius=args.candidate_radius)
+    report = run_bench(engine_kwargs, positions=args.positions,
+                       seed=args.seed, max_moves=args.max_moves,
+                       repeats=args.repeats, warmup=args.warmup)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report['summary'], indent=2))
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        for key, before, now in regressions:
+            print(f'REGRESSION {key}: {before:.4g} -> {now:.4g}',
+                  file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def line_masks(row, length):
+    """
+    每个格子在四个方向上经过它的、长度为2 * length - 1的线段掩码, 按位下标索引
+    """
+    stride = row + 1
+    directions = ((0, 1), (1, 0), (1, 1), (1, -1))
+    masks = [None] * (row * stride)
+    for x in range(row):
+        for y in range(row):
+            cell_masks = []
+            for dx, dy in directions:
+                mask = 0
+                for i in range(1 - length, length):
+                    _x, _y = x + i * dx, y + i * dy
+                    if 0 <= _x < row and 0 <= _y < row:
+                        mask |= 1 << (_x * stride + _y)
+                cell_masks.append(mask)
+            masks[x * stride + y] = tuple(cell_masks)
+    return masks
+
+
+class BitBoard:
+    """
+    用一个python int保存一种棋子的全部位置, (x, y)对应第x * stride + y位,
+    stride比棋盘宽度多1, 多出来的一列永远为0, 这样移位判断连珠时不会跨行
+    """
+
+    __slots__ = ('row_num', 'stride', 'bits')
+
+    def __init__(self, row, bits=0):
+        self.row_num = row
+        self.stride = row + 1
+        self.bits = bits
+
+    @classmethod
+    def full(cls, row):
+        line = (1 << row) - 1
+        bits = 0
+        for x in range(row):
+            bits |= line << (x * (row + 1))
+        return cls(row, bits)
+
+    @property
+    def shifts(self):
+        # 横, 竖, 左上到右下, 右上到左下四个方向相邻格子的位距离
+        return 1, self.stride, self.stride + 1, self.stride - 1
+
+    def index(self, x, y):
+        return x * self.stride + y
+
+    def set(self, x, y):
+        self.bits |= 1 << (x * self.stride + y)
+
+    def clear(self, x, y):
+        self.bits &= ~(1 << (x * self.stride + y))
+
+    def has(self, x, y):
+        return (self.bits >> (x * self.stride + y)) & 1 == 1
+
+    def popcount(self):
+        return bin(self.bits).count('1')
+
+    def iter_cells(self):
+        bits = self.bits
+        while bits:
+            low = bits & -bits
+            yield divmod(low.bit_length() - 1, self.stride)
+            bits ^= low
+
+    def has_line(self, length):
+        """
+        是否存在length个连续的格子, 每个方向上把自身与移位后的结果相与length-1次
+        """
+        for shift in self.shifts:
+            bits = self.bits
+            for _ in range(length - 1):
+                bits &= bits >> shift
+                if not bits:
+                    break
+            if bits:
+                return True
+        return False
+
+    def has_line_at(self, x, y, length):
+        """
+        只检查经过(x, y)的四条线段, 与棋盘大小无关
+        """
+        masks = line_masks(self.row_num, length)[x * self.stride + y]
+        for shift, mask in zip(self.shifts, masks):
+            bits = self.bits & mask
+            for _ in range(length - 1):
+                bits &= bits >> shift
+                if not bits:
+                    break
+            if bits:
+                return True
+        return False
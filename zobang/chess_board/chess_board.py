@@ -1,220 +1,273 @@
 # -*- coding: utf-8 -*-
 import random
-from zobang.constant import ChessPieceType, CONFIG
+from zobang.constant import (ChessPieceType, NO_PIECE, WHITE_PIECE,
+                             BLACK_PIECE)
+from zobang.chess_board.bitboard import BitBoard
+from zobang.chess_board.geometry import BoardGeometry, geometry
+from zobang.chess_board.snapshot import BoardSnapshot, pack
+from zobang.chess_board.zobrist import SymmetricZobristHash
 
 
 class PiecePositionInfo:
 
-    def __init__(self, row):
-        self.row_num = row
-        self._chess = [[0 for _ in range(row)] for _ in range(row)]
-        self.__last_chess = None
-        self.__left_edge = set()
-        self.__up_edge = set()
-        self.__left_up_edge = set()
-        self.__right_up_edge = set()
+    def __init__(self, rules: BoardGeometry, bits=0, last_chess=None):
+        """
+        rules给出棋盘大小和连珠长度, bits是已有棋子的位棋盘
+        """
+        self.rules = rules
+        self.row_num = rules.board_len
+        self.win_len = rules.win_len
+        self._chess = BitBoard(self.row_num, bits)
+        self.__last_chess = last_chess
+
+    def copy(self):
+        return PiecePositionInfo(self.rules, self._chess.bits,
+                                 self.__last_chess)
 
     @property
-    def all_chess(self):
+    def bit_board(self):
         return self._chess
 
+    @property
+    def all_chess(self):
+        return [[1 if self._chess.has(x, y) else 0 for y in range(self.row_num)]
+                for x in range(self.row_num)]
+
     def iter_all_chess(self):
-        for x in range(self.row_num):
-            for y in range(self.row_num):
-                if self._chess[x][y] == 1:
-                    yield x, y
+        return self._chess.iter_cells()
 
     @property
     def last_chess(self):
         return self.__last_chess
 
+    def has(self, x, y):
+        return self._chess.has(x, y)
+
+    def count(self):
+        return self._chess.popcount()
+
     def add(self, x, y):
-        self._chess[x][y] = 1
+        # 落子提子只改位棋盘, 连线在is_win时才判断
         self.__last_chess = (x, y)
+        self._chess.set(x, y)
 
     def remove(self, x, y):
-        self._chess[x][y] = 0
+        self._chess.clear(x, y)
+
+    def fill(self):
+        self._chess = BitBoard.full(self.row_num)
 
     def random_piece(self):
-        piece_set = []
-        for x in range(self.row_num):
-            for y in range(self.row_num):
-                if self._chess[x][y] == 1:
-                    piece_set.append((x, y))
+        piece_set = list(self._chess.iter_cells())
         if not piece_set:
             return None
         return random.sample(piece_set, 1)[0]
 
-    def __left_piece(self, x, y, i):
-        return x, y - i
-
-    def __right_piece(self, x, y, i):
-        return x, y + i
-
-    def __up_piece(self, x, y, i):
-        return x - i, y
-
-    def __down_piece(self, x, y, i):
-        return x + i, y
-
-    def __left_up_piece(self, x, y, i):
-        return x - i, y - i
-
-    def __right_up_piect(self, x, y, i):
-        return x - i, y + i
-
-    def __left_down_piece(self, x, y, i):
-        return x + i, y - i
-
-    def __right_down_piece(self, x, y, i):
-        return x + i, y + i
-
-    def __chess_edge_calc(self, x, y, piece_func):
-        ret = (x, y)
-        for i in range(1, CONFIG['WIN_LINE_LEN']):
-            _x, _y = piece_func(x, y, i)
-            if not (0 <= _x < self.row_num and 0 <= _y < self.row_num):
-                break
-            if self._chess[_x][_y] == 1:
-                ret = piece_func(x, y, i)
-            else:
-                break
-        return ret
-
-    def __last_chess_edge(self, piece_func):
-        x, y = self.__last_chess
-        return self.__chess_edge_calc(x, y, piece_func)
-
-    def __chess_left_edge(self, x, y):
-        return self.__chess_edge_calc(x, y, self.__left_piece)
-
-    def __chess_right_edge(self, x, y):
-        return self.__chess_edge_calc(x, y, self.__right_piece)
-
-    def __chess_up_edge(self, x, y):
-        return self.__chess_edge_calc(x, y, self.__up_piece)
-
-    def __chess_left_up_edge(self, x, y):
-        return self.__chess_edge_calc(x, y, self.__left_up_piece)
-
-    def __chess_left_down_edge(self, x, y):
-        return self.__chess_edge_calc(x, y, self.__left_down_piece)
-
-    def __chess_right_up_edge(self, x, y):
-        return self.__chess_edge_calc(x, y, self.__right_up_piect)
-
-    def __chess_right_down_edge(self, x, y):
-        return self.__chess_edge_calc(x, y, self.__right_down_piece)
-
-    def __last_chess_left_edge(self):
-        return self.__last_chess_edge(self.__left_piece)
-
-    def __last_chess_right_edge(self):
-        return self.__last_chess_edge(self.__right_piece)
-
-    def __last_chess_up_edge(self):
-        return self.__last_chess_edge(self.__up_piece)
-
-    def __last_chess_down_edge(self):
-        return self.__last_chess_edge(self.__down_piece)
-
-    def __last_chess_right_up_edge(self):
-        return self.__last_chess_edge(self.__right_up_piect)
-
-    def __last_chess_right_down_edge(self):
-        return self.__last_chess_edge(self.__right_down_piece)
-
-    def __last_chess_left_up_edge(self):
-        return self.__last_chess_edge(self.__left_up_piece)
-
-    def __last_chess_left_down_edge(self):
-        return self.__last_chess_edge(self.__left_down_piece)
-
-    def __search_win(self, piece_func):
-        x, y = self.__last_chess_edge(piece_func)
-        for i in range(1, CONFIG['WIN_LINE_LEN']):
-            _x, _y = piece_func(x, y, -i)
-            if not (0 <= _x < self.row_num and 0 <= _y < self.row_num):
-                return False
-            if self._chess[_x][_y] == 0:
-                return False
-        return True
-
-    def __search_left_win(self):
-        return self.__search_win(self.__left_piece)
-
-    def __search_right_win(self):
-        return self.__search_win(self.__right_piece)
-
-    def __search_up_win(self):
-        return self.__search_win(self.__up_piece)
-
-    def __search_down_win(self):
-        return self.__search_win(self.__down_piece)
-
-    def __search_left_up_win(self):
-        return self.__search_win(self.__left_up_piece)
-
-    def __search_right_up_win(self):
-        return self.__search_win(self.__right_up_piect)
-
-    def __search_left_down_win(self):
-        return self.__search_win(self.__left_down_piece)
-
-    def __search_right_down_win(self):
-        return self.__search_win(self.__right_down_piece)
-
     def is_win(self):
-        return (self.__last_chess and (self.__search_left_win()
-                or self.__search_right_win() or self.__search_up_win()
-                or self.__search_down_win() or self.__search_left_up_win()
-                or self.__search_right_up_win() or self.__search_left_down_win()
-                or self.__search_right_down_win()))
+        """
+        整个位棋盘上有没有连成线, 每个方向移位相与win_len - 1次.
+        只看当前的棋子, 与落子提子的先后无关
+        """
+        return self._chess.has_line(self.win_len)
 
 
 class ChessBoard:
 
-    def __init__(self):
-        self._max_row = CONFIG['CHESS_MAX_ROW']
-        self.white_position_info = PiecePositionInfo(self._max_row)
-        self.black_position_info = PiecePositionInfo(self._max_row)
-        self.no_piece_info = PiecePositionInfo(self._max_row)
-        for x in range(self._max_row):
-            for y in range(self._max_row):
-                self.no_piece_info.add(x, y)
+    def __init__(self, row=None, win_len=None):
+        """
+        row和win_len不传时用CONFIG里的棋盘大小和连珠长度
+        """
+        # 按格子预先算好的线和邻居, 同样大小的棋盘共用
+        self.geometry = geometry(row, win_len)
+        # 按先后顺序的着法, 同一步更新两次只记一次
+        self.moves = []
+        self.white_position_info = PiecePositionInfo(self.geometry)
+        self.black_position_info = PiecePositionInfo(self.geometry)
+        self.no_piece_info = PiecePositionInfo(
+            self.geometry, BitBoard.full(self.row_num).bits)
+        # 8种对称变换下的局面哈希, track_symmetry()打开后才随落子提子增量更新
+        self.symmetric_hash = None
+        # 对局记录(GameLogWriter.attach), 只记update下的真实着法
+        self.recorder = None
 
     @property
     def row_num(self):
-        return self._max_row
+        return self.geometry.board_len
 
-    def update(self, row, col, chess_piece_type: ChessPieceType):
+    @property
+    def win_len(self):
+        return self.geometry.win_len
+
+    def track_symmetry(self):
+        """
+        之后每次落子提子都增量维护8个对称哈希, 给需要反复取规范哈希的搜索用
+        """
+        if self.symmetric_hash is None:
+            self.symmetric_hash = self.__symmetric_hash()
+
+    def __symmetric_hash(self):
+        return SymmetricZobristHash.of_board(
+            self.white_position_info.iter_all_chess(),
+            self.black_position_info.iter_all_chess(), self.row_num)
+
+    def canonical_key(self):
+        """
+        对称变换下的规范哈希, 返回(哈希, 变换序号).
+        没有track_symmetry时按现有棋子现算
+        """
+        if self.symmetric_hash is None:
+            return self.__symmetric_hash().canonical()
+        return self.symmetric_hash.canonical()
+
+    def clone(self):
+        """
+        棋盘是几个int, 复制与棋盘大小无关
+        """
+        board = ChessBoard.__new__(ChessBoard)
+        board.geometry = self.geometry
+        board.moves = list(self.moves)
+        board.white_position_info = self.white_position_info.copy()
+        board.black_position_info = self.black_position_info.copy()
+        board.no_piece_info = self.no_piece_info.copy()
+        board.symmetric_hash = None
+        if self.symmetric_hash is not None:
+            board.symmetric_hash = self.symmetric_hash.copy()
+        # 副本上的落子不是真实着法, 不记录
+        board.recorder = None
+        return board
+
+    def side_to_move(self):
+        """
+        按最后一步是谁下的推断轮到谁, 空棋盘白棋先走
+        """
+        if not self.moves:
+            return ChessPieceType.WHITE_CHESS_PIECE
+        if self.white_position_info.has(*self.moves[-1]):
+            return ChessPieceType.BLACK_CHESS_PIECE
+        return ChessPieceType.WHITE_CHESS_PIECE
+
+    def to_bytes(self, side_to_move: ChessPieceType = None):
+        """
+        紧凑的二进制快照: 两个位平面加着法序列, 见zobang.chess_board.snapshot
+        """
+        side_to_move = side_to_move or self.side_to_move()
+        return pack(self.row_num, self.win_len,
+                    self.white_position_info.bit_board.bits,
+                    self.black_position_info.bit_board.bits,
+                    side_to_move.value, self.moves)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        data可以是bytes或memoryview, 返回(棋盘, 轮到谁走)
+        """
+        snapshot = BoardSnapshot(data)
+        row, win_len = snapshot.board_len, snapshot.win_len
+        board = cls.__new__(cls)
+        board.geometry = geometry(row, win_len)
+        board.moves = list(snapshot.iter_moves())
+        white_bits, black_bits = snapshot.white_bits, snapshot.black_bits
+        white_board, last_chess = BitBoard(row, white_bits), {}
+        for x, y in board.moves:
+            last_chess[white_board.has(x, y)] = (x, y)
+        board.white_position_info = PiecePositionInfo(
+            board.geometry, white_bits, last_chess.get(True))
+        board.black_position_info = PiecePositionInfo(
+            board.geometry, black_bits, last_chess.get(False))
+        board.no_piece_info = PiecePositionInfo(
+            board.geometry, BitBoard.full(row).bits & ~(white_bits | black_bits))
+        board.symmetric_hash = None
+        board.recorder = None
+        return board, ChessPieceType(snapshot.side_to_move)
+
+    def piece_at(self, row, col):
+        """
+        (row, col)上的棋子, 小整数NO_PIECE, WHITE_PIECE或BLACK_PIECE
+        """
+        if self.white_position_info.has(row, col):
+            return WHITE_PIECE
+        if self.black_position_info.has(row, col):
+            return BLACK_PIECE
+        return NO_PIECE
+
+    def piece_grid(self):
+        """
+        二维列表形式的整盘棋子, 每次调用都是新的一份
+        """
+        return [[self.piece_at(x, y) for y in range(self.row_num)]
+                for x in range(self.row_num)]
+
+    def piece_position_info(self, chess_piece_type: ChessPieceType):
         if chess_piece_type == ChessPieceType.WHITE_CHESS_PIECE:
+            return self.white_position_info
+        return self.black_position_info
+
+    def update(self, row, col, chess_piece_type: ChessPieceType):
+        new_move = self.place(row, col, chess_piece_type.value)
+        if new_move and self.recorder is not None:
+            self.__record(row, col, chess_piece_type)
+
+    def __record(self, row, col, chess_piece_type: ChessPieceType):
+        self.recorder.move(row, col, chess_piece_type.value)
+        if self.piece_position_info(chess_piece_type).is_win():
+            self.recorder.end_game(chess_piece_type.value)
+        elif self.no_piece_info.count() == 0:
+            self.recorder.end_game(NO_PIECE)
+        else:
+            return
+        self.recorder = None
+
+    def rollback(self, row, col, chess_piece_type: ChessPieceType):
+        self.take(row, col, chess_piece_type.value)
+
+    def place(self, row, col, piece: int):
+        """
+        update的小整数版本, 搜索内部用. 返回(row, col)原来是不是空位
+        """
+        new_move = self.no_piece_info.has(row, col)
+        if new_move:
+            # 同一步可能被界面和AI各更新一次, 哈希和着法只能记一次
+            if self.symmetric_hash is not None:
+                self.symmetric_hash.toggle(row, col, piece)
+            self.moves.append((row, col))
+        if piece == WHITE_PIECE:
             self.white_position_info.add(row, col)
         else:
             self.black_position_info.add(row, col)
         self.no_piece_info.remove(row, col)
-
-    def rollback(self, row, col, chess_piece_type: ChessPieceType):
-        if chess_piece_type == ChessPieceType.WHITE_CHESS_PIECE:
+        return new_move
+
+    def take(self, row, col, piece: int):
+        """
+        通常按落子的逆序提子, 也可以提任意一个棋子
+        """
+        if not self.no_piece_info.has(row, col):
+            if self.symmetric_hash is not None:
+                self.symmetric_hash.toggle(row, col, piece)
+            if self.moves and self.moves[-1] == (row, col):
+                self.moves.pop()
+            else:
+                self.moves.remove((row, col))
+        if piece == WHITE_PIECE:
             self.white_position_info.remove(row, col)
         else:
             self.black_position_info.remove(row, col)
         self.no_piece_info.add(row, col)
 
     def chess_board_paint(self):
-        for x in range(self._max_row):
+        for x in range(self.row_num):
             line = ''
-            for y in range(self._max_row):
-                if self.no_piece_info.all_chess[x][y] == 1:
+            for y in range(self.row_num):
+                if self.no_piece_info.has(x, y):
                     line += '. '
                     continue
-                if self.white_position_info.all_chess[x][y] == 1:
+                if self.white_position_info.has(x, y):
                     if (x, y) == self.white_position_info.last_chess:
                         line += 'X '
                     else:
                         line += 'X '
                     continue
-                if self.black_position_info.all_chess[x][y] == 1:
+                if self.black_position_info.has(x, y):
                     if (x, y) == self.black_position_info.last_chess:
                         line += 'O '
                     else:
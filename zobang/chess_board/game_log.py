@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+只追加的二进制对局记录. 文件头之后依次是:
+    对局头: 0xFF, 1, 棋盘大小, 连珠长度
+    着法:   row, col各一个字节, 黑棋的row最高位置1
+    对局尾: 0xFF, 2, 赢的一方(0是和棋)
+坐标不超过126, 所以0xFF只会出现在对局头和对局尾的开头.
+进程崩溃时最后一局没有对局尾, 已经写下的着法仍然可以读出来
+"""
+import mmap
+import os
+import struct
+from array import array
+from collections import namedtuple
+from zobang.chess_board.chess_board import ChessBoard
+from zobang.constant import NO_PIECE, WHITE_PIECE, BLACK_PIECE
+
+FILE_HEADER = struct.Struct('<3sB')
+MAGIC = b'ZGL'
+VERSION = 1
+MARKER = 0xFF
+TAG_GAME = 1
+TAG_END = 2
+GAME_HEADER = struct.Struct('<BBBB')
+GAME_END = struct.Struct('<BBB')
+BLACK_BIT = 0x80
+MAX_BOARD_LEN = 127
+
+GameRecord = namedtuple('GameRecord', ['board_len', 'win_len', 'winner',
+                                       'moves'])
+
+
+def encode_move(row, col, piece: int):
+    return bytes((row | BLACK_BIT if piece == BLACK_PIECE else row, col))
+
+
+def iter_moves(moves):
+    """
+    moves是GameRecord.moves, 逐步产生(row, col, piece)
+    """
+    for i in range(0, len(moves) - 1, 2):
+        row = moves[i]
+        if row & BLACK_BIT:
+            yield row & ~BLACK_BIT, moves[i + 1], BLACK_PIECE
+        else:
+            yield row, moves[i + 1], WHITE_PIECE
+
+
+class GameLogWriter:
+    """
+    一个writer同一时间只写一局, 每步写完就flush, sync打开时还会fsync.
+    并发的多局各用各的文件
+    """
+
+    def __init__(self, path, sync=False):
+        # 文件在writer的整个生命周期里一直打开, 由close或with语句关闭
+        self._file = open(path, 'ab')  # pylint: disable=consider-using-with
+        self.sync = sync
+        self.in_game = False
+        try:
+            if self._file.tell() == 0:
+                self._file.write(FILE_HEADER.pack(MAGIC, VERSION))
+                self.__flush()
+        except OSError:
+            self._file.close()
+            raise
+
+    def __flush(self):
+        self._file.flush()
+        if self.sync:
+            os.fsync(self._file.fileno())
+
+    def start_game(self, board_len, win_len):
+        if board_len > MAX_BOARD_LEN:
+            raise Exception(f'board size {board_len} is too large to log')
+        if self.in_game:
+            # 上一局没有结束就开始新的一局, 当作没有下完
+            self.end_game()
+        self._file.write(GAME_HEADER.pack(MARKER, TAG_GAME, board_len,
+                                          win_len))
+        self.in_game = True
+        self.__flush()
+
+    def move(self, row, col, piece: int):
+        if not self.in_game:
+            raise Exception('no game started')
+        self._file.write(encode_move(row, col, piece))
+        self.__flush()
+
+    def end_game(self, winner=NO_PIECE):
+        if not self.in_game:
+            return
+        self._file.write(GAME_END.pack(MARKER, TAG_END, winner))
+        self.in_game = False
+        self.__flush()
+
+    def attach(self, chess_board):
+        """
+        开始记录chess_board上的一局: 先写下已有的着法,
+        之后的每一步由ChessBoard.update写入, 分出胜负或下满时自动结束
+        """
+        self.start_game(chess_board.row_num, chess_board.win_len)
+        for row, col in chess_board.moves:
+            piece = (WHITE_PIECE if chess_board.white_position_info.has(
+                row, col) else BLACK_PIECE)
+            self._file.write(encode_move(row, col, piece))
+        self.__flush()
+        chess_board.recorder = self
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class GameLogReader:
+    """
+    mmap整个文件, 打开时扫一遍对局头和对局尾建立索引, 着法不复制,
+    按下标直接取任意一局, 重放到任意一步. GameRecord.moves是文件上的视图,
+    close之前要先释放
+    """
+
+    def __init__(self, path):
+        # mmap建好以后不再需要文件本身
+        with open(path, 'rb') as file:
+            size = os.fstat(file.fileno()).st_size
+            if size < FILE_HEADER.size:
+                raise Exception('not a game log')
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = None
+        # 每局着法的起止位置和对局头, winner为-1表示没有对局尾
+        self._starts, self._ends = array('Q'), array('Q')
+        self._board_len, self._win_len = array('B'), array('B')
+        self._winner = array('b')
+        try:
+            magic, version = FILE_HEADER.unpack_from(self._mmap, 0)
+            if magic != MAGIC or version != VERSION:
+                raise Exception('not a game log')
+            self._view = memoryview(self._mmap)
+            self.__build_index(size)
+        except Exception:
+            self.close()
+            raise
+
+    # pylint: disable=too-many-branches
+    def __build_index(self, size):
+        data, pos, open_game = self._mmap, FILE_HEADER.size, False
+        while True:
+            marker = data.find(bytes((MARKER,)), pos)
+            end = size if marker < 0 else marker
+            game_open = open_game
+            if open_game:
+                # 写到一半崩溃时可能只有半步, 去掉
+                self._ends.append(end - (end - self._starts[-1]) % 2)
+                self._winner.append(-1)
+                open_game = False
+            if marker < 0 or marker + 1 >= size:
+                break
+            tag = data[marker + 1]
+            if tag == TAG_GAME:
+                if marker + GAME_HEADER.size > size:
+                    break
+                _, _, board_len, win_len = GAME_HEADER.unpack_from(data,
+                                                                   marker)
+                pos = marker + GAME_HEADER.size
+                self._starts.append(pos)
+                self._board_len.append(board_len)
+                self._win_len.append(win_len)
+                open_game = True
+            elif tag == TAG_END:
+                if marker + GAME_END.size > size:
+                    break
+                if not game_open:
+                    raise Exception(f'game end without game at {marker}')
+                self._winner[-1] = data[marker + 2]
+                pos = marker + GAME_END.size
+            else:
+                raise Exception(f'corrupt game log at {marker}')
+
+    def __len__(self):
+        return len(self._starts)
+
+    def game(self, index):
+        winner = self._winner[index]
+        return GameRecord(
+            board_len=self._board_len[index], win_len=self._win_len[index],
+            winner=None if winner < 0 else winner,
+            moves=self._view[self._starts[index]: self._ends[index]])
+
+    def plies(self, index):
+        return (self._ends[index] - self._starts[index]) // 2
+
+    def iter_moves(self, index):
+        return iter_moves(self.game(index).moves)
+
+    def board_at(self, index, ply=None):
+        """
+        第index局下完前ply步的棋盘, ply不传时是终局
+        """
+        record = self.game(index)
+        board = ChessBoard(record.board_len, record.win_len)
+        moves = record.moves
+        if ply is not None:
+            moves = moves[:2 * ply]
+        for row, col, piece in iter_moves(moves):
+            board.place(row, col, piece)
+        return board
+
+    def iter_games(self):
+        """
+        逐局产生(下标, [(row, col), ...], 棋盘规则), 棋盘规则是
+        dict(board_len=..., win_len=...), 与zobang.analysis.read_games一致
+        """
+        for index in range(len(self)):
+            rules = dict(board_len=self._board_len[index],
+                         win_len=self._win_len[index])
+            yield index, [(row, col) for row, col, _
+                          in self.iter_moves(index)], rules
+
+    def close(self):
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
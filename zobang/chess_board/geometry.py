@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+from functools import lru_cache
+from zobang.constant import CONFIG
+
+
+def board_lines(board_len, win_len):
+    """
+    棋盘上所有横, 竖, 两个斜方向的整条线, 短于win_len的斜线不可能连成,
+    不参与评估
+    """
+    lines = [[(x, y) for y in range(board_len)] for x in range(board_len)]
+    lines += [[(x, y) for x in range(board_len)] for y in range(board_len)]
+    for d in range(-board_len + 1, board_len):
+        lines.append([(x, x - d) for x in range(board_len)
+                      if 0 <= x - d < board_len])
+        lines.append([(x, d + board_len - 1 - x) for x in range(board_len)
+                      if 0 <= d + board_len - 1 - x < board_len])
+    return [line for line in lines if len(line) >= win_len]
+
+
+def _cared_rows(x, y, board_len, win_len):
+    """
+    经过(x, y)的横, 竖, 两个斜方向上, 离(x, y)不超过win_len - 1格的线段
+    """
+    rows = []
+    for dx, dy in ((0, 1), (1, 0), (1, 1), (1, -1)):
+        rows.append([(x + i * dx, y + i * dy)
+                     for i in range(1 - win_len, win_len)
+                     if 0 <= x + i * dx < board_len
+                     and 0 <= y + i * dy < board_len])
+    return rows
+
+
+@lru_cache(maxsize=None)
+def neighbours(board_len, radius):
+    """
+    每个格子周围(2 * radius + 1)见方范围内的其他格子
+    """
+    return [[tuple((_x, _y)
+                   for _x in range(max(0, x - radius),
+                                   min(board_len, x + radius + 1))
+                   for _y in range(max(0, y - radius),
+                                   min(board_len, y + radius + 1))
+                   if (_x, _y) != (x, y))
+             for y in range(board_len)] for x in range(board_len)]
+
+
+class BoardGeometry:
+    """
+    一种棋盘大小和连珠长度, 以及按格子预先算好的线和邻居.
+    用geometry()取, 同样参数的对局共用一份, 搜索中不再计算坐标
+    """
+
+    def __init__(self, board_len, win_len):
+        self.board_len = board_len
+        self.win_len = win_len
+        self.lines = board_lines(board_len, win_len)
+        # cell_lines[x][y]是经过(x, y)的整条线: (在lines里的下标, 在线上的位置)
+        self.cell_lines = [[[] for _ in range(board_len)]
+                           for _ in range(board_len)]
+        for index, line in enumerate(self.lines):
+            for offset, (x, y) in enumerate(line):
+                self.cell_lines[x][y].append((index, offset))
+        # cared_rows[x][y]是经过(x, y)的四条线段
+        self.cared_rows = [[_cared_rows(x, y, board_len, win_len)
+                            for y in range(board_len)]
+                           for x in range(board_len)]
+
+    def neighbours(self, radius=1):
+        return neighbours(self.board_len, radius)
+
+
+@lru_cache(maxsize=None)
+def _geometry(board_len, win_len):
+    return BoardGeometry(board_len, win_len)
+
+
+def geometry(board_len=None, win_len=None):
+    """
+    不传时用CONFIG里的默认值
+    """
+    return _geometry(board_len or CONFIG['CHESS_MAX_ROW'],
+                     win_len or CONFIG['WIN_LINE_LEN'])
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import struct
+
+
+# 快照: 文件头, 白棋位平面, 黑棋位平面, 着法序列(每步row, col各一个字节).
+# 位平面就是BitBoard.bits按小端写出, 每个格子两种棋子各占一位
+HEADER = struct.Struct('<2sBBBBH')
+MAGIC = b'ZS'
+VERSION = 2
+
+
+def plane_size(board_len):
+    # BitBoard的stride是board_len + 1
+    return (board_len * (board_len + 1) + 7) // 8
+
+
+# pylint: disable=too-many-arguments
+def pack(board_len, win_len, white_bits, black_bits, side_to_move, moves):
+    """
+    side_to_move是ChessPieceType的值, moves是[(row, col), ...]
+    """
+    size = plane_size(board_len)
+    data = bytearray(HEADER.pack(MAGIC, VERSION, board_len, win_len,
+                                 side_to_move, len(moves)))
+    data += white_bits.to_bytes(size, 'little')
+    data += black_bits.to_bytes(size, 'little')
+    for row, col in moves:
+        data += bytes((row, col))
+    return bytes(data)
+
+
+class BoardSnapshot:
+    """
+    在bytes/memoryview上直接读快照, 不复制底层数据
+    """
+
+    __slots__ = ('_view', 'board_len', 'win_len', 'side_to_move',
+                 'move_count')
+
+    def __init__(self, data):
+        self._view = memoryview(data)
+        magic, version, self.board_len, self.win_len, self.side_to_move, \
+            self.move_count = HEADER.unpack_from(self._view, 0)
+        if magic != MAGIC or version != VERSION:
+            raise Exception('not a board snapshot')
+        if len(self._view) < self.size:
+            raise Exception('board snapshot is truncated')
+
+    @property
+    def size(self):
+        return (HEADER.size + 2 * plane_size(self.board_len)
+                + 2 * self.move_count)
+
+    def __plane(self, index):
+        size = plane_size(self.board_len)
+        start = HEADER.size + index * size
+        return int.from_bytes(self._view[start: start + size], 'little')
+
+    @property
+    def white_bits(self):
+        return self.__plane(0)
+
+    @property
+    def black_bits(self):
+        return self.__plane(1)
+
+    @property
+    def moves(self):
+        """
+        着法序列的视图, 第i步是(moves[2 * i], moves[2 * i + 1])
+        """
+        start = HEADER.size + 2 * plane_size(self.board_len)
+        return self._view[start: start + 2 * self.move_count]
+
+    def iter_moves(self):
+        moves = self.moves
+        for i in range(0, len(moves), 2):
+            yield moves[i], moves[i + 1]
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+
+# 正方形棋盘的8种旋转/翻转, 第0种是原样
+SYMMETRY_NUM = 8
+
+
+def transform(symmetry, x, y, row):
+    """
+    把(x, y)按第symmetry种对称变换到row * row棋盘上的对应位置
+    """
+    last = row - 1
+    if symmetry & 4:
+        # 先左右翻转
+        y = last - y
+    for _ in range(symmetry & 3):
+        # 再顺时针旋转90度若干次
+        x, y = y, last - x
+    return x, y
+
+
+def _inverse(symmetry):
+    probe_row = 4
+    cells = [(x, y) for x in range(probe_row) for y in range(probe_row)]
+    for candidate in range(SYMMETRY_NUM):
+        if all(transform(candidate,
+                         *transform(symmetry, x, y, probe_row),
+                         probe_row) == (x, y) for x, y in cells):
+            return candidate
+    raise Exception(f'no inverse for symmetry {symmetry}')
+
+
+# INVERSE[s]把第s种变换之后的坐标变回去
+INVERSE = tuple(_inverse(symmetry) for symmetry in range(SYMMETRY_NUM))
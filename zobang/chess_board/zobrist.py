@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+import random
+from functools import lru_cache
+from zobang.chess_board.symmetry import SYMMETRY_NUM, transform
+from zobang.constant import WHITE_PIECE, BLACK_PIECE
+
+
+@lru_cache(maxsize=None)
+def zobrist_keys(row, seed=20211024):
+    """
+    每种棋子在每个格子上的64位随机数, 同样大小的棋盘共用一份.
+    第二组用来标记某种棋子最近一步落在哪里
+    """
+    rand = random.Random(seed)
+    piece_types = (WHITE_PIECE, BLACK_PIECE)
+    return tuple({piece_type: [[rand.getrandbits(64) for _ in range(row)]
+                               for _ in range(row)]
+                  for piece_type in piece_types}
+                 for _ in range(2))
+
+
+@lru_cache(maxsize=None)
+def symmetric_zobrist_keys(row, seed=20211024):
+    """
+    与zobrist_keys一一对应, 每个格子上是8个数:
+    第s个是这个格子做第s种对称变换后所在格子的随机数
+    """
+    return tuple({piece_type: [[tuple(grid[_x][_y] for _x, _y in (
+        transform(symmetry, x, y, row) for symmetry in range(SYMMETRY_NUM)))
+                                for y in range(row)] for x in range(row)]
+                  for piece_type, grid in keys.items()}
+                 for keys in zobrist_keys(row, seed))
+
+
+class SymmetricZobristHash:
+    """
+    同时维护8种对称变换下的局面哈希, values[s]是整盘做第s种变换后的哈希,
+    values[0]与ZobristHash.value相同
+    """
+
+    def __init__(self, row, values=None):
+        self.row = row
+        self._keys, self._last_move_keys = symmetric_zobrist_keys(row)
+        self.values = list(values or [0] * SYMMETRY_NUM)
+
+    @classmethod
+    def of_board(cls, white, black, row):
+        """
+        white, black是双方棋子的坐标, 从头算一遍8个哈希
+        """
+        symmetric_hash = cls(row)
+        for piece_type, stones in ((WHITE_PIECE, white), (BLACK_PIECE, black)):
+            for x, y in stones:
+                symmetric_hash.toggle(x, y, piece_type)
+        return symmetric_hash
+
+    def toggle(self, x, y, chess_piece_type: int):
+        keys = self._keys[chess_piece_type][x][y]
+        self.values = [value ^ key for value, key in zip(self.values, keys)]
+
+    def copy(self):
+        return SymmetricZobristHash(self.row, self.values)
+
+    def canonical(self, last_moves=()):
+        """
+        取8个哈希里最小的作为规范形式, 返回(哈希, 变换序号).
+        last_moves是要一并计入的最近一步: [(x, y, chess_piece_type), ...]
+        """
+        values = self.values
+        for x, y, chess_piece_type in last_moves:
+            keys = self._last_move_keys[chess_piece_type][x][y]
+            values = [value ^ key for value, key in zip(values, keys)]
+        key = min(values)
+        return key, values.index(key)
@@ -1,7 +1,113 @@
 # -*- coding: utf-8 -*-
-from zobang.man_play import ManPlay
-from zobang.constant import ChessPieceType
+"""
+命令行入口:
+    zobang play [--text] [--piece black] [--engine alpha_beta ...]
+    zobang serve [--port 8765] [--workers 4 ...]
+    zobang analyze games.jsonl [...]    参数见python -m zobang.analysis -h
+    zobang bench [...]                  参数见python -m zobang.bench -h
+各子命令用到的模块在执行时才import, 只分析或跑服务时不会加载tkinter
+"""
+# pylint: disable=import-outside-toplevel
+import argparse
+import sys
 
 
 def game_start():
+    from zobang.constant import ChessPieceType
+    from zobang.man_play import ManPlay
     ManPlay(piece_type=ChessPieceType.WHITE_CHESS_PIECE).run()
+
+
+def _add_engine_arguments(parser):
+    parser.add_argument('--engine', default='max_min',
+                        choices=['max_min', 'alpha_beta'])
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--width', type=int, default=None)
+    parser.add_argument('--time-budget-ms', type=int, default=None)
+    parser.add_argument('--use-numpy', action='store_true')
+    parser.add_argument('--vcf-nodes', type=int, default=None)
+    parser.add_argument('--candidate-radius', type=int, default=None)
+    parser.add_argument('--opening-book', default=None)
+
+
+def _engine_kwargs(args):
+    return dict(engine=args.engine, depth=args.depth, width=args.width,
+                time_budget_ms=args.time_budget_ms, use_numpy=args.use_numpy,
+                vcf_nodes=args.vcf_nodes,
+                candidate_radius=args.candidate_radius,
+                opening_book=args.opening_book)
+
+
+def _play(args):
+    from zobang.constant import ChessPieceType
+    piece_type = ChessPieceType.WHITE_CHESS_PIECE
+    if args.piece == 'black':
+        piece_type = ChessPieceType.BLACK_CHESS_PIECE
+    if args.text:
+        from zobang.text_play import TextPlay
+        TextPlay(piece_type=piece_type, game_log=args.game_log,
+                 **_engine_kwargs(args)).run()
+        return 0
+    from zobang.man_play import ManPlay
+    ManPlay(piece_type=piece_type, game_log=args.game_log,
+            **_engine_kwargs(args)).run()
+    return 0
+
+
+def _serve(args):
+    from zobang.server import run_server
+    run_server(host=args.host, port=args.port, workers=args.workers,
+               **_engine_kwargs(args))
+    return 0
+
+
+def _analyze(args):
+    from zobang.analysis import main as analysis_main
+    return analysis_main(args.args)
+
+
+def _bench(args):
+    from zobang.bench import main as bench_main
+    return bench_main(args.args)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='zobang')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    play = commands.add_parser('play', help='play against the AI')
+    play.add_argument('--text', action='store_true',
+                      help='play in the terminal instead of a window')
+    play.add_argument('--piece', default='white', choices=['white', 'black'])
+    play.add_argument('--game-log', default=None,
+                      help='append the game to this binary game log')
+    _add_engine_arguments(play)
+    play.set_defaults(func=_play)
+
+    serve = commands.add_parser('serve', help='run the JSON-lines server')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--workers', type=int, default=None)
+    _add_engine_arguments(serve)
+    serve.set_defaults(func=_serve)
+
+    # 参数原样交给zobang.analysis和zobang.bench解析
+    commands.add_parser('analyze', add_help=False,
+                        help='batch analysis of games').set_defaults(
+                            func=_analyze)
+    commands.add_parser('bench', add_help=False,
+                        help='self-play benchmark').set_defaults(func=_bench)
+
+    args, rest = parser.parse_known_args(argv)
+    if args.command in ('analyze', 'bench'):
+        args.args = rest
+    elif rest:
+        parser.error(f'unrecognized arguments: {" ".join(rest)}')
+    if args.command == 'play' and args.piece == 'black' and not args.text:
+        play.error('the window mode only supports playing white, '
+                   'use --text to play black')
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -13,3 +13,10 @@ class ChessPieceType(Enum):
     NO_CHESS_PIECE = 0
     WHITE_CHESS_PIECE = 1
     BLACK_CHESS_PIECE = 2
+
+
+# 搜索和评估内部用的小整数, 与ChessPieceType的值相同,
+# ChessPieceType只在对外的接口(ChessBoard.update, MaxMinPlay等)上使用
+NO_PIECE = ChessPieceType.NO_CHESS_PIECE.value
+WHITE_PIECE = ChessPieceType.WHITE_CHESS_PIECE.value
+BLACK_PIECE = ChessPieceType.BLACK_CHESS_PIECE.value
@@ -2,18 +2,34 @@
 
 from tkinter import Tk, Canvas, messagebox
 from zobang.chess_board.chess_board import ChessBoard
+from zobang.chess_board.game_log import GameLogWriter
 from zobang.constant import ChessPieceType
 from zobang.strategy.max_min_play import MaxMinPlay
 from zobang.strategy.action_message import ActionMessage
 
 
+# 等AI落子时多久检查一次结果
+POLL_MS = 50
+TITLE = 'Checker board'
+
+
 # pylint: disable=too-many-instance-attributes
 class ManPlay:
 
-    def __init__(self, piece_type=ChessPieceType.WHITE_CHESS_PIECE):
+    def __init__(self, piece_type=ChessPieceType.WHITE_CHESS_PIECE,
+                 game_log=None, **engine_kwargs):
+        """
+        engine_kwargs原样传给MaxMinPlay, 比如engine='alpha_beta',
+        time_budget_ms=5000. AI在后台线程里思考, 按空格键让它马上落子.
+        game_log是对局记录文件的路径, 每一步都追加写入
+        """
         self.lattice_width = 30
         self.chess_board = ChessBoard()
         self.lattice_number = self.chess_board.row_num
+        self.game_log = None
+        if game_log is not None:
+            self.game_log = GameLogWriter(game_log)
+            self.game_log.attach(self.chess_board)
         self.piece_type = piece_type
         if piece_type == ChessPieceType.WHITE_CHESS_PIECE:
             self.opposite_piece_type = ChessPieceType.BLACK_CHESS_PIECE
@@ -21,7 +37,9 @@ class ManPlay:
             self.opposite_piece_type = ChessPieceType.WHITE_CHESS_PIECE
         self.peer_player = MaxMinPlay(
             chess_board=self.chess_board,
-            piece_type=self.opposite_piece_type)
+            piece_type=self.opposite_piece_type, **engine_kwargs)
+        # AI正在思考时是react_async返回的Future
+        self.__thinking = None
         self.__window_init()
         self.__peer_last_move_sign = []
 
@@ -47,7 +65,7 @@ class ManPlay:
 
     def __window_init(self):
         windows = Tk()
-        windows.title('Checker board')
+        windows.title(TITLE)
         # 设置画布的大小为640 * 640的正方形
         canvas = Canvas(windows, width=self.lattice_width * self.lattice_number,
                         height=self.lattice_width * self.lattice_number,
@@ -66,10 +84,18 @@ class ManPlay:
         self.windows = windows
         self.canvas = canvas
         self.windows.bind('<Button-1>', self.__click)
+        self.windows.bind('<space>', self.__play_now)
+        self.windows.protocol('WM_DELETE_WINDOW', self.__close)
 
     def run(self):
         self.windows.mainloop()
 
+    def __close(self):
+        self.peer_player.close()
+        if self.game_log is not None:
+            self.game_log.close()
+        self.windows.destroy()
+
     def __move(self, row, col, piece_type, color):
         x1 = col * self.lattice_width
         y1 = row * self.lattice_width
@@ -99,6 +125,8 @@ class ManPlay:
                                     sign_x, sign_y + sign_len, fill='yellow')]
 
     def __click(self, event):
+        if self.__thinking is not None:
+            return
         row = int(event.y / self.lattice_width)
         col = int(event.x / self.lattice_width)
         self.__player_move(row, col)
@@ -107,11 +135,28 @@ class ManPlay:
             messagebox.showinfo('消息', '你赢了!!!')
             return
         msg = ActionMessage(row=row, col=col)
-        ret_peer = self.peer_player.react(action_msg=msg)
-        self.react(ret_peer)
+        self.__thinking = self.peer_player.react_async(action_msg=msg)
+        self.windows.title(f'{TITLE} - thinking, press space to play now')
+        self.windows.after(POLL_MS, self.__poll)
+
+    def __poll(self):
+        if not self.__thinking.done():
+            self.windows.after(POLL_MS, self.__poll)
+            return
+        future, self.__thinking = self.__thinking, None
+        self.windows.title(TITLE)
+        self.react(future.result())
+
+    def __play_now(self, _event):
+        if self.__thinking is not None:
+            self.peer_player.stop_search()
 
     def react(self, ret_peer):
         action_msg = ret_peer['msg']
+        if action_msg is None:
+            # 棋盘下满了, AI没有可以落子的位置
+            messagebox.showinfo('消息', '和棋!!!')
+            return
         self.__peer_move(action_msg.row, action_msg.col)
         if ret_peer['finished']:
             if ret_peer['win']:
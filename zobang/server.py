@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+import os
+import uuid
+from collections import OrderedDict, namedtuple
+from zobang.chess_board.chess_board import ChessBoard
+from zobang.constant import ChessPieceType, CONFIG
+from zobang.strategy.action_message import ActionMessage
+from zobang.strategy.max_min_play import MaxMinPlay
+from zobang.strategy.pattern import opposite_piece_type
+
+
+# 着法里每个坐标只占一个字节
+MAX_BOARD_LEN = 255
+# 每个工作进程里最多保留这么多局的棋盘和搜索引擎(连同置换表)
+ENGINE_CACHE_SIZE = 64
+
+# 一局棋的固定信息, 随每个请求发给工作进程
+GameSpec = namedtuple('GameSpec', ['game_id', 'ai_piece', 'board_len',
+                                   'win_len'])
+
+# 工作进程里的缓存: {game_id: (着法序列, 棋盘, MaxMinPlay)}, 最近用过的在最后
+_engines = OrderedDict()
+
+
+def _replay(spec: GameSpec, moves: bytes, engine_kwargs):
+    """
+    白棋先走, 双方交替, moves里每两个字节是一步的(row, col)
+    """
+    chess_board = ChessBoard(spec.board_len, spec.win_len)
+    play = MaxMinPlay(chess_board=chess_board,
+                      piece_type=ChessPieceType(spec.ai_piece),
+                      **engine_kwargs)
+    piece_type = ChessPieceType.WHITE_CHESS_PIECE
+    for i in range(0, len(moves), 2):
+        play.update(moves[i], moves[i + 1], piece_type)
+        piece_type = opposite_piece_type(piece_type)
+    return chess_board, play
+
+
+def _engine(spec: GameSpec, moves: bytes, engine_kwargs):
+    """
+    取这一局缓存的棋盘和引擎, 着法对不上(比如这局上次落在别的进程)时
+    从着法序列重建
+    """
+    cached = _engines.pop(spec.game_id, None)
+    if cached is not None:
+        if cached[0] == moves:
+            return cached[1], cached[2]
+        cached[2].close()
+    return _replay(spec, moves, engine_kwargs)
+
+
+def _keep_engine(spec: GameSpec, moves: bytes, chess_board, play):
+    _engines[spec.game_id] = (moves, chess_board, play)
+    while len(_engines) > ENGINE_CACHE_SIZE:
+        _, (_, _, evicted) = _engines.popitem(last=False)
+        evicted.close()
+
+
+def forget_in_worker(game_id):
+    cached = _engines.pop(game_id, None)
+    if cached is not None:
+        cached[2].close()
+
+
+def react_in_worker(spec: GameSpec, moves: bytes, engine_kwargs, row, col):
+    """
+    在进程池里执行: 用这个进程里缓存的引擎(没有时从着法序列重建),
+    落下人的这一步, 没有分出胜负时让AI应一步. 没有结束的对局连同引擎的
+    置换表留在缓存里, 下一步接着用
+    """
+    human_piece_type = opposite_piece_type(ChessPieceType(spec.ai_piece))
+    chess_board, play = _engine(spec, moves, engine_kwargs)
+    ret = dict(finished=False, equal=False, win=False, move=None,
+               depth=0, nodes=0)
+    chess_board.update(row, col, human_piece_type)
+    if chess_board.piece_position_info(human_piece_type).is_win():
+        ret['finished'] = True
+    elif chess_board.no_piece_info.count() == 0:
+        ret['finished'], ret['equal'] = True, True
+    if ret['finished']:
+        play.close()
+        return ret
+    # 人的这一步已经在棋盘上, react会再落一次, 同一步只记一次
+    peer_ret = play.react(ActionMessage(row=row, col=col))
+    ret.update(finished=peer_ret['finished'], win=peer_ret['win'],
+               move=(peer_ret['msg'].row, peer_ret['msg'].col),
+               depth=peer_ret['depth'], nodes=peer_ret['nodes'])
+    if not ret['finished'] and chess_board.no_piece_info.count() == 0:
+        ret['finished'], ret['equal'] = True, True
+    if ret['finished']:
+        play.close()
+    else:
+        _keep_engine(spec, moves + bytes((row, col)) + bytes(ret['move']),
+                     chess_board, play)
+    return ret
+
+
+class GameSession:
+    """
+    事件循环这边只保存着法序列, 一万局也只占几MB. 棋盘和搜索引擎在
+    工作进程里, 每个进程只缓存最近的ENGINE_CACHE_SIZE局
+    """
+
+    __slots__ = ('game_id', 'ai_piece_type', 'board_len', 'win_len', 'moves',
+                 'finished', 'lock')
+
+    def __init__(self, game_id, ai_piece_type: ChessPieceType, board_len,
+                 win_len):
+        self.game_id = game_id
+        self.ai_piece_type = ai_piece_type
+        # 每局可以有自己的棋盘大小和连珠长度
+        self.board_len = board_len
+        self.win_len = win_len
+        self.moves = bytearray()
+        self.finished = False
+        self.lock = asyncio.Lock()
+
+    def spec(self):
+        return GameSpec(game_id=self.game_id,
+                        ai_piece=self.ai_piece_type.value,
+                        board_len=self.board_len, win_len=self.win_len)
+
+    def occupied(self, row, col):
+        moves = self.moves
+        return any(moves[i] == row and moves[i + 1] == col
+                   for i in range(0, len(moves), 2))
+
+    def state(self):
+        moves = self.moves
+        return dict(game_id=self.game_id,
+                    ai_piece=self.ai_piece_type.name,
+                    size=self.board_len, win_len=self.win_len,
+                    moves=[(moves[i], moves[i + 1])
+                           for i in range(0, len(moves), 2)],
+                    finished=self.finished)
+
+
+class SessionManager:
+    """
+    按game_id管理大量棋局, AI的搜索放到工作进程里做, 事件循环不会被阻塞.
+    每个工作进程是一个单进程的池, 同一局总是交给同一个进程, 那里缓存的
+    引擎和置换表跨回合保留. 传入executor时所有对局共用它
+    """
+
+    def __init__(self, executor=None, workers=None, **engine_kwargs):
+        self.sessions = {}
+        self.engine_kwargs = engine_kwargs
+        self._own_executor = executor is None
+        if executor is None:
+            # 用到时才import, 传入executor时不必再加载
+            # pylint: disable=import-outside-toplevel
+            from concurrent.futures import ProcessPoolExecutor
+            self.executors = [ProcessPoolExecutor(max_workers=1)
+                              for _ in range(workers or os.cpu_count())]
+        else:
+            self.executors = [executor]
+
+    def __executor(self, game_id):
+        return self.executors[hash(game_id) % len(self.executors)]
+
+    def new_game(self, game_id=None,
+                 human_piece_type=ChessPieceType.WHITE_CHESS_PIECE,
+                 board_len=None, win_len=None):
+        """
+        board_len, win_len不传时用CONFIG里的默认值.
+        白棋先走, 人执黑时AI先在中心落子
+        """
+        game_id = game_id or uuid.uuid4().hex
+        if game_id in self.sessions:
+            raise Exception(f'game {game_id} already exists')
+        board_len = board_len or CONFIG['CHESS_MAX_ROW']
+        win_len = win_len or CONFIG['WIN_LINE_LEN']
+        if not 0 < win_len <= board_len <= MAX_BOARD_LEN:
+            raise Exception(f'bad board size {board_len} '
+                            f'with win length {win_len}')
+        session = GameSession(game_id, opposite_piece_type(human_piece_type),
+                              board_len, win_len)
+        if session.ai_piece_type == ChessPieceType.WHITE_CHESS_PIECE:
+            mid = board_len // 2
+            session.moves += bytes((mid, mid))
+        self.sessions[game_id] = session
+        return session
+
+    def session(self, game_id):
+        session = self.sessions.get(game_id)
+        if session is None:
+            raise Exception(f'game {game_id} not found')
+        return session
+
+    def close_game(self, game_id):
+        if self.sessions.pop(game_id, None) is not None:
+            # 不等结果, 只是让工作进程早点释放这局的引擎
+            self.__executor(game_id).submit(forget_in_worker, game_id)
+
+    async def play(self, game_id, action_msg: ActionMessage):
+        session = self.session(game_id)
+        row, col = action_msg.row, action_msg.col
+        async with session.lock:
+            if session.finished:
+                raise Exception(f'game {game_id} is finished')
+            board_len = session.board_len
+            if not (0 <= row < board_len and 0 <= col < board_len):
+                raise Exception(f'({row}, {col}) is out of board')
+            if session.occupied(row, col):
+                raise Exception(f'({row}, {col}) is occupied')
+            loop = asyncio.get_running_loop()
+            ret = await loop.run_in_executor(
+                self.__executor(game_id), react_in_worker, session.spec(),
+                bytes(session.moves), self.engine_kwargs, row, col)
+            session.moves += bytes((row, col))
+            if ret['move'] is not None:
+                session.moves += bytes(ret['move'])
+            session.finished = ret['finished']
+        return ret
+
+    def close(self):
+        if self._own_executor:
+            for executor in self.executors:
+                executor.shutdown(cancel_futures=True)
+
+
+class JsonLineServer:
+    """
+    每行一个JSON请求, 每行一个JSON应答:
+        {"op": "new", "game_id": "可选", "piece": "white|black",
+         "size": 15, "win_len": 5}
+        {"op": "move", "game_id": "...", "row": 9, "col": 9}
+        {"op": "state", "game_id": "..."}
+        {"op": "close", "game_id": "..."}
+    请求里的"id"会原样带回. 白棋先走, 人执黑时new的应答里已经有AI的第一步
+    """
+
+    def __init__(self, manager: SessionManager):
+        self.manager = manager
+
+    async def handle_request(self, request):
+        op = request.get('op')
+        if op == 'new':
+            human_piece_type = ChessPieceType.WHITE_CHESS_PIECE
+            if request.get('piece') == 'black':
+                human_piece_type = ChessPieceType.BLACK_CHESS_PIECE
+            session = self.manager.new_game(
+                request.get('game_id'), human_piece_type,
+                board_len=request.get('size'),
+                win_len=request.get('win_len'))
+            return session.state()
+        if op == 'move':
+            ret = await self.manager.play(
+                request['game_id'],
+                ActionMessage(row=int(request['row']),
+                              col=int(request['col'])))
+            ret['game_id'] = request['game_id']
+            return ret
+        if op == 'state':
+            return self.manager.session(request['game_id']).state()
+        if op == 'close':
+            self.manager.close_game(request['game_id'])
+            return dict(game_id=request['game_id'])
+        raise Exception(f'unknown op {op}')
+
+    async def __respond(self, line, writer, write_lock):
+        request = {}
+        try:
+            request = json.loads(line)
+            response = dict(ok=True, **await self.handle_request(request))
+        # pylint: disable=broad-except
+        except Exception as e:
+            response = dict(ok=False, error=str(e))
+        if isinstance(request, dict) and 'id' in request:
+            response['id'] = request['id']
+        async with write_lock:
+            writer.write(json.dumps(response).encode() + b'\n')
+            await writer.drain()
+
+    async def handle_connection(self, reader, writer):
+        # 同一个连接上的请求并发处理, 应答按完成先后写回, 用id对应
+        write_lock, tasks = asyncio.Lock(), set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                task = asyncio.create_task(
+                    self.__respond(line, writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8765):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def run_server(host='127.0.0.1', port=8765, workers=None, **engine_kwargs):
+    manager = SessionManager(workers=workers, **engine_kwargs)
+    try:
+        asyncio.run(JsonLineServer(manager).serve(host, port))
+    finally:
+        manager.close()
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+import time
+from collections import defaultdict
+from zobang.constant import CONFIG
+from zobang.strategy.transposition import TranspositionTable
+
+
+INFINITE_SCORE = 10 ** 60
+# 每搜索这么多个节点看一次时间
+CLOCK_CHECK_NODES = 64
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class AlphaBetaSearch:
+    """
+    在WholeChessPosition上做negamax + alpha-beta剪枝, 深度可配.
+    走法排序: 置换表中的最好走法 > killer走法 > 静态评估 > history分
+    """
+
+    def __init__(self, position, depth=4, width=None):
+        self.position = position
+        self.depth = depth
+        # 每个非叶子节点只展开排序后的前width个走法, None表示不限制
+        self.width = width
+        self.killers = defaultdict(list)
+        self.history = defaultdict(int)
+        self.nodes = 0
+        self.best_move = None
+        self.completed_depth = 0
+        self.deadline = None
+        # 可选的threading.Event, 被set之后搜索像超时一样停下
+        self.stop_event = None
+
+    def __should_stop(self):
+        if self.stop_event is not None and self.stop_event.is_set():
+            return True
+        return self.deadline is not None and time.monotonic() > self.deadline
+
+    def __opposite(self, side):
+        if side == self.position.player_piece_type:
+            return self.position.peer_piece_type
+        return self.position.player_piece_type
+
+    def __side_score(self, side):
+        score = self.position.evaluate()
+        return score if side == self.position.player_piece_type else -score
+
+    def __tick(self):
+        """
+        每个节点调用一次, 每CLOCK_CHECK_NODES个节点看一次是否超时或被叫停
+        """
+        self.nodes += 1
+        if self.nodes % CLOCK_CHECK_NODES == 0 and self.__should_stop():
+            raise SearchTimeout()
+
+    def __order_moves(self, moves, side, ply, static_scores):
+        """
+        killer走法 > 静态评估 > history分, 置换表走法由__candidates放到最前
+        """
+        killers, history = self.killers[ply], self.history
+
+        def priority(move):
+            return (move in killers, static_scores.get(move, 0),
+                    history[(side, move)])
+        # 先按坐标排一次, 保证相同优先级时的顺序是确定的
+        return sorted(sorted(moves), key=priority, reverse=True)
+
+    def __remember_cutoff(self, move, side, ply, depth):
+        killers = self.killers[ply]
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+        self.history[(side, move)] += depth * depth
+        if self.position.stats is not None:
+            self.position.stats.cutoffs += 1
+
+    def __candidates(self, side, ply, depth, tt_move):
+        moves = self.position.possible_moves()
+        static_scores = {}
+        if depth >= 2 or self.position.cheap_move_scores:
+            # 没有廉价打分时, 叶子的父节点反正要评估所有子节点,
+            # 不必再为了排序评估一遍
+            static_scores = self.position.move_scores(moves, side)
+        moves = self.__order_moves(moves, side, ply, static_scores)
+        if tt_move in moves:
+            moves.remove(tt_move)
+            moves.insert(0, tt_move)
+        if self.width is not None and static_scores:
+            moves = moves[:self.width]
+        return moves
+
+    def __probe(self, tt_key, depth, ply, window):
+        """
+        tt_key是position.tt_key()的(键, 变换序号), window是(alpha, beta).
+        返回(置换表里的走法, 按表中的界收窄后的窗口, 能否直接返回),
+        能直接返回时窗口是(表中的分数, 表中的分数)
+        """
+        position = self.position
+        entry = position.transposition.probe(tt_key[0])
+        if entry is None:
+            return None, window, False
+        entry_depth, entry_score, bound, tt_move = entry
+        tt_move = position.from_canonical(tt_move, tt_key[1])
+        if ply == 0 or entry_depth < depth:
+            return tt_move, window, False
+        alpha, beta = window
+        if bound == TranspositionTable.LOWER_BOUND:
+            alpha = max(alpha, entry_score)
+        elif bound == TranspositionTable.UPPER_BOUND:
+            beta = min(beta, entry_score)
+        if bound == TranspositionTable.EXACT or alpha >= beta:
+            if position.stats is not None:
+                position.stats.tt_cutoffs += 1
+            return tt_move, (entry_score, entry_score), True
+        return tt_move, (alpha, beta), False
+
+    def __store(self, tt_key, depth, window, best):
+        """
+        window是搜索这个节点时的(alpha, beta), best是(分数, 走法)
+        """
+        best_score, best_move = best
+        if best_score <= window[0]:
+            bound = TranspositionTable.UPPER_BOUND
+        elif best_score >= window[1]:
+            bound = TranspositionTable.LOWER_BOUND
+        else:
+            bound = TranspositionTable.EXACT
+        position = self.position
+        position.transposition.store(
+            tt_key[0], depth=depth, score=best_score, bound=bound,
+            move=position.to_canonical(best_move, tt_key[1]))
+
+    def __negamax(self, depth, ply, window, side):
+        """
+        window是(alpha, beta), 返回站在side一方的分数
+        """
+        self.__tick()
+        if depth == 0:
+            return self.__side_score(side)
+        position = self.position
+        tt_key = position.tt_key()
+        tt_move, window, cutoff = self.__probe(tt_key, depth, ply, window)
+        if cutoff:
+            return window[0]
+        alpha, beta = window
+        # (最好的分数, 对应的走法)
+        best = (-INFINITE_SCORE, None)
+        moves = self.__candidates(side, ply, depth, tt_move)
+        if position.stats is not None:
+            position.stats.expand(ply, len(moves))
+        for move in moves:
+            if position.stats is not None:
+                position.stats.ply_searched[ply] += 1
+            with position.dry_run_update(move[0], move[1], side):
+                if position.is_win(side):
+                    score = CONFIG['WIN_SCORE']
+                else:
+                    score = -self.__negamax(depth - 1, ply + 1,
+                                            (-beta, -alpha),
+                                            self.__opposite(side))
+            if score > best[0]:
+                best = (score, move)
+                if ply == 0:
+                    self.best_move = move
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                self.__remember_cutoff(move, side, ply, depth)
+                break
+        if best[1] is None:
+            # 没有可以落子的位置, 和棋
+            return 0
+        self.__store(tt_key, depth, window, best)
+        return best[0]
+
+    def root_moves(self, depth=None):
+        """
+        根节点按搜索时的顺序排好(并按width裁剪)的走法
+        """
+        key, symmetry = self.position.tt_key()
+        entry = self.position.transposition.probe(key)
+        tt_move = None
+        if entry is not None:
+            tt_move = self.position.from_canonical(entry[3], symmetry)
+        return self.__candidates(self.position.player_piece_type, 0,
+                                 depth or self.depth, tt_move)
+
+    def root_move_score(self, move, depth=None, alpha=-INFINITE_SCORE,
+                        deadline=None):
+        """
+        单独搜索根节点的一个走法, 返回本方角度的分数.
+        分数不超过alpha时只是一个上界, 够用来判断它不如alpha对应的走法
+        """
+        depth = depth or self.depth
+        side = self.position.player_piece_type
+        self.deadline = deadline
+        try:
+            with self.position.dry_run_update(move[0], move[1], side):
+                if self.position.is_win(side):
+                    return CONFIG['WIN_SCORE']
+                return -self.__negamax(depth - 1, 1,
+                                       (-INFINITE_SCORE, -alpha),
+                                       self.__opposite(side))
+        finally:
+            self.deadline = None
+
+    def search(self, depth=None, deadline=None):
+        """
+        从1层开始迭代加深到depth层, 返回最深一次完整搜索的(走法, 分数),
+        分数是站在本方角度的. deadline是time.monotonic()的时间点, 到点就停,
+        浅层搜索存下的置换表走法让下一层的排序更准.
+        没有可以落子的位置时走法是None
+        """
+        depth = depth or self.depth
+        side = self.position.player_piece_type
+        for key in list(self.history):
+            # 上一回合的history分逐渐淡化
+            self.history[key] >>= 1
+        self.killers.clear()
+        self.nodes, self.completed_depth = 0, 0
+        self.deadline = deadline
+        result = None
+        try:
+            for current_depth in range(1, depth + 1):
+                self.best_move = None
+                score = self.__negamax(current_depth, 0,
+                                       (-INFINITE_SCORE, INFINITE_SCORE), side)
+                result = (self.best_move, score)
+                self.completed_depth = current_depth
+                if abs(score) >= CONFIG['WIN_SCORE']:
+                    # 已经分出胜负, 再深也不会改变结论
+                    break
+        except SearchTimeout:
+            pass
+        finally:
+            self.deadline = None
+        if result is None:
+            # 一层都没搜完, 用没搜完的那一层里暂时最好的走法
+            move = self.best_move
+            if move is None:
+                # 连第一个走法都没搜完就超时了
+                moves = self.position.possible_moves()
+                move = min(moves) if moves else None
+            result = (move, 0)
+        return result
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+用现有的搜索引擎离线生成开局库:
+    python -m zobang.strategy.book_builder opening.book --plies 3 --depth 4
+"""
+import argparse
+from functools import partial
+from zobang.chess_board.chess_board import ChessBoard
+from zobang.chess_board.symmetry import transform
+from zobang.constant import CONFIG, WHITE_PIECE, BLACK_PIECE
+from zobang.strategy.alpha_beta import AlphaBetaSearch
+from zobang.strategy.max_min_play import WholeChessPosition
+from zobang.strategy.opening_book import canonical_key, write_book
+from zobang.strategy.pattern import opposite_piece
+
+
+def position_from_moves(moves, board_len=None, win_len=None):
+    """
+    白棋先走, 返回轮到走棋的一方视角的WholeChessPosition
+    """
+    side = WHITE_PIECE if len(moves) % 2 == 0 else BLACK_PIECE
+    position = WholeChessPosition(chess_board=ChessBoard(board_len, win_len),
+                                  player_piece_type=side)
+    piece = WHITE_PIECE
+    for row, col in moves:
+        position.update(row, col, piece)
+        piece = opposite_piece(piece)
+    return position, side
+
+
+def _reply_order(scores, move):
+    # 分数高的在前, 相同时按坐标
+    return -scores[move], move
+
+
+# pylint: disable=too-many-arguments,too-many-locals
+def build_book(path, plies=3, depth=4, width=None, radius=1, replies=3,
+               progress=None, board_len=None, win_len=None):
+    """
+    从棋盘中心radius范围内的第一手出发, 每个局面深搜出应手写入开局库,
+    再沿对方排序最靠前的replies个应手往下展开, 一共plies轮.
+    board_len, win_len是开局库的规则, 不传时用CONFIG里的默认值
+    """
+    board_len = board_len or CONFIG['CHESS_MAX_ROW']
+    win_len = win_len or CONFIG['WIN_LINE_LEN']
+    mid = board_len // 2
+    frontier = [[(mid + dx, mid + dy)] for dx in range(-radius, radius + 1)
+                for dy in range(-radius, radius + 1)]
+    entries, max_stones = {}, 0
+    for _ in range(plies):
+        next_frontier = []
+        for moves in frontier:
+            key, symmetry = canonical_key(moves[0::2], moves[1::2], board_len)
+            if key in entries:
+                continue
+            position, side = position_from_moves(moves, board_len, win_len)
+            move, _ = AlphaBetaSearch(position, depth=depth,
+                                      width=width).search()
+            entries[key] = (transform(symmetry, move[0], move[1], board_len),
+                            depth)
+            max_stones = max(max_stones, len(moves))
+            if progress is not None:
+                progress(len(entries), moves, move)
+            position.update(move[0], move[1], side)
+            if position.is_win(side):
+                continue
+            peer = opposite_piece(side)
+            candidates = position.possible_moves()
+            scores = position.move_scores(candidates, peer)
+            for reply in sorted(candidates, key=partial(_reply_order,
+                                                        scores))[:replies]:
+                next_frontier.append(moves + [move, reply])
+        frontier = next_frontier
+    write_book(path, entries, board_len, max_stones, win_len)
+    return len(entries)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='build a zobang opening book')
+    parser.add_argument('path')
+    parser.add_argument('--plies', type=int, default=3)
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--width', type=int, default=None)
+    parser.add_argument('--radius', type=int, default=1)
+    parser.add_argument('--replies', type=int, default=3)
+    parser.add_argument('--board-len', type=int, default=None)
+    parser.add_argument('--win-len', type=int, default=None)
+    args = parser.parse_args(argv)
+    size = build_book(args.path, plies=args.plies, depth=args.depth,
+                      width=args.width, radius=args.radius,
+                      replies=args.replies, progress=print,
+                      board_len=args.board_len, win_len=args.win_len)
+    print(f'{size} positions written to {args.path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+from zobang.chess_board.geometry import neighbours
+
+
+class CandidateMoves:
+    """
+    增量维护的候选走法: 每个空位记录周围radius范围内有几个棋子,
+    计数大于0的空位就是候选. 落子和提子只改动周围的格子,
+    不再每次从最近一步出发重新生成, 离最近一步很远的威胁也不会漏掉
+    """
+
+    def __init__(self, board_len, radius=1, key=None):
+        """
+        key是ordered_moves的排序函数, 接收(x, y)返回排序键, 小的在前.
+        不传时用density_key
+        """
+        self.board_len = board_len
+        self.radius = radius
+        self.key = key or self.density_key
+        self._neighbours = neighbours(board_len, radius)
+        self._counts = [[0] * board_len for _ in range(board_len)]
+        self._occupied = [[False] * board_len for _ in range(board_len)]
+        self._moves = set()
+
+    def add_stone(self, x, y):
+        self._occupied[x][y] = True
+        self._moves.discard((x, y))
+        counts, occupied = self._counts, self._occupied
+        for _x, _y in self._neighbours[x][y]:
+            counts[_x][_y] += 1
+            if counts[_x][_y] == 1 and not occupied[_x][_y]:
+                self._moves.add((_x, _y))
+
+    def remove_stone(self, x, y):
+        counts, occupied = self._counts, self._occupied
+        for _x, _y in self._neighbours[x][y]:
+            counts[_x][_y] -= 1
+            if counts[_x][_y] == 0 and not occupied[_x][_y]:
+                self._moves.discard((_x, _y))
+        occupied[x][y] = False
+        if counts[x][y] > 0:
+            self._moves.add((x, y))
+
+    def __len__(self):
+        return len(self._moves)
+
+    def moves(self):
+        return set(self._moves)
+
+    def neighbour_count(self, x, y):
+        """
+        (x, y)周围radius范围内的棋子数
+        """
+        return self._counts[x][y]
+
+    def density_key(self, move):
+        """
+        默认排序: 周围棋子多的空位排在前面, 相同时按坐标
+        """
+        return -self._counts[move[0]][move[1]], move
+
+    def ordered_moves(self, key=None):
+        """
+        按key排序的候选走法, key不传时用构造时给的排序函数
+        """
+        return sorted(self._moves, key=key or self.key)
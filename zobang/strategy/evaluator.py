@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+from functools import lru_cache
+from zobang.chess_board.geometry import BoardGeometry
+from zobang.constant import NO_PIECE, WHITE_PIECE, BLACK_PIECE
+from zobang.strategy.pattern import line_score
+
+
+def _line_scores(row_position: bytes, win_len):
+    """
+    一条线上(白, 黑)双方的模式得分
+    """
+    return (line_score(piece_type=WHITE_PIECE, row_position=row_position,
+                       win_len=win_len),
+            line_score(piece_type=BLACK_PIECE, row_position=row_position,
+                       win_len=win_len))
+
+
+# 搜索里同样内容的线反复出现, 按内容缓存
+line_scores = lru_cache(maxsize=1 << 16)(_line_scores)
+
+
+def line_cache_info():
+    """
+    line_scores按线内容缓存的命中情况
+    """
+    return line_scores.cache_info()
+
+
+class IncrementalEvaluator:
+    """
+    记录每条线上双方的模式得分以及双方的总分, 落子或撤销时只重算经过
+    该格子的(最多)四条线, 取局面分是O(1)的
+    """
+
+    PIECE_TYPES = (WHITE_PIECE, BLACK_PIECE)
+
+    def __init__(self, board, geometry: BoardGeometry):
+        # board是WholeChessPosition里的ChessBoard, 只在这里读一次它的位棋盘.
+        # 之后每条线上的棋子按线存成bytearray, 重算一条线时不用再逐格收集
+        self._win_len = geometry.win_len
+        self._cell_lines = geometry.cell_lines
+        self._line_cells = [bytearray(len(line)) for line in geometry.lines]
+        for piece, info in ((WHITE_PIECE, board.white_position_info),
+                            (BLACK_PIECE, board.black_position_info)):
+            for x, y in info.iter_all_chess():
+                for index, offset in self._cell_lines[x][y]:
+                    self._line_cells[index][offset] = piece
+        # 按棋子的小整数下标, 下标0不用
+        self._line_scores = [None] + [[0] * len(self._line_cells)
+                                      for _ in self.PIECE_TYPES]
+        self._totals = [0, 0, 0]
+        self._history = []
+        for index in range(len(self._line_cells)):
+            self.__rescore(index)
+
+    def __rescore(self, index):
+        white_score, black_score = line_scores(
+            bytes(self._line_cells[index]), self._win_len)
+        totals = self._totals
+        white_scores = self._line_scores[WHITE_PIECE]
+        black_scores = self._line_scores[BLACK_PIECE]
+        totals[WHITE_PIECE] += white_score - white_scores[index]
+        totals[BLACK_PIECE] += black_score - black_scores[index]
+        white_scores[index] = white_score
+        black_scores[index] = black_score
+
+    def update(self, row, col, piece_type: int):
+        """
+        piece_type落在(row, col)时调用
+        """
+        slots = self._cell_lines[row][col]
+        white_scores = self._line_scores[WHITE_PIECE]
+        black_scores = self._line_scores[BLACK_PIECE]
+        self._history.append(
+            (list(self._totals), slots,
+             [(white_scores[index], black_scores[index])
+              for index, _ in slots]))
+        line_cells = self._line_cells
+        for index, offset in slots:
+            line_cells[index][offset] = piece_type
+            self.__rescore(index)
+
+    def rollback(self):
+        """
+        撤销最近一次update, 直接恢复保存的分数, 不用重算
+        """
+        totals, slots, saved = self._history.pop()
+        self._totals = totals
+        white_scores = self._line_scores[WHITE_PIECE]
+        black_scores = self._line_scores[BLACK_PIECE]
+        line_cells = self._line_cells
+        for (index, offset), (white_score, black_score) in zip(slots, saved):
+            line_cells[index][offset] = NO_PIECE
+            white_scores[index] = white_score
+            black_scores[index] = black_score
+
+    def total(self, piece_type: int):
+        return self._totals[piece_type]
+
+    def score(self, piece_type: int):
+        """
+        站在piece_type一方看的局面分
+        """
+        white = self._totals[WHITE_PIECE]
+        black = self._totals[BLACK_PIECE]
+        if piece_type == WHITE_PIECE:
+            return white - black
+        return black - white
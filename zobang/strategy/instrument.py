@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+import time
+from collections import defaultdict
+from zobang.strategy import pattern
+from zobang.strategy.evaluator import line_cache_info
+
+
+def pattern_cache_counts():
+    """
+    模式打分缓存累计的(命中, 未命中)次数: 按整条线内容缓存的line_scores,
+    加上超出预先算好的表的长片段
+    """
+    counts = (line_cache_info(), pattern.chunk_cache_info())
+    return (sum(info.hits for info in counts),
+            sum(info.misses for info in counts))
+
+
+class SearchStats:
+    """
+    一次搜索的统计. 搜索代码里只在stats不为None时才调用这里,
+    关闭时的开销只是一次属性判断
+    """
+
+    def __init__(self):
+        self.nodes = 0
+        self.evaluations = 0
+        self.cutoffs = 0
+        self.tt_cutoffs = 0
+        self.tt_hits = 0
+        self.tt_misses = 0
+        self.pattern_cache_hits = 0
+        self.pattern_cache_misses = 0
+        # 每层展开的节点数, 这些节点一共生成的子节点数, 以及剪枝前实际搜索的
+        self.ply_nodes = defaultdict(int)
+        self.ply_children = defaultdict(int)
+        self.ply_searched = defaultdict(int)
+        self.movegen_time = 0.0
+        self.eval_time = 0.0
+        self.total_time = 0.0
+        self.__start = None
+        self.__baseline = None
+
+    def start(self, transposition):
+        self.__baseline = (transposition.hits, transposition.misses,
+                           *pattern_cache_counts())
+        self.__start = time.perf_counter()
+
+    def finish(self, transposition, *, nodes, evaluations):
+        self.total_time = time.perf_counter() - self.__start
+        cache_hits, cache_misses = pattern_cache_counts()
+        tt_hits, tt_misses, base_hits, base_misses = self.__baseline
+        self.tt_hits = transposition.hits - tt_hits
+        self.tt_misses = transposition.misses - tt_misses
+        self.pattern_cache_hits = cache_hits - base_hits
+        self.pattern_cache_misses = cache_misses - base_misses
+        self.nodes, self.evaluations = nodes, evaluations
+
+    def expand(self, ply, children):
+        self.ply_nodes[ply] += 1
+        self.ply_children[ply] += children
+
+    def branching_factor(self):
+        return {ply: self.ply_children[ply] / self.ply_nodes[ply]
+                for ply in sorted(self.ply_nodes)}
+
+    def effective_branching_factor(self):
+        return {ply: self.ply_searched[ply] / self.ply_nodes[ply]
+                for ply in sorted(self.ply_nodes)}
+
+    def as_dict(self):
+        return dict(
+            nodes=self.nodes, evaluations=self.evaluations,
+            cutoffs=self.cutoffs, tt_cutoffs=self.tt_cutoffs,
+            tt_hits=self.tt_hits, tt_misses=self.tt_misses,
+            pattern_cache_hits=self.pattern_cache_hits,
+            pattern_cache_misses=self.pattern_cache_misses,
+            ply_nodes=dict(sorted(self.ply_nodes.items())),
+            branching_factor=self.branching_factor(),
+            effective_branching_factor=self.effective_branching_factor(),
+            movegen_ms=self.movegen_time * 1000,
+            eval_ms=self.eval_time * 1000,
+            total_ms=self.total_time * 1000)
@@ -1,179 +1,256 @@
 # -*- coding: utf-8 -*-
-from collections import defaultdict
+import threading
+import time
 from contextlib import contextmanager
-from typing import List
+from typing import Callable, List, Optional, Union
 from zobang.chess_board.chess_board import ChessBoard
-from zobang.constant import ChessPieceType, CONFIG
+from zobang.chess_board.symmetry import INVERSE, transform
+from zobang.constant import ChessPieceType, CONFIG, WHITE_PIECE, BLACK_PIECE
 from zobang.strategy.action_message import ActionMessage
+from zobang.strategy.alpha_beta import AlphaBetaSearch
+from zobang.strategy.candidates import CandidateMoves
+from zobang.strategy.evaluator import IncrementalEvaluator
+from zobang.strategy.instrument import SearchStats
+from zobang.strategy.numpy_eval import NumpyBoard
+from zobang.strategy.opening_book import OpeningBook
+from zobang.strategy.options import Options
+from zobang.strategy.parallel import ParallelRootSearch
+from zobang.strategy.pattern import opposite_piece
+from zobang.strategy.ponder import Ponderer
+from zobang.strategy.threat import ThreatSolver
+from zobang.strategy.transposition import ZobristHash, TranspositionTable
 
 
 class WholeChessPosition:
+    """
+    搜索用的局面. 内部棋子都是小整数(NO_PIECE, WHITE_PIECE, BLACK_PIECE),
+    update/rollback等方法的棋子参数也是小整数. 构造时复制一份chess_board,
+    搜索中的试走只改这份副本, 不会经过外面真实的棋盘
+    """
 
     def __init__(self, *, chess_board: ChessBoard,
-                 player_piece_type=ChessPieceType.WHITE_CHESS_PIECE):
+                 player_piece_type=WHITE_PIECE,
+                 use_numpy=False, symmetric_cache=False,
+                 candidate_radius=None):
+        if isinstance(player_piece_type, ChessPieceType):
+            player_piece_type = player_piece_type.value
         self.board_len = chess_board.row_num
-        self.chess_board = chess_board
-        self._position = [[ChessPieceType.NO_CHESS_PIECE
-                           for _ in range(chess_board.row_num)]
-                          for _ in range(chess_board.row_num)]
-        for x, y in chess_board.white_position_info.iter_all_chess():
-            self._position[x][y] = ChessPieceType.WHITE_CHESS_PIECE
-        for x, y in chess_board.black_position_info.iter_all_chess():
-            self._position[x][y] = ChessPieceType.BLACK_CHESS_PIECE
+        self.board = chess_board.clone()
+        # 棋盘大小和连珠长度跟着棋盘走, 按格子预先算好的线和邻居
+        self.geometry = chess_board.geometry
+        # 格子上有没有棋子, 是哪一方的, 都直接从board的位棋盘上读
+        self.zobrist = ZobristHash(self.board_len)
+        stones = []
+        for piece, info in ((WHITE_PIECE, self.board.white_position_info),
+                            (BLACK_PIECE, self.board.black_position_info)):
+            for x, y in info.iter_all_chess():
+                self.zobrist.toggle(x, y, piece)
+                stones.append((x, y, piece))
+        # 整盘棋共用, 跨回合保留
+        self.transposition = TranspositionTable()
+        # 打开后置换表按对称变换下的规范局面存取, 8个对称局面共用一份结果,
+        # 这时board才增量维护8个对称哈希
+        self.symmetric_cache = symmetric_cache
+        if symmetric_cache:
+            self.board.track_symmetry()
+        self.evaluator = IncrementalEvaluator(self.board, self.geometry)
+        # 可选的numpy整盘打分, 只用于走法排序和剪枝
+        self.numpy_board = None
+        if use_numpy:
+            self.numpy_board = NumpyBoard(self.board_len, self.geometry.win_len)
+            for x, y, piece in stones:
+                self.numpy_board.update(x, y, piece)
+        # candidate_radius不为None时, 候选走法是所有棋子周围这么远的空位,
+        # 增量维护; 否则只在双方最近一步所在的行附近生成
+        self.candidates = None
+        if candidate_radius is not None:
+            self.candidates = CandidateMoves(self.board_len, candidate_radius)
+            for x, y, _ in stones:
+                self.candidates.add_stone(x, y)
         self.player_piece_type = player_piece_type
-        self.peer_piece_type = self.__opposite_piece_type(player_piece_type)
+        self.peer_piece_type = opposite_piece(player_piece_type)
         self.last_move = []
         self.peer_last_move = []
         self.debug_is_win_point = False
+        self.search_nodes = 0
+        self.evaluations = 0
+        # 打开统计时是一个SearchStats
+        self.stats = None
 
-    @staticmethod
-    def __opposite_piece_type(piece_type: ChessPieceType):
-        if piece_type == ChessPieceType.BLACK_CHESS_PIECE:
-            return ChessPieceType.WHITE_CHESS_PIECE
-        return ChessPieceType.BLACK_CHESS_PIECE
-
-    @staticmethod
-    def __patter(row, start, end):
-        core_pattern = row[start: end + 1]
-        if start - 1 >= 0 and row[start - 1] == ChessPieceType.NO_CHESS_PIECE:
-            core_pattern = row[start - 1: end + 1]
-        if end + 1 < len(row) and row[end+1] == ChessPieceType.NO_CHESS_PIECE:
-            core_pattern.append(ChessPieceType.NO_CHESS_PIECE)
-        for i, v in enumerate(core_pattern):
-            if v != ChessPieceType.NO_CHESS_PIECE:
-                core_pattern[i] = 1
-            else:
-                core_pattern[i] = 0
-        return core_pattern
-
-    def __single_row_pattern(self, *, piece_type: ChessPieceType,
-                             row_position: List[ChessPieceType]):
-        opposite_piece = self.__opposite_piece_type(piece_type)
-        start_index, end_index, blank_num = None, None, 0
-        pattern = []
-        for i, p in enumerate(row_position):
-            if p == piece_type:
-                if start_index is None:
-                    # 模式的起点
-                    start_index = i
-                end_index = i
-                continue
-            if start_index is not None:
-                # 判断是否到了模式的终点, 当出现对方棋子，或是连续两个空位置时候，则为模式
-                # 结束位置，开始下一轮模式的寻找
-                if p == opposite_piece:
-                    pattern.append(self.__patter(row_position, start_index,
-                                                 end_index))
-                    start_index, end_index, blank_num = None, None, 0
-                    continue
-                if p == ChessPieceType.NO_CHESS_PIECE:
-                    blank_num += 1
-                    if blank_num == 2:
-                        pattern.append(self.__patter(row_position, start_index,
-                                                     end_index))
-                        start_index, end_index, blank_num = None, None, 0
-                        continue
-        if start_index is not None:
-            pattern.append(self.__patter(row_position, start_index,
-                                         end_index))
-        return pattern
+    def snapshot(self):
+        """
+        二进制快照, 轮到谁走记的是本方
+        """
+        return self.board.to_bytes(ChessPieceType(self.player_piece_type))
 
-    @contextmanager
-    def __fill_one_zero(self, row, index, value=1):
-        origin = row[index]
-        row[index] = value
-        yield row
-        row[index] = origin
-
-    @staticmethod
-    def __count_max_concurrent(row):
-        max_count, count = 0, 0
-        for v in row:
-            if v == 1:
-                count += 1
+    @classmethod
+    def from_snapshot(cls, data, **kwargs):
+        """
+        从snapshot()的结果(bytes或memoryview)恢复, 本方是快照里轮到走的一方
+        """
+        chess_board, side_to_move = ChessBoard.from_bytes(data)
+        position = cls(chess_board=chess_board, player_piece_type=side_to_move,
+                       **kwargs)
+        for x, y in chess_board.moves:
+            if position.board.piece_at(x, y) == position.player_piece_type:
+                position.last_move.append((x, y))
             else:
-                if count > max_count:
-                    max_count = count
-                count = 0
-        return max(max_count, count)
-
-    def __row_count(self, row):
-        pattern_count = defaultdict(int)
-        for i, v in enumerate(row):
-            if v == 0:
-                with self.__fill_one_zero(row, i) as new_row:
-                    pattern_count[self.__count_max_concurrent(new_row)] += 1
-        if pattern_count:
-            max_count = max(pattern_count.keys())
-            return max_count, pattern_count[max_count]
-        return len(row), 1
-
-    def __row_score(self, row):
-        if self.__count_max_concurrent(row) >= CONFIG['WIN_LINE_LEN']:
-            return CONFIG['WIN_SCORE']
-        count, number = self.__row_count(row)
-        return (10 ** count) * number
-
-    # pylint: disable=too-many-locals
+                position.peer_last_move.append((x, y))
+        return position
+
+    def switch_side(self):
+        """
+        换成站在对方的角度(对方变成本方), 逐步分析一局棋时每一步换一次
+        """
+        self.player_piece_type, self.peer_piece_type = \
+            self.peer_piece_type, self.player_piece_type
+        self.last_move, self.peer_last_move = \
+            self.peer_last_move, self.last_move
+
     def __all_cared_rows(self, x, y):
         """
         only care the rows that in-line with (x, y)
         """
-        edge_left = max(0, y - CONFIG['WIN_LINE_LEN'] + 1)
-        edge_right = min(y + CONFIG['WIN_LINE_LEN'] - 1, self.board_len - 1)
-        edge_up = max(0, x - CONFIG['WIN_LINE_LEN'] + 1)
-        edge_down = min(x + CONFIG['WIN_LINE_LEN'] - 1, self.board_len - 1)
-        row_l2r, row_u2d, row_lu2rd, row_ru2ld = [], [], [], []
-        for _y in range(edge_left, edge_right + 1):
-            row_l2r.append((x, _y))
-        for _x in range(edge_up, edge_down + 1):
-            row_u2d.append((_x, y))
-        gap_left_up = min(x - edge_up, y - edge_left)
-        gap_rigth_down = min(edge_down - x, edge_right - y)
-        for i in range(-gap_left_up, gap_rigth_down + 1):
-            _x, _y = x + i, y + i
-            row_lu2rd.append((_x, _y))
-        gap_right_up = min(x - edge_up, edge_right - y)
-        gap_left_down = min(edge_down - x, y - edge_left)
-        for i in range(-gap_right_up, gap_left_down + 1):
-            _x, _y = x + i, y - i
-            row_ru2ld.append((_x, _y))
-        return [row_l2r, row_u2d, row_lu2rd, row_ru2ld]
-
-    def __iter_all_player_cared_rows(self):
-        for row in self.__all_cared_rows(self.last_move[-1][0],
-                                         self.last_move[-1][1]):
-            yield [self._position[x][y] for x, y in row]
-
-    def __iter_all_peer_cared_rows(self):
-        for row in self.__all_cared_rows(self.peer_last_move[-1][0],
-                                         self.peer_last_move[-1][1]):
-            yield [self._position[x][y] for x, y in row]
-
-    def update(self, row, col, chess_piece_type: ChessPieceType):
+        return self.geometry.cared_rows[x][y]
+
+    def update(self, row, col, chess_piece_type: int):
         # print(row, col, chess_piece_type)
-        if self._position[row][col] != ChessPieceType.NO_CHESS_PIECE:
+        if not self.board.no_piece_info.has(row, col):
             raise Exception('error update')
-        self._position[row][col] = chess_piece_type
-        self.chess_board.update(row, col, chess_piece_type)
+        self.zobrist.toggle(row, col, chess_piece_type)
+        if self.stats is None:
+            self.evaluator.update(row, col, chess_piece_type)
+        else:
+            start = time.perf_counter()
+            self.evaluator.update(row, col, chess_piece_type)
+            self.stats.eval_time += time.perf_counter() - start
+        if self.numpy_board is not None:
+            self.numpy_board.update(row, col, chess_piece_type)
+        if self.candidates is not None:
+            self.candidates.add_stone(row, col)
+        self.board.place(row, col, chess_piece_type)
         if chess_piece_type == self.player_piece_type:
             self.last_move.append((row, col))
         else:
             self.peer_last_move.append((row, col))
 
-    def rollback(self, row, col, chess_piece_type: ChessPieceType):
-        self._position[row][col] = ChessPieceType.NO_CHESS_PIECE
-        self.chess_board.rollback(row, col, chess_piece_type)
+    def rollback(self, row, col, chess_piece_type: int):
+        self.zobrist.toggle(row, col, chess_piece_type)
+        self.evaluator.rollback()
+        if self.numpy_board is not None:
+            self.numpy_board.rollback(row, col)
+        if self.candidates is not None:
+            self.candidates.remove_stone(row, col)
+        self.board.take(row, col, chess_piece_type)
         if chess_piece_type == self.player_piece_type:
             self.last_move.pop()
         else:
             self.peer_last_move.pop()
 
+    @property
+    def hash(self):
+        return self.zobrist.value
+
+    def search_key(self):
+        """
+        候选走法只在双方最近一步所在的行附近生成, 所以键里还要带上最近一步.
+        增量维护候选走法时候选与最近一步无关, 只用局面的哈希
+        """
+        key = self.zobrist.value
+        if self.candidates is not None:
+            return key
+        if self.last_move:
+            key ^= self.zobrist.last_move_key(*self.last_move[-1],
+                                              self.player_piece_type)
+        if self.peer_last_move:
+            key ^= self.zobrist.last_move_key(*self.peer_last_move[-1],
+                                              self.peer_piece_type)
+        return key
+
+    def tt_key(self):
+        """
+        置换表用的(键, 变换序号). 没有打开symmetric_cache时变换序号总是0,
+        否则是规范局面的哈希, 存取走法时要用to_canonical/from_canonical转换
+        """
+        if not self.symmetric_cache:
+            return self.search_key(), 0
+        last_moves = []
+        if self.candidates is None and self.last_move:
+            last_moves.append((*self.last_move[-1], self.player_piece_type))
+        if self.candidates is None and self.peer_last_move:
+            last_moves.append((*self.peer_last_move[-1],
+                               self.peer_piece_type))
+        return self.board.symmetric_hash.canonical(last_moves)
+
+    def to_canonical(self, move, symmetry):
+        if move is None or symmetry == 0:
+            return move
+        return transform(symmetry, move[0], move[1], self.board_len)
+
+    def from_canonical(self, move, symmetry):
+        if move is None or symmetry == 0:
+            return move
+        return transform(INVERSE[symmetry], move[0], move[1], self.board_len)
+
+    def is_win(self, chess_piece_type: int):
+        """
+        最近一步是否让chess_piece_type连成了线, O(1)
+        """
+        if chess_piece_type == WHITE_PIECE:
+            return self.board.white_position_info.is_win()
+        return self.board.black_position_info.is_win()
+
     @contextmanager
-    def dry_run_update(self, row, col, chess_piece_type: ChessPieceType):
+    def dry_run_update(self, row, col, chess_piece_type: int):
         self.update(row, col, chess_piece_type)
-        yield
-        self.rollback(row, col, chess_piece_type)
+        try:
+            yield
+        finally:
+            self.rollback(row, col, chess_piece_type)
+
+    def evaluate(self):
+        """
+        站在本方角度的整盘局面分, 由evaluator增量维护
+        """
+        self.evaluations += 1
+        return self.evaluator.score(self.player_piece_type)
+
+    @property
+    def cheap_move_scores(self):
+        return self.numpy_board is not None
+
+    def move_scores(self, moves, chess_piece_type: int):
+        """
+        给每个候选走法一个用于排序的分数(站在chess_piece_type一方).
+        有numpy时一次算出整盘所有空位的分数, 否则逐个试走并评估
+        """
+        if self.numpy_board is not None:
+            if self.stats is None:
+                return self.numpy_board.move_scores(moves, chess_piece_type)
+            start = time.perf_counter()
+            scores = self.numpy_board.move_scores(moves, chess_piece_type)
+            self.stats.eval_time += time.perf_counter() - start
+            return scores
+        scores = {}
+        for x, y in moves:
+            with self.dry_run_update(x, y, chess_piece_type):
+                if self.is_win(chess_piece_type):
+                    scores[(x, y)] = CONFIG['WIN_SCORE']
+                else:
+                    self.evaluations += 1
+                    scores[(x, y)] = self.evaluator.score(chess_piece_type)
+        return scores
+
+    def vcf(self, chess_piece_type: int, max_nodes=2000):
+        """
+        轮到chess_piece_type走时的连续冲四取胜着法序列, 没有则返回None
+        """
+        solver = ThreatSolver(self.board.piece_grid(), self.board_len,
+                              win_len=self.geometry.win_len,
+                              max_nodes=max_nodes)
+        sequence = solver.solve(chess_piece_type)
+        self.search_nodes += solver.nodes
+        return sequence
 
     def __min_search(self, possible_moves: List[tuple]):
         """
@@ -182,46 +259,33 @@ class WholeChessPosition:
         min_score = 10 ** 50
         # print('需要在min层搜索的落子位置数: ', len(possible_moves))
         for x, y in possible_moves:
-            player_score, peer_score = 0, 0
+            self.search_nodes += 1
+            if self.stats is not None:
+                self.stats.ply_searched[1] += 1
             # print('begin>>>>', datetime.now().strftime('%H:%M:%S'))
             with self.dry_run_update(x, y, self.peer_piece_type):
-                for r in self.__iter_all_player_cared_rows():
-                    for pattern in self.__single_row_pattern(
-                            piece_type=self.player_piece_type, row_position=r):
-                        if not pattern:
-                            continue
-                        player_score += self.__row_score(pattern)
-                        if player_score >= CONFIG['WIN_SCORE']:
-                            return CONFIG['WIN_SCORE']
-                for r in self.__iter_all_peer_cared_rows():
-                    for pattern in self.__single_row_pattern(
-                            piece_type=self.peer_piece_type, row_position=r):
-                        if not pattern:
-                            continue
-                        peer_score += self.__row_score(pattern)
+                if self.is_win(self.peer_piece_type):
+                    return -CONFIG['WIN_SCORE']
+                score = self.evaluate()
             # print('end>>>>', datetime.now().strftime('%H:%M:%S'))
-            if player_score - peer_score < min_score:
-                min_score = player_score - peer_score
+            if score < min_score:
+                min_score = score
         return min_score
 
     def __nearby_moves(self, x, y):
-        blank_positions = set()
-        near_len = 1
-        y_left = max(y - near_len, 0)
-        y_right = min(y + near_len, CONFIG['CHESS_MAX_ROW'] - 1)
-        x_up = max(x - near_len, 0)
-        x_down = min(x + near_len, CONFIG['CHESS_MAX_ROW'] - 1)
-        for _x in range(x_up, x_down + 1):
-            for _y in range(y_left, y_right + 1):
-                if self._position[_x][_y] == ChessPieceType.NO_CHESS_PIECE:
-                    blank_positions.add((_x, _y))
-        return blank_positions
+        blank = self.board.no_piece_info.bit_board
+        return {(_x, _y) for _x, _y in self.geometry.neighbours(1)[x][y]
+                if blank.has(_x, _y)}
 
-    def __cared_pieces(self, x, y, chess_piece_type: ChessPieceType):
+    def __cared_pieces(self, x, y, chess_piece_type: int):
         ret = set()
+        if chess_piece_type == WHITE_PIECE:
+            stones = self.board.white_position_info.bit_board
+        else:
+            stones = self.board.black_position_info.bit_board
         for row in self.__all_cared_rows(x, y):
             for _x, _y in row:
-                if self._position[_x][_y] == chess_piece_type:
+                if stones.has(_x, _y):
                     ret.add((_x, _y))
         return ret
 
@@ -257,43 +321,174 @@ class WholeChessPosition:
         mid = int(self.board_len / 2)
         blank_positions = set()
         for x in [mid, mid + 1]:
-            if self._position[x][mid] == ChessPieceType.NO_CHESS_PIECE:
+            if self.board.no_piece_info.has(x, mid):
                 blank_positions.add((x, mid))
         # print("MID===", blank_positions)
         return blank_positions
 
     def __possible_moves(self):
-        return self.__possible_near_moves()
+        if self.candidates is None:
+            moves = self.__possible_near_moves()
+        elif not self.candidates:
+            moves = self.__middle_two_position()
+        else:
+            moves = self.candidates.ordered_moves()
+        if not moves:
+            # 附近没有空位但棋盘还没下满时, 剩下的空位都可以走,
+            # 只有棋盘下满了才没有走法
+            moves = list(self.board.no_piece_info.iter_all_chess())
+        return moves
+
+    def possible_moves(self):
+        if self.stats is None:
+            return self.__possible_moves()
+        start = time.perf_counter()
+        moves = self.__possible_moves()
+        self.stats.movegen_time += time.perf_counter() - start
+        return moves
 
-    def __max_min_search(self, possible_moves: List[tuple]):
+    def root_move_score(self, x, y):
+        """
+        本方走(x, y)后对方所有应对里对本方最差的分数, 直接赢了返回WIN_SCORE
+        """
+        self.search_nodes += 1
+        if self.stats is not None:
+            self.stats.ply_searched[0] += 1
+        with self.dry_run_update(x, y, self.player_piece_type):
+            if self.is_win(self.player_piece_type):
+                return CONFIG['WIN_SCORE']
+            key = self.tt_key()[0]
+            entry = self.transposition.probe(key)
+            if entry is not None:
+                return entry[1]
+            # 首先需要生成此种情况下对方可能的moves
+            min_layer_moves = self.possible_moves()
+            if self.stats is not None:
+                self.stats.expand(1, len(min_layer_moves))
+            # print("MIN>>>", min_layer_moves)
+            min_score = self.__min_search(min_layer_moves)
+            self.transposition.store(key, depth=1, score=min_score,
+                                     bound=TranspositionTable.EXACT)
+            return min_score
+
+    def __max_min_search(self, possible_moves: List[tuple], stop_event):
         """
         这里的chess_piece_type一定是本方
         """
         max_score, move = - (10 ** 60), None
         for x, y in possible_moves:
-            with self.dry_run_update(x, y, self.player_piece_type):
-                # 首先需要生成此种情况下对方可能的moves
-                min_layer_moves = self.__possible_moves()
-                # print("MIN>>>", min_layer_moves)
-                min_score = self.__min_search(min_layer_moves)
-                if min_score > max_score:
-                    max_score = min_score
-                    move = (x, y)
-                    # print(max_score, move)
+            if move is not None and stop_event is not None \
+                    and stop_event.is_set():
+                break
+            min_score = self.root_move_score(x, y)
+            if min_score >= CONFIG['WIN_SCORE']:
+                # 直接赢了, 不用再看对方的应对
+                return x, y
+            if min_score > max_score:
+                max_score = min_score
+                move = (x, y)
+                # print(max_score, move)
         return move
 
-    def max_min_search(self):
-        possible_moves = self.__possible_moves()
+    def max_min_search(self, stop_event=None):
+        """
+        stop_event被set后不再看剩下的根节点走法, 返回已经看过的里面最好的,
+        至少会看完第一个
+        """
+        self.search_nodes = 1
+        possible_moves = self.possible_moves()
+        if self.stats is not None:
+            self.stats.expand(0, len(possible_moves))
         # print('MAX层节点数目: ', len(possible_moves))
-        return self.__max_min_search(possible_moves)
+        return self.__max_min_search(possible_moves, stop_event)
+
+
+class SearchOptions(Options):
+    """
+    MaxMinPlay的搜索配置.
+    engine为max_min时是固定两层的极大极小搜索, 为alpha_beta时按depth
+    层数做alpha-beta迭代加深搜索, width限制每个节点展开的走法数,
+    time_budget_ms是每步默认的思考时间, 只对alpha_beta生效.
+    use_numpy打开后alpha_beta用numpy整盘打分来排序和剪枝.
+    workers不为None时根节点的走法分给这么多个进程并行搜索(0表示CPU个数).
+    instrument打开后每步的搜索统计放在react返回值的stats里,
+    同时传给stats_callback(给了stats_callback也会打开统计).
+    opening_book是开局库文件路径或OpeningBook, 命中时不再搜索.
+    symmetric_cache打开后置换表让旋转/翻转等价的局面共用结果.
+    vcf_nodes不为None时每步先在这么多节点内找连续冲四的杀棋, 找到就不再搜索.
+    candidate_radius不为None时候选走法取所有棋子周围这么远的空位.
+    ponder打开后(只对alpha_beta生效)每步走完在后台线程里预先搜索
+    对方最可能的几个应手, 猜中时直接用搜好的结果
+    """
+
+    # pylint: disable=too-many-arguments,too-many-instance-attributes
+    def __init__(self, *, engine='max_min', depth=4,
+                 width: Optional[int] = None,
+                 time_budget_ms: Optional[float] = None, use_numpy=False,
+                 workers: Optional[int] = None, instrument=False,
+                 stats_callback: Optional[Callable[[dict], None]] = None,
+                 opening_book: Union[str, OpeningBook, None] = None,
+                 symmetric_cache=False, vcf_nodes: Optional[int] = None,
+                 candidate_radius: Optional[int] = None, ponder=False):
+        if engine not in ('max_min', 'alpha_beta'):
+            raise Exception(f'unknown engine {engine}')
+        self.engine = engine
+        self.depth = depth
+        self.width = width
+        self.time_budget_ms = time_budget_ms
+        self.use_numpy = use_numpy
+        self.workers = workers
+        self.instrument = instrument or stats_callback is not None
+        self.stats_callback = stats_callback
+        self.opening_book = opening_book
+        self.symmetric_cache = symmetric_cache
+        self.vcf_nodes = vcf_nodes
+        self.candidate_radius = candidate_radius
+        self.ponder = ponder
 
 
 class MaxMinPlay:
 
-    def __init__(self, chess_board: ChessBoard, piece_type: ChessPieceType):
+    def __init__(self, chess_board: ChessBoard, piece_type: ChessPieceType,
+                 options: SearchOptions = None, **kwargs):
+        """
+        options是SearchOptions, 也可以直接用关键字参数给出其中的各项,
+        两者都给时关键字参数覆盖options里的同名项.
+        react_async在后台线程里搜索, stop_search让正在进行的搜索马上
+        用已经搜到的最好走法落子
+        """
+        options = (options or SearchOptions()).replace(**kwargs)
+        self.options = options
         self.chess_board = chess_board
-        self.player = WholeChessPosition(chess_board=self.chess_board,
-                                         player_piece_type=piece_type)
+        self.player = WholeChessPosition(
+            chess_board=self.chess_board, player_piece_type=piece_type,
+            use_numpy=options.use_numpy,
+            symmetric_cache=options.symmetric_cache,
+            candidate_radius=options.candidate_radius)
+        self.engine = None
+        if options.engine == 'alpha_beta':
+            self.engine = AlphaBetaSearch(self.player, depth=options.depth,
+                                          width=options.width)
+        self._own_book = isinstance(options.opening_book, str)
+        self.opening_book = options.opening_book
+        if self._own_book:
+            self.opening_book = OpeningBook(options.opening_book)
+        self.ponderer = None
+        if options.ponder and self.engine is not None:
+            self.ponderer = Ponderer(
+                depth=options.depth, width=options.width,
+                use_numpy=options.use_numpy,
+                candidate_radius=options.candidate_radius)
+        # react_async用的后台线程和叫停搜索的信号
+        self._executor = None
+        self._stop = threading.Event()
+        if self.engine is not None:
+            self.engine.stop_event = self._stop
+        self.parallel = None
+        if options.workers is not None:
+            self.parallel = ParallelRootSearch(
+                workers=options.workers or None, engine=options.engine,
+                depth=options.depth, width=options.width)
         self.piece_type = piece_type
         if piece_type == ChessPieceType.WHITE_CHESS_PIECE:
             self.opposite_piece_type = ChessPieceType.BLACK_CHESS_PIECE
@@ -308,15 +503,149 @@ class MaxMinPlay:
             return self.chess_board.black_position_info
         raise Exception('not get self piece type')
 
-    def react(self, action_msg: ActionMessage):
-        ret = dict(finished=False, equal=False, win=False, msg=None)
-        self.player.update(action_msg.row, action_msg.col,
-                           self.opposite_piece_type)
-        move = self.player.max_min_search()
-        self.player.update(move[0], move[1], self.player.player_piece_type)
+    def update(self, row, col, piece_type: ChessPieceType):
+        """
+        真实的一步棋: 同时落在外面的棋盘和搜索用的局面上
+        """
+        self.chess_board.update(row, col, piece_type)
+        self.player.update(row, col, piece_type.value)
+
+    def close(self):
+        self._stop.set()
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+        if self.ponderer is not None:
+            self.ponderer.stop()
+        if self.parallel is not None:
+            self.parallel.close()
+        if self._own_book:
+            self.opening_book.close()
+            self._own_book = False
+
+    def __book_move(self):
+        if self.opening_book is None:
+            return None
+        stones = self.chess_board.row_num ** 2 \
+            - self.chess_board.no_piece_info.count()
+        move = self.opening_book.lookup_canonical(
+            *self.chess_board.canonical_key(), stones,
+            board_len=self.chess_board.row_num,
+            win_len=self.chess_board.win_len)
+        if move is None or not self.chess_board.no_piece_info.has(*move):
+            return None
+        return move
+
+    def __search(self, time_budget_ms, ret, pondered=None):
+        if pondered is not None:
+            ret['ponder'] = True
+            ret['depth'] = self.ponderer.depth
+            return pondered[0]
+        move = self.__book_move()
+        if move is not None:
+            ret['book'] = True
+            return move
+        if self.options.vcf_nodes is not None:
+            self.player.search_nodes = 0
+            sequence = self.player.vcf(self.piece_type.value,
+                                       self.options.vcf_nodes)
+            if sequence is not None:
+                ret['vcf'] = sequence
+                ret['nodes'] = self.player.search_nodes
+                return sequence[0]
+        if self.parallel is not None:
+            deadline = None
+            if time_budget_ms is not None:
+                deadline = time.monotonic() + time_budget_ms / 1000
+            move = self.parallel.search(self.player, self.engine,
+                                        deadline=deadline,
+                                        stop_event=self._stop)[0]
+            ret['depth'] = self.parallel.depth if self.engine else 2
+            ret['nodes'] = self.parallel.nodes
+            return move
+        if self.engine is None:
+            move = self.player.max_min_search(self._stop)
+            ret['depth'], ret['nodes'] = 2, self.player.search_nodes
+            return move
+        deadline = None
+        if time_budget_ms is not None:
+            deadline = time.monotonic() + time_budget_ms / 1000
+        move = self.engine.search(deadline=deadline)[0]
+        ret['depth'] = self.engine.completed_depth
+        ret['nodes'] = self.engine.nodes
+        return move
+
+    def react(self, action_msg: ActionMessage, time_budget_ms=None):
+        """
+        time_budget_ms不传时用构造时给的默认值, 都没有则不限时
+        """
+        self._stop.clear()
+        return self.__react(action_msg, time_budget_ms)
+
+    def __react(self, action_msg: ActionMessage, time_budget_ms):
+        ret = dict(finished=False, equal=False, win=False, msg=None,
+                   depth=0, nodes=0, evaluations=0, book=False, vcf=None,
+                   ponder=False)
+        pondered = None
+        if self.ponderer is not None:
+            pondered = self.ponderer.take((action_msg.row, action_msg.col))
+        self.update(action_msg.row, action_msg.col, self.opposite_piece_type)
+        if time_budget_ms is None:
+            time_budget_ms = self.options.time_budget_ms
+        evaluations = self.player.evaluations
+        if self.options.instrument:
+            self.player.stats = SearchStats()
+            self.player.stats.start(self.player.transposition)
+        move = self.__search(time_budget_ms, ret, pondered)
+        ret['evaluations'] = self.player.evaluations - evaluations
+        if self.player.stats is not None:
+            stats, self.player.stats = self.player.stats, None
+            stats.finish(self.player.transposition, nodes=ret['nodes'],
+                         evaluations=ret['evaluations'])
+            ret['stats'] = stats.as_dict()
+            if self.options.stats_callback is not None:
+                self.options.stats_callback(ret['stats'])
+        if move is None and self.chess_board.no_piece_info.count():
+            # 搜索没有给出走法但棋盘还没下满, 随便走一个空位
+            move = next(self.chess_board.no_piece_info.iter_all_chess())
+        if move is None:
+            # 棋盘下满了, 没有可以落子的位置
+            ret['finished'], ret['equal'] = True, True
+            return ret
+        self.update(move[0], move[1], self.piece_type)
         msg = ActionMessage(row=move[0], col=move[1])
         ret['msg'] = msg
-        if self.position_info.is_win():
+        if self.player.is_win(self.piece_type.value):
             ret['finished'] = True
             ret['win'] = True
+        elif self.ponderer is not None:
+            self.ponderer.start(self.player)
         return ret
+
+    def react_async(self, action_msg: ActionMessage, time_budget_ms=None,
+                    callback=None):
+        """
+        在后台线程里执行react, 马上返回Future, 结果与react的返回值相同.
+        callback不为None时搜完在后台线程里调用callback(future).
+        还没开始的请求可以用Future.cancel()取消, 正在进行的搜索用stop_search()
+        叫停. 搜索期间调用方不能改动chess_board
+        """
+        if self._executor is None:
+            # 用到时才import, 只用react时不必加载concurrent.futures
+            # pylint: disable=import-outside-toplevel
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        # 提交时就清掉叫停信号, 这样请求刚提交还没开始时也能叫停
+        self._stop.clear()
+        future = self._executor.submit(self.__react, action_msg,
+                                       time_budget_ms)
+        if callback is not None:
+            future.add_done_callback(callback)
+        return future
+
+    def stop_search(self):
+        """
+        让正在进行的搜索马上结束, 用已经搜到的最好走法落子.
+        max_min引擎在两个根节点走法之间检查, alpha_beta在搜索节点上检查
+        """
+        self._stop.set()
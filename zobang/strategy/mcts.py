@@ -0,0 +1,505 @@
+# -*- coding: utf-8 -*-
+"""
+蒙特卡洛树搜索(UCT), 与MaxMinPlay一样用react(ActionMessage)对弈.
+模拟对局在一维列表的轻量棋盘上进行, 候选走法只取已有棋子周围的空位.
+树在回合之间保留, 对方走完后从对应的子树继续搜索
+"""
+import math
+import os
+import random
+import time
+from functools import lru_cache
+from typing import Optional
+from zobang.chess_board.chess_board import ChessBoard
+from zobang.chess_board.geometry import geometry
+from zobang.constant import ChessPieceType, NO_PIECE, WHITE_PIECE, BLACK_PIECE
+from zobang.strategy.action_message import ActionMessage
+from zobang.strategy.options import Options
+from zobang.strategy.pattern import line_score, opposite_piece, \
+    opposite_piece_type
+
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+@lru_cache(maxsize=None)
+def _flat_tables(board_len, win_len, radius):
+    """
+    按一维下标(x * board_len + y)算好每个格子的邻居, 以及经过它的四条线段:
+    (线段上各格子的下标, 该格子在线段里的位置)
+    """
+    rules = geometry(board_len, win_len)
+    around = rules.neighbours(radius)
+    neighbours, rows = [], []
+    for x in range(board_len):
+        for y in range(board_len):
+            neighbours.append(tuple(a * board_len + b
+                                    for a, b in around[x][y]))
+            rows.append(tuple(
+                (tuple(a * board_len + b for a, b in row), row.index((x, y)))
+                for row in rules.cared_rows[x][y]))
+    return neighbours, rows
+
+
+class PlayoutBoard:
+    """
+    模拟对局用的轻量棋盘. 候选走法是所有棋子周围radius以内的空位,
+    用列表加下标字典维护, 随机取和删除都是O(1). 只落子不撤销,
+    每次模拟在copy()出来的副本上进行
+    """
+
+    __slots__ = ('board_len', 'win_len', 'cells', 'candidates', '_index',
+                 '_neighbours', '_rows')
+
+    def __init__(self, board_len, win_len, radius=1, source=None):
+        """
+        source不为None时从它的当前棋子和候选走法复制, 邻居表也沿用它的,
+        radius不再起作用, 见copy()
+        """
+        self.board_len = board_len
+        self.win_len = win_len
+        if source is None:
+            self._neighbours, self._rows = _flat_tables(board_len, win_len,
+                                                        radius)
+            self.cells = [NO_PIECE] * (board_len * board_len)
+            self.candidates = []
+            self._index = {}
+        else:
+            self._neighbours, self._rows = source.tables
+            self.cells = list(source.cells)
+            self.candidates = list(source.candidates)
+            self._index = dict(source.positions)
+
+    @classmethod
+    def from_chess_board(cls, chess_board: ChessBoard, radius=1):
+        board = cls(chess_board.row_num, chess_board.win_len, radius)
+        for piece, info in ((WHITE_PIECE, chess_board.white_position_info),
+                            (BLACK_PIECE, chess_board.black_position_info)):
+            for x, y in info.iter_all_chess():
+                board.place(x * board.board_len + y, piece)
+        if not any(board.cells):
+            # 空棋盘从中心开始
+            mid = board.board_len // 2
+            board.__add(mid * board.board_len + mid)
+        return board
+
+    @property
+    def tables(self):
+        """
+        按格子下标预先算好的(邻居, 经过的线段), 同样参数的棋盘共用
+        """
+        return self._neighbours, self._rows
+
+    @property
+    def positions(self):
+        """
+        候选走法到它在candidates里的下标
+        """
+        return self._index
+
+    def copy(self):
+        return PlayoutBoard(self.board_len, self.win_len, source=self)
+
+    def __add(self, i):
+        self._index[i] = len(self.candidates)
+        self.candidates.append(i)
+
+    def __discard(self, i):
+        pos = self._index.pop(i, None)
+        if pos is None:
+            return
+        last = self.candidates.pop()
+        if last != i:
+            self.candidates[pos] = last
+            self._index[last] = pos
+
+    def place(self, i, piece):
+        cells = self.cells
+        cells[i] = piece
+        self.__discard(i)
+        for j in self._neighbours[i]:
+            if cells[j] == NO_PIECE and j not in self._index:
+                self.__add(j)
+
+    def is_win(self, i, piece):
+        """
+        piece落在i(不管是否已经落下)能否连成线
+        """
+        cells, board_len = self.cells, self.board_len
+        x, y = divmod(i, board_len)
+        for dx, dy in DIRECTIONS:
+            count = 1
+            for step in (1, -1):
+                a, b = x + step * dx, y + step * dy
+                while 0 <= a < board_len and 0 <= b < board_len \
+                        and cells[a * board_len + b] == piece:
+                    count += 1
+                    a += step * dx
+                    b += step * dy
+            if count >= self.win_len:
+                return True
+        return False
+
+    def move_score(self, i, piece):
+        """
+        在i落子后经过i的四条线段上, 本方的模式得分加上对方在这里落子的模式得分,
+        即进攻和阻挡的价值
+        """
+        cells, win_len = self.cells, self.win_len
+        opposite = opposite_piece(piece)
+        score = 0
+        for indices, offset in self._rows[i]:
+            line = [cells[j] for j in indices]
+            line[offset] = piece
+            score += line_score(piece_type=piece, row_position=line,
+                                win_len=win_len)
+            line[offset] = opposite
+            score += line_score(piece_type=opposite, row_position=line,
+                                win_len=win_len)
+        return score
+
+
+class Node:
+    """
+    piece走了move之后的局面, wins是站在piece一方的累计得分(和棋算半局)
+    """
+
+    __slots__ = ('move', 'piece', 'parent', 'children', 'untried', 'visits',
+                 'wins', 'terminal')
+
+    def __init__(self, move, piece, parent=None, terminal=False):
+        self.move = move
+        self.piece = piece
+        self.parent = parent
+        self.children = {}
+        # 还没展开的走法, 第一次走到这个节点时才生成
+        self.untried = None
+        self.visits = 0
+        self.wins = 0.0
+        self.terminal = terminal
+
+
+class MctsOptions(Options):
+    """
+    MctsPlay的搜索配置.
+    playouts和time_budget_ms是每步的预算, 哪个先到就停, 只限时的话
+    playouts传None. exploration是UCT的探索系数.
+    pattern_rollout打开后模拟时每步随机抽rollout_samples个候选,
+    按现有的模式打分取最好的, 展开顺序也按模式打分; 否则纯随机.
+    max_rollout_moves限制每次模拟的步数, 超出算和棋.
+    candidate_radius是候选走法离已有棋子的距离.
+    workers不为None时另外在这么多个进程里各建一棵树并行模拟(0表示CPU个数),
+    最后按根节点的访问次数合并, 模拟次数在本进程和各子进程间平分
+    """
+
+    # pylint: disable=too-many-arguments,too-many-instance-attributes
+    def __init__(self, *, playouts: Optional[int] = 2000,
+                 time_budget_ms: Optional[float] = None, exploration=1.4,
+                 pattern_rollout=False, rollout_samples=4,
+                 max_rollout_moves: Optional[int] = None, candidate_radius=1,
+                 workers: Optional[int] = None, seed: Optional[int] = None):
+        if playouts is None and time_budget_ms is None:
+            raise Exception('either playouts or time_budget_ms is required')
+        self.playouts = playouts
+        self.time_budget_ms = time_budget_ms
+        self.exploration = exploration
+        self.pattern_rollout = pattern_rollout
+        self.rollout_samples = rollout_samples
+        self.max_rollout_moves = max_rollout_moves
+        self.candidate_radius = candidate_radius or 1
+        self.workers = workers
+        self.seed = seed
+
+
+class MonteCarloTreeSearch:
+    """
+    UCT搜索, 用到options(MctsOptions)里的exploration, pattern_rollout,
+    rollout_samples和max_rollout_moves
+    """
+
+    def __init__(self, options: MctsOptions = None, seed=None):
+        self.options = options or MctsOptions()
+        self.random = random.Random(seed)
+        # 模拟中落下的棋子数, 模式打分次数, 树的最大深度
+        self.nodes = 0
+        self.evaluations = 0
+        self.max_depth = 0
+
+    def run(self, root: Node, board: PlayoutBoard, playouts=None,
+            deadline=None):
+        """
+        从root(对应board的局面)做playouts次模拟, 或者到deadline为止,
+        两个至少给一个. 返回模拟的次数
+        """
+        done = 0
+        while (playouts is None or done < playouts) and \
+                (deadline is None or time.monotonic() < deadline):
+            self.__iterate(root, board.copy())
+            done += 1
+        return done
+
+    def __iterate(self, node: Node, board: PlayoutBoard):
+        depth = 0
+        # 选择: 一直走到还有走法没展开的节点或终局
+        while not node.terminal:
+            if node.untried is None:
+                node.untried = self.__ordered_moves(
+                    board, opposite_piece(node.piece))
+            if node.untried or not node.children:
+                break
+            node = self.__select(node)
+            board.place(node.move, node.piece)
+            depth += 1
+        # 展开一个新节点
+        if not node.terminal and node.untried:
+            move, piece = node.untried.pop(), opposite_piece(node.piece)
+            child = Node(move, piece, node, board.is_win(move, piece))
+            board.place(move, piece)
+            node.children[move] = child
+            node = child
+            depth += 1
+        self.max_depth = max(self.max_depth, depth)
+        if node.terminal:
+            winner = node.piece
+        else:
+            winner = self.__rollout(board, opposite_piece(node.piece))
+        # 回传
+        while node is not None:
+            node.visits += 1
+            if winner == node.piece:
+                node.wins += 1
+            elif winner == NO_PIECE:
+                node.wins += 0.5
+            node = node.parent
+
+    def __select(self, node: Node):
+        log_visits = math.log(node.visits)
+        best, best_value = None, -1.0
+        for child in node.children.values():
+            value = child.wins / child.visits \
+                + self.options.exploration * math.sqrt(
+                    log_visits / child.visits)
+            if value > best_value:
+                best, best_value = child, value
+        return best
+
+    def __ordered_moves(self, board: PlayoutBoard, piece):
+        """
+        从列表末尾开始展开, 所以把最好的放在最后
+        """
+        moves = list(board.candidates)
+        if self.options.pattern_rollout:
+            self.evaluations += len(moves)
+            scores = {i: board.move_score(i, piece) for i in moves}
+            moves.sort(key=lambda i: (scores[i], -i))
+        else:
+            self.random.shuffle(moves)
+        return moves
+
+    def __rollout(self, board: PlayoutBoard, piece):
+        """
+        模拟到一方连成线, 返回赢的一方, 无处可下或超出步数算和棋
+        """
+        candidates = board.candidates
+        pattern_rollout = self.options.pattern_rollout
+        max_moves = self.options.max_rollout_moves
+        count = 0
+        while candidates and (max_moves is None or count < max_moves):
+            if pattern_rollout:
+                move = self.__pattern_move(board, piece)
+            else:
+                move = candidates[self.random.randrange(len(candidates))]
+            count += 1
+            if board.is_win(move, piece):
+                self.nodes += count
+                return piece
+            board.place(move, piece)
+            piece = opposite_piece(piece)
+        self.nodes += count
+        return NO_PIECE
+
+    def __pattern_move(self, board: PlayoutBoard, piece):
+        candidates = board.candidates
+        samples = self.options.rollout_samples
+        if len(candidates) > samples:
+            candidates = self.random.sample(candidates, samples)
+        self.evaluations += len(candidates)
+        return max(candidates, key=lambda i: board.move_score(i, piece))
+
+
+def root_stats(root: Node):
+    return {move: (child.visits, child.wins)
+            for move, child in root.children.items()}
+
+
+# pylint: disable=too-many-arguments
+def _search_in_worker(snapshot, piece, options, playouts, deadline, seed):
+    """
+    子进程里执行: 从棋盘快照建一棵新树独立模拟, 只返回根节点各走法的统计
+    """
+    chess_board, _ = ChessBoard.from_bytes(snapshot)
+    board = PlayoutBoard.from_chess_board(chess_board,
+                                          options.candidate_radius)
+    search = MonteCarloTreeSearch(options, seed)
+    root = Node(None, opposite_piece(piece))
+    done = search.run(root, board, playouts, deadline)
+    return (root_stats(root), done, search.nodes, search.evaluations,
+            search.max_depth)
+
+
+class MctsPlay:
+
+    def __init__(self, chess_board: ChessBoard, piece_type: ChessPieceType,
+                 options: MctsOptions = None, **kwargs):
+        """
+        options是MctsOptions, 也可以直接用关键字参数给出其中的各项,
+        两者都给时关键字参数覆盖options里的同名项
+        """
+        self.options = (options or MctsOptions()).replace(**kwargs)
+        self.chess_board = chess_board
+        self.piece_type = piece_type
+        self.opposite_piece_type = opposite_piece_type(piece_type)
+        self.random = random.Random(self.options.seed)
+        self.search = MonteCarloTreeSearch(self.options, self.random.random())
+        # 上一次搜索的根节点和它对应的着法序列, 用来复用子树
+        self.root = None
+        self._root_moves = []
+        self.workers = None
+        if self.options.workers is not None:
+            self.workers = self.options.workers or os.cpu_count()
+        self._executor = None
+
+    @property
+    def position_info(self):
+        if self.piece_type == ChessPieceType.WHITE_CHESS_PIECE:
+            return self.chess_board.white_position_info
+        return self.chess_board.black_position_info
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            # 用到时才import, 单进程搜索不用加载concurrent.futures
+            # pylint: disable=import-outside-toplevel
+            from concurrent.futures import ProcessPoolExecutor
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def update(self, row, col, piece_type: ChessPieceType):
+        self.chess_board.update(row, col, piece_type)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def __reuse_root(self):
+        """
+        沿着上次搜索以后实际下的着法走到对应的子树, 走不下去就建新树
+        """
+        moves = self.chess_board.moves
+        board_len = self.chess_board.row_num
+        node = self.root
+        if node is not None and \
+                moves[:len(self._root_moves)] == self._root_moves:
+            for x, y in moves[len(self._root_moves):]:
+                node = node.children.get(x * board_len + y)
+                if node is None:
+                    break
+        if node is None or node.piece != self.opposite_piece_type.value:
+            node = Node(None, self.opposite_piece_type.value)
+        node.parent = None
+        self.root, self._root_moves = node, list(moves)
+        return node
+
+    @staticmethod
+    def __forced_move(board: PlayoutBoard, piece):
+        """
+        能直接连成线就下, 否则堵住对方直接连成线的点
+        """
+        for i in board.candidates:
+            if board.is_win(i, piece):
+                return i
+        for i in board.candidates:
+            if board.is_win(i, opposite_piece(piece)):
+                return i
+        return None
+
+    def __submit(self, piece, playouts, deadline):
+        """
+        让每个子进程各建一棵树模拟, 没有开多进程时返回空列表
+        """
+        if self.workers is None:
+            return []
+        snapshot = self.chess_board.to_bytes()
+        return [self.executor.submit(
+            _search_in_worker, snapshot, piece, self.options, playouts,
+            deadline, self.random.randrange(1 << 30))
+            for _ in range(self.workers)]
+
+    @staticmethod
+    def __merge(root: Node, futures, ret):
+        """
+        把各子进程根节点的统计和搜索量加到本进程的结果上,
+        返回{走法: [访问次数, 得分]}
+        """
+        stats = {move: list(value) for move, value in root_stats(root).items()}
+        for future in futures:
+            worker_stats, done, nodes, evaluations, depth = future.result()
+            ret['playouts'] += done
+            ret['nodes'] += nodes
+            ret['evaluations'] += evaluations
+            ret['depth'] = max(ret['depth'], depth)
+            for move, (visits, wins) in worker_stats.items():
+                total = stats.setdefault(move, [0, 0.0])
+                total[0] += visits
+                total[1] += wins
+        return stats
+
+    def __search(self, time_budget_ms, ret):
+        board = PlayoutBoard.from_chess_board(self.chess_board,
+                                              self.options.candidate_radius)
+        piece = self.piece_type.value
+        move = self.__forced_move(board, piece)
+        if move is not None:
+            ret['depth'] = 1
+            return move
+        root = self.__reuse_root()
+        deadline = None
+        if time_budget_ms is not None:
+            deadline = time.monotonic() + time_budget_ms / 1000
+        playouts = self.options.playouts
+        if self.workers is not None and playouts is not None:
+            playouts = max(1, playouts // (self.workers + 1))
+        futures = self.__submit(piece, playouts, deadline)
+        search = self.search
+        search.nodes, search.evaluations, search.max_depth = 0, 0, 0
+        ret['playouts'] = search.run(root, board, playouts, deadline)
+        ret['nodes'], ret['evaluations'] = search.nodes, search.evaluations
+        ret['depth'] = search.max_depth
+        stats = self.__merge(root, futures, ret)
+        if not stats:
+            return board.candidates[0]
+        move = max(stats, key=lambda m: (stats[m][0], stats[m][1], -m))
+        ret['win_rate'] = stats[move][1] / stats[move][0]
+        return move
+
+    def react(self, action_msg: ActionMessage, time_budget_ms=None):
+        """
+        time_budget_ms不传时用构造时给的默认值
+        """
+        ret = dict(finished=False, equal=False, win=False, msg=None,
+                   depth=0, nodes=0, evaluations=0, playouts=0,
+                   win_rate=None)
+        self.update(action_msg.row, action_msg.col, self.opposite_piece_type)
+        if time_budget_ms is None:
+            time_budget_ms = self.options.time_budget_ms
+        row, col = divmod(self.__search(time_budget_ms, ret),
+                          self.chess_board.row_num)
+        self.update(row, col, self.piece_type)
+        ret['msg'] = ActionMessage(row=row, col=col)
+        if self.position_info.is_win():
+            ret['finished'] = True
+            ret['win'] = True
+        elif self.chess_board.no_piece_info.count() == 0:
+            ret['finished'] = True
+            ret['equal'] = True
+        return ret
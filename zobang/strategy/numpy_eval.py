@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+from zobang.constant import CONFIG, NO_PIECE
+
+# numpy第一次用到时才import, 不用numpy的进程启动时不必付出这部分时间
+np = None
+
+
+# 四个方向上相邻格子的坐标差
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+# 棋盘外的格子, 对双方来说都和对方棋子一样会挡住连线
+BORDER = -1
+
+
+def _load_numpy():
+    global np  # pylint: disable=global-statement
+    if np is None:
+        try:
+            # pylint: disable=import-outside-toplevel
+            import numpy
+        except ImportError:  # pragma: no cover
+            return None
+        np = numpy
+    return np
+
+
+def numpy_available():
+    return _load_numpy() is not None
+
+
+class NumpyBoard:
+    """
+    用int8数组保存棋盘, 在所有WIN_LINE_LEN长的窗口上用滑动求和一次算出
+    每个空位对双方的价值: 窗口里没有对方棋子时, 窗口内每个空位都得到
+    10 ** (窗口内己方棋子数)分
+    """
+
+    def __init__(self, board_len, win_len=None):
+        if _load_numpy() is None:
+            raise Exception('numpy is not installed')
+        self.board_len = board_len
+        self.win_len = win_len or CONFIG['WIN_LINE_LEN']
+        self.pad = self.win_len
+        size = board_len + 2 * self.pad
+        self._padded = np.full((size, size), BORDER, dtype=np.int8)
+        self.cells = self._padded[self.pad:self.pad + board_len,
+                                  self.pad:self.pad + board_len]
+        self.cells[:, :] = NO_PIECE
+        self._weights = np.array([0] + [10 ** n for n in range(1, self.win_len)]
+                                 + [0], dtype=np.float64)
+
+    def update(self, row, col, chess_piece_type: int):
+        self.cells[row, col] = chess_piece_type
+
+    def rollback(self, row, col):
+        self.cells[row, col] = NO_PIECE
+
+    def __shifted(self, array, dx, dy, k):
+        pad, n = self.pad, self.board_len
+        return array[pad + k * dx:pad + k * dx + n,
+                     pad + k * dy:pad + k * dy + n]
+
+    def __side_map(self, own, blocked):
+        """
+        own, blocked都是带边框的0/1数组, 返回每个格子在四个方向上
+        所在的所有活窗口的分数之和
+        """
+        total = np.zeros((self.board_len, self.board_len), dtype=np.float64)
+        window = np.zeros_like(self._padded, dtype=np.float64)
+        for dx, dy in DIRECTIONS:
+            own_sum = sum(self.__shifted(own, dx, dy, k)
+                          for k in range(self.win_len))
+            block_sum = sum(self.__shifted(blocked, dx, dy, k)
+                            for k in range(self.win_len))
+            # 以(x, y)为起点的窗口的分数
+            window[self.pad:self.pad + self.board_len,
+                   self.pad:self.pad + self.board_len] = np.where(
+                       block_sum > 0, 0, self._weights[own_sum])
+            for k in range(self.win_len):
+                total += self.__shifted(window, -dx, -dy, k)
+        return total
+
+    def score_map(self, chess_piece_type: int):
+        """
+        站在chess_piece_type一方, 每个空位进攻和防守价值之和, 非空位为-1
+        """
+        padded = self._padded
+        border = padded == BORDER
+        own = padded == chess_piece_type
+        peer = ~own & ~border & (padded != NO_PIECE)
+        attack = self.__side_map(own.astype(np.int8),
+                                 (peer | border).astype(np.int8))
+        defend = self.__side_map(peer.astype(np.int8),
+                                 (own | border).astype(np.int8))
+        scores = attack + defend
+        scores[self.cells != NO_PIECE] = -1
+        return scores
+
+    def move_scores(self, moves, chess_piece_type: int):
+        scores = self.score_map(chess_piece_type)
+        return {(x, y): float(scores[x, y]) for x, y in moves}
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+import mmap
+import struct
+from zobang.chess_board.symmetry import SYMMETRY_NUM, INVERSE, transform
+from zobang.chess_board.zobrist import zobrist_keys
+from zobang.constant import CONFIG, WHITE_PIECE, BLACK_PIECE
+
+
+# 文件头: 魔数, 棋盘大小, 连珠长度, 收录局面的最大棋子数, 记录条数
+HEADER = struct.Struct('<8sHHHI')
+# 一条记录: 规范化局面的哈希, 规范化之后的应手坐标, 生成时的搜索深度
+RECORD = struct.Struct('<QBBH')
+MAGIC = b'ZOBOOK01'
+
+
+def canonical_key(white, black, board_len):
+    """
+    在8种对称变换下局面哈希最小的那个作为规范形式, 返回(哈希, 变换序号)
+    """
+    keys = zobrist_keys(board_len)[0]
+    white_keys, black_keys = keys[WHITE_PIECE], keys[BLACK_PIECE]
+    best_key, best_symmetry = None, 0
+    for symmetry in range(SYMMETRY_NUM):
+        key = 0
+        for x, y in white:
+            _x, _y = transform(symmetry, x, y, board_len)
+            key ^= white_keys[_x][_y]
+        for x, y in black:
+            _x, _y = transform(symmetry, x, y, board_len)
+            key ^= black_keys[_x][_y]
+        if best_key is None or key < best_key:
+            best_key, best_symmetry = key, symmetry
+    return best_key, best_symmetry
+
+
+def write_book(path, entries, board_len=None, max_stones=0, win_len=None):
+    """
+    entries: {规范化哈希: ((row, col), depth)}, 应手是规范化之后的坐标.
+    记录按哈希排序写出, 读的时候二分查找. board_len, win_len是生成时的
+    规则, 写在文件头里, 不传时用CONFIG里的默认值
+    """
+    board_len = board_len or CONFIG['CHESS_MAX_ROW']
+    win_len = win_len or CONFIG['WIN_LINE_LEN']
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, board_len, win_len, max_stones,
+                            len(entries)))
+        for key in sorted(entries):
+            (row, col), depth = entries[key]
+            f.write(RECORD.pack(key, row, col, depth))
+
+
+class OpeningBook:
+    """
+    mmap打开开局库文件, 启动时不读任何记录, 查询时在mmap上二分查找
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.board_len, self.win_len, self.max_stones, self.size = \
+            HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise Exception(f'{path} is not an opening book')
+
+    def close(self):
+        self._mmap.close()
+
+    def __len__(self):
+        return self.size
+
+    def __record(self, index):
+        return RECORD.unpack_from(self._mmap, HEADER.size + index * RECORD.size)
+
+    def __find(self, key):
+        low, high = 0, self.size
+        while low < high:
+            mid = (low + high) // 2
+            record = self.__record(mid)
+            if record[0] < key:
+                low = mid + 1
+            elif record[0] > key:
+                high = mid
+            else:
+                return record
+        return None
+
+    def lookup(self, white, black, board_len=None, win_len=None):
+        """
+        white, black是双方棋子的坐标, 返回该局面下一手的应手或None.
+        board_len, win_len同lookup_canonical
+        """
+        if len(white) + len(black) > self.max_stones:
+            return None
+        key, symmetry = canonical_key(white, black, self.board_len)
+        return self.lookup_canonical(key, symmetry, len(white) + len(black),
+                                     board_len=board_len, win_len=win_len)
+
+    # pylint: disable=too-many-arguments
+    def lookup_canonical(self, key, symmetry, stones, board_len=None,
+                         win_len=None):
+        """
+        已经有规范哈希(如ChessBoard.canonical_key())时直接查, 不用再算8遍.
+        board_len, win_len是当前对局的规则, 不传时用CONFIG里的默认值
+        """
+        if (self.board_len != (board_len or CONFIG['CHESS_MAX_ROW'])
+                or self.win_len != (win_len or CONFIG['WIN_LINE_LEN'])
+                or stones > self.max_stones):
+            return None
+        record = self.__find(key)
+        if record is None:
+            return None
+        return transform(INVERSE[symmetry], record[1], record[2],
+                         self.board_len)
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+
+
+class Options:
+    """
+    引擎配置的基类. 子类在__init__里用关键字参数给出各项及默认值,
+    这里提供按项比较和replace. 不用dataclass, 省掉import dataclasses
+    (连带inspect)的十几毫秒
+    """
+
+    def replace(self, **kwargs):
+        """
+        复制一份, kwargs里给出的项换成新值, 与dataclasses.replace一样
+        会重新经过子类__init__的检查
+        """
+        return type(self)(**dict(vars(self), **kwargs))
+
+    def __eq__(self, other):
+        return type(self) is type(other) and vars(self) == vars(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        items = ', '.join(f'{name}={value!r}'
+                          for name, value in vars(self).items())
+        return f'{type(self).__name__}({items})'
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+from collections import namedtuple
+from zobang.constant import CONFIG
+from zobang.strategy.alpha_beta import (AlphaBetaSearch, SearchTimeout,
+                                        INFINITE_SCORE)
+
+
+# 被叫停时多久检查一次
+STOP_POLL_SECONDS = 0.05
+
+# 发给子进程的局面: 棋盘的二进制快照加上局面的类和选项, 不带任何搜索状态.
+# 类随快照一起传过去, 这里不必import局面所在的模块
+PositionSnapshot = namedtuple('PositionSnapshot', [
+    'position_class', 'board', 'use_numpy', 'candidate_radius'])
+
+
+def take_snapshot(position):
+    return PositionSnapshot(
+        position_class=type(position),
+        board=position.snapshot(),
+        use_numpy=position.numpy_board is not None,
+        candidate_radius=(position.candidates.radius
+                          if position.candidates is not None else None))
+
+
+def restore_position(snapshot: PositionSnapshot):
+    return snapshot.position_class.from_snapshot(
+        snapshot.board, use_numpy=snapshot.use_numpy,
+        candidate_radius=snapshot.candidate_radius)
+
+
+# pylint: disable=too-many-arguments
+def _score_root_move(snapshot, engine, depth, width, move, alpha, deadline):
+    """
+    子进程里执行: 每个任务都从快照重建局面, 不共享置换表, 结果只取决于输入
+    """
+    position = restore_position(snapshot)
+    if engine == 'max_min':
+        return position.root_move_score(*move), position.search_nodes
+    search = AlphaBetaSearch(position, depth=depth, width=width)
+    try:
+        score = search.root_move_score(move, alpha=alpha, deadline=deadline)
+    except SearchTimeout:
+        score = None
+    return score, search.nodes
+
+
+class ParallelRootSearch:
+    """
+    把根节点的走法分给进程池里的多个进程搜索.
+    alpha_beta时先在本进程搜完排第一的走法(young brothers wait),
+    拿它的分数作为alpha再把其余走法分出去, 以便子进程里也能剪枝
+    """
+
+    def __init__(self, workers=None, engine='max_min', depth=4, width=None):
+        self.workers = workers
+        self.engine = engine
+        self.depth = depth
+        self.width = width
+        self.nodes = 0
+        self._executor = None
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            # 用到时才import, 单进程搜索不用加载multiprocessing
+            # pylint: disable=import-outside-toplevel
+            from concurrent.futures import ProcessPoolExecutor
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def search(self, position, search: AlphaBetaSearch = None, deadline=None,
+               stop_event=None):
+        """
+        返回(最好的走法, 分数). 各走法的结果按排序后的先后合并,
+        分数相同取排在前面的, 与进程完成的先后无关.
+        stop_event被set后不再等还没算完的走法, 用已经有的结果
+        """
+        self.nodes = 0
+        if search is None:
+            moves = sorted(position.possible_moves())
+        else:
+            moves = search.root_moves(self.depth)
+        if not moves:
+            return None, 0
+        results, alpha = [], -INFINITE_SCORE
+        if search is not None:
+            alpha = self.__search_first(search, moves[0], deadline)
+            if alpha is None:
+                return moves[0], 0
+            results.append((moves[0], alpha))
+            if alpha >= CONFIG['WIN_SCORE']:
+                return moves[0], alpha
+        pending = self.__submit(position, moves[len(results):], alpha,
+                                deadline)
+        results += self.__collect(pending, stop_event)
+        if not results:
+            return moves[0], 0
+        best_move, best_score = results[0]
+        for move, score in results[1:]:
+            if score > best_score:
+                best_move, best_score = move, score
+        return best_move, best_score
+
+    def __search_first(self, search: AlphaBetaSearch, move, deadline):
+        """
+        在本进程里搜完排第一的走法, 超时返回None
+        """
+        search.nodes = 0
+        try:
+            return search.root_move_score(move, self.depth, deadline=deadline)
+        except SearchTimeout:
+            return None
+        finally:
+            self.nodes += search.nodes
+
+    def __submit(self, position, moves, alpha, deadline):
+        """
+        其余走法分给进程池, 返回[(走法, Future), ...]
+        """
+        snapshot = take_snapshot(position)
+        return [(move, self.executor.submit(
+            _score_root_move, snapshot, self.engine, self.depth, self.width,
+            move, alpha, deadline)) for move in moves]
+
+    def __collect(self, pending, stop_event):
+        """
+        按提交的顺序取结果, 被叫停时取消还没算完的, 返回[(走法, 分数), ...]
+        """
+        # pending里的Future来自进程池, concurrent.futures这时已经加载过了
+        # pylint: disable=import-outside-toplevel
+        from concurrent.futures import wait
+        results = []
+        for move, future in pending:
+            if stop_event is not None:
+                while not future.done() and not stop_event.is_set():
+                    wait([future], timeout=STOP_POLL_SECONDS)
+                if not future.done():
+                    for _, rest in pending:
+                        rest.cancel()
+                    break
+            score, nodes = future.result()
+            self.nodes += nodes
+            if score is not None:
+                results.append((move, score))
+        return results
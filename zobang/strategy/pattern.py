@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import List
+from zobang.constant import ChessPieceType, CONFIG, NO_PIECE, WHITE_PIECE
+
+
+def opposite_piece_type(piece_type: ChessPieceType):
+    if piece_type == ChessPieceType.BLACK_CHESS_PIECE:
+        return ChessPieceType.WHITE_CHESS_PIECE
+    return ChessPieceType.BLACK_CHESS_PIECE
+
+
+def opposite_piece(piece: int):
+    """
+    opposite_piece_type的小整数版本, 白1黑2
+    """
+    return 3 - piece
+
+
+def _patter(row, start, end):
+    core_pattern = row[start: end + 1]
+    if start - 1 >= 0 and row[start - 1] == NO_PIECE:
+        core_pattern = row[start - 1: end + 1]
+    if end + 1 < len(row) and row[end+1] == NO_PIECE:
+        core_pattern.append(NO_PIECE)
+    for i, v in enumerate(core_pattern):
+        if v != NO_PIECE:
+            core_pattern[i] = 1
+        else:
+            core_pattern[i] = 0
+    return core_pattern
+
+
+def single_row_pattern(*, piece_type: int, row_position: List[int]):
+    opposite = opposite_piece(piece_type)
+    start_index, end_index, blank_num = None, None, 0
+    pattern = []
+    for i, p in enumerate(row_position):
+        if p == piece_type:
+            if start_index is None:
+                # 模式的起点
+                start_index = i
+            end_index = i
+            continue
+        if start_index is not None:
+            # 判断是否到了模式的终点, 当出现对方棋子，或是连续两个空位置时候，则为模式
+            # 结束位置，开始下一轮模式的寻找
+            if p == opposite:
+                pattern.append(_patter(row_position, start_index, end_index))
+                start_index, end_index, blank_num = None, None, 0
+                continue
+            if p == NO_PIECE:
+                blank_num += 1
+                if blank_num == 2:
+                    pattern.append(_patter(row_position, start_index,
+                                           end_index))
+                    start_index, end_index, blank_num = None, None, 0
+                    continue
+    if start_index is not None:
+        pattern.append(_patter(row_position, start_index, end_index))
+    return pattern
+
+
+@contextmanager
+def _fill_one_zero(row, index, value=1):
+    origin = row[index]
+    row[index] = value
+    yield row
+    row[index] = origin
+
+
+def _count_max_concurrent(row):
+    max_count, count = 0, 0
+    for v in row:
+        if v == 1:
+            count += 1
+        else:
+            if count > max_count:
+                max_count = count
+            count = 0
+    return max(max_count, count)
+
+
+def _row_count(row):
+    pattern_count = defaultdict(int)
+    for i, v in enumerate(row):
+        if v == 0:
+            with _fill_one_zero(row, i) as new_row:
+                pattern_count[_count_max_concurrent(new_row)] += 1
+    if pattern_count:
+        max_count = max(pattern_count.keys())
+        return max_count, pattern_count[max_count]
+    return len(row), 1
+
+
+def row_score(row, win_len=None):
+    if _count_max_concurrent(row) >= (win_len or CONFIG['WIN_LINE_LEN']):
+        return CONFIG['WIN_SCORE']
+    count, number = _row_count(row)
+    return (10 ** count) * number
+
+
+def _chunk_row(key):
+    """
+    key的最高位是哨兵位, 其余每一位对应一格, 1是己方棋子, 0是空位
+    """
+    length = key.bit_length() - 1
+    return [WHITE_PIECE if (key >> i) & 1 else NO_PIECE
+            for i in range(length - 1, -1, -1)]
+
+
+def _chunk_score(key, win_len):
+    return sum(row_score(pattern, win_len) for pattern in single_row_pattern(
+        piece_type=WHITE_PIECE, row_position=_chunk_row(key)) if pattern)
+
+
+@lru_cache(maxsize=None)
+def chunk_table(win_len):
+    """
+    长度不超过2 * win_len - 1的片段全部算好, 下标就是片段的编码.
+    第一次用到时才算, 不在import时算
+    """
+    return [0] + [_chunk_score(key, win_len)
+                  for key in range(1, 1 << (2 * win_len))]
+
+
+# 超出预先算好的表的长片段按编码缓存
+_long_chunk_score = lru_cache(maxsize=1 << 16)(_chunk_score)
+
+
+def chunk_cache_info():
+    """
+    超出预先算好的表, 走lru_cache的长片段的命中情况
+    """
+    return _long_chunk_score.cache_info()
+
+
+def chunk_score(key, win_len=None):
+    win_len = win_len or CONFIG['WIN_LINE_LEN']
+    table = chunk_table(win_len)
+    if key < len(table):
+        return table[key]
+    return _long_chunk_score(key, win_len)
+
+
+def line_score(*, piece_type: int, row_position: List[int], win_len=None):
+    """
+    一整行上piece_type所有模式的得分之和.
+    single_row_pattern找出的模式不会跨过对方棋子, 也不会跨过连续两个空位
+    (模式最多向外带一个空位), 所以在这些地方把一行切成片段, 各片段查表
+    得分相加, 结果与逐个模式计算row_score完全一致
+    """
+    win_len = win_len or CONFIG['WIN_LINE_LEN']
+    table = chunk_table(win_len)
+    table_len = len(table)
+    score, key, blank = 0, 1, False
+    for p in row_position:
+        if p == piece_type:
+            key = key << 1 | 1
+            blank = False
+        elif p == NO_PIECE:
+            if blank:
+                # 连续两个空位, 前一段带着第一个空位结束, 新的一段以空位开头
+                score += (table[key] if key < table_len
+                          else _long_chunk_score(key, win_len))
+                key = 0b10
+            else:
+                key <<= 1
+                blank = True
+        else:
+            score += (table[key] if key < table_len
+                      else _long_chunk_score(key, win_len))
+            key, blank = 1, False
+    return score + (table[key] if key < table_len
+                    else _long_chunk_score(key, win_len))
+
+
+def _line_threats(row_position: bytes, piece_type: int, win_len):
+    """
+    一条线上piece_type的(成五点, 冲四点)在线上的位置. 与连珠判断一样看
+    每个长度为win_len的窗口: 窗口里没有对方棋子时, 只差一个空位的, 这个
+    空位是成五点; 差两个空位的, 两个都是冲四点(下了其中一个, 另一个就是
+    对方唯一的防守点)
+    """
+    opposite = opposite_piece(piece_type)
+    fives, fours = set(), set()
+    for start in range(len(row_position) - win_len + 1):
+        window = row_position[start: start + win_len]
+        if opposite in window:
+            continue
+        blanks = [start + i for i, p in enumerate(window) if p == NO_PIECE]
+        if len(blanks) == 1:
+            fives.update(blanks)
+        elif len(blanks) == 2:
+            fours.update(blanks)
+    return tuple(sorted(fives)), tuple(sorted(fours))
+
+
+# 和line_scores一样, 按线的内容缓存
+line_threats = lru_cache(maxsize=1 << 16)(_line_threats)
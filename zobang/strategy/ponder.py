@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+import threading
+from zobang.strategy.alpha_beta import AlphaBetaSearch
+
+
+class Ponderer:
+    """
+    等对方落子的时候在后台线程里猜对方最可能的几个应手, 提前搜好本方的应对.
+    后台线程在局面的快照上搜索, 有自己的置换表, 不碰调用方的局面
+    """
+
+    def __init__(self, depth=4, width=None, replies=3, **position_kwargs):
+        self.depth = depth
+        self.width = width
+        self.replies = replies
+        self.position_kwargs = position_kwargs
+        # {对方应手: (本方走法, 分数, 搜完的深度)}
+        self.results = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, position):
+        """
+        position是本方刚走完的局面(轮到对方)
+        """
+        self.stop()
+        self.results = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self.__ponder,
+            args=(type(position), position.snapshot(), self._stop),
+            daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def take(self, reply):
+        """
+        对方实际走了reply: 停下后台搜索, 猜中且搜满了深度时返回
+        (走法, 分数), 否则返回None
+        """
+        self.stop()
+        result = self.results.get(tuple(reply))
+        if result is None or result[2] < self.depth:
+            return None
+        return result[0], result[1]
+
+    def __ponder(self, position_class, snapshot, stop):
+        # 用调用方局面的类从快照重建, 不必import它所在的模块
+        position = position_class.from_snapshot(snapshot,
+                                                **self.position_kwargs)
+        # 快照里记的轮到走的一方是本方, 实际上先轮到对方
+        peer = position.peer_piece_type
+        moves = position.possible_moves()
+        scores = position.move_scores(moves, peer)
+        guesses = sorted(moves, key=lambda m: (-scores[m], m))[:self.replies]
+        search = AlphaBetaSearch(position, depth=self.depth, width=self.width)
+        search.stop_event = stop
+        for reply in guesses:
+            if stop.is_set():
+                return
+            with position.dry_run_update(reply[0], reply[1], peer):
+                if position.is_win(peer):
+                    continue
+                move, score = search.search()
+                if stop.is_set():
+                    # search把超时当作正常结束, 被打断的结果不完整
+                    return
+                self.results[reply] = (move, score, search.completed_depth)
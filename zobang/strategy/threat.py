@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+from zobang.chess_board.geometry import geometry
+from zobang.chess_board.zobrist import zobrist_keys
+from zobang.constant import NO_PIECE
+from zobang.strategy.pattern import line_threats, opposite_piece
+
+
+class _BudgetExceeded(Exception):
+    pass
+
+
+class ThreatSolver:
+    """
+    连续冲四取胜(VCF)的求解: 进攻方每一步都必须成四, 防守方只有唯一的
+    应对, 分支数很少, 在max_nodes个节点的预算内搜完, 超出预算当作没找到.
+    只搜冲四, 不搜活三的连续进攻(VCT): 活三的应对不唯一, 分支多, 小的
+    节点预算搜不完
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, position, board_len=None, win_len=None,
+                 max_nodes=2000, max_depth=16):
+        # position是二维棋盘, 这里复制一份, 求解时在副本上落子和撤销
+        self._position = [list(row) for row in position]
+        self.board_len = board_len or len(position)
+        board_geometry = geometry(self.board_len, win_len)
+        self.win_len = board_geometry.win_len
+        # 与IncrementalEvaluator一样按整条线存棋子, 线上的成五点和冲四点
+        # 交给pattern.line_threats按线的内容缓存
+        self._lines = board_geometry.lines
+        self._cell_lines = board_geometry.cell_lines
+        self._line_cells = [bytearray(len(line)) for line in self._lines]
+        for x, row in enumerate(self._position):
+            for y, piece_type in enumerate(row):
+                for index, offset in self._cell_lines[x][y]:
+                    self._line_cells[index][offset] = piece_type
+        self._keys = zobrist_keys(self.board_len)[0]
+        self.max_nodes = max_nodes
+        self.max_depth = max_depth
+        self.nodes = 0
+        self._hash = 0
+        # 已经证明找不到VCF的局面: 局面的hash -> 搜过的最大剩余深度.
+        # 剩余深度d找不到, 更浅的也一定找不到, 更深的还要再搜
+        self._failed = {}
+
+    def __place(self, x, y, piece_type):
+        self._position[x][y] = piece_type
+        self._hash ^= self._keys[piece_type][x][y]
+        for index, offset in self._cell_lines[x][y]:
+            self._line_cells[index][offset] = piece_type
+
+    def __remove(self, x, y, piece_type):
+        self._position[x][y] = NO_PIECE
+        self._hash ^= self._keys[piece_type][x][y]
+        for index, offset in self._cell_lines[x][y]:
+            self._line_cells[index][offset] = NO_PIECE
+
+    def __stones(self, piece_type):
+        return [(x, y) for x in range(self.board_len)
+                for y in range(self.board_len)
+                if self._position[x][y] == piece_type]
+
+    def __threats(self, cells, piece_type, kind):
+        """
+        经过cells的线上piece_type的成五点(kind为0)或冲四点(kind为1)
+        """
+        points, seen = set(), set()
+        for x, y in cells:
+            for index, _ in self._cell_lines[x][y]:
+                if index in seen:
+                    continue
+                seen.add(index)
+                line = self._lines[index]
+                offsets = line_threats(bytes(self._line_cells[index]),
+                                       piece_type, self.win_len)[kind]
+                points.update(line[offset] for offset in offsets)
+        return points
+
+    def __five_points(self, cells, piece_type):
+        """
+        经过cells的线上, piece_type再下一子就能连成线的空位
+        """
+        return self.__threats(cells, piece_type, 0)
+
+    def __four_moves(self, stones, piece_type):
+        """
+        能成四的走法: 下了之后同一个窗口里只剩一个空位,
+        这个空位就是对方唯一的防守点
+        """
+        return sorted(self.__threats(stones, piece_type, 1))
+
+    def __search(self, stones, piece_type, depth):
+        if depth == 0 or self._failed.get(self._hash, 0) >= depth:
+            return None
+        peer_piece_type = opposite_piece(piece_type)
+        for x, y in self.__four_moves(stones, piece_type):
+            self.nodes += 1
+            if self.nodes > self.max_nodes:
+                raise _BudgetExceeded()
+            self.__place(x, y, piece_type)
+            try:
+                fives = self.__five_points([(x, y)], piece_type)
+                if len(fives) >= 2:
+                    # 活四或双四, 对方挡不住
+                    return [(x, y)]
+                if not fives:
+                    continue
+                defend_x, defend_y = fives.pop()
+                self.__place(defend_x, defend_y, peer_piece_type)
+                try:
+                    if self.__five_points([(defend_x, defend_y)],
+                                          peer_piece_type):
+                        # 对方防守的同时成四, 不再是单纯的连续冲四
+                        continue
+                    stones.append((x, y))
+                    sequence = self.__search(stones, piece_type, depth - 1)
+                    stones.pop()
+                    if sequence is not None:
+                        return [(x, y), (defend_x, defend_y)] + sequence
+                finally:
+                    self.__remove(defend_x, defend_y, peer_piece_type)
+            finally:
+                self.__remove(x, y, piece_type)
+        self._failed[self._hash] = depth
+        return None
+
+    def solve(self, piece_type: int):
+        """
+        轮到piece_type走时找一串连续冲四取胜的着法[攻, 守, 攻, ..., 攻],
+        找不到或超出节点预算返回None
+        """
+        self.nodes, self._hash = 0, 0
+        self._failed.clear()
+        stones = self.__stones(piece_type)
+        fives = self.__five_points(stones, piece_type)
+        if fives:
+            return [min(fives)]
+        peer_piece_type = opposite_piece(piece_type)
+        if self.__five_points(self.__stones(peer_piece_type),
+                              peer_piece_type):
+            # 对方已经成四, 必须先防守
+            return None
+        try:
+            return self.__search(stones, piece_type, self.max_depth)
+        except _BudgetExceeded:
+            return None
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+from zobang.chess_board.zobrist import zobrist_keys
+
+
+class ZobristHash:
+
+    def __init__(self, row):
+        self._keys, self._last_move_keys = zobrist_keys(row)
+        self.value = 0
+
+    def key(self, x, y, chess_piece_type: int):
+        return self._keys[chess_piece_type][x][y]
+
+    def last_move_key(self, x, y, chess_piece_type: int):
+        return self._last_move_keys[chess_piece_type][x][y]
+
+    def toggle(self, x, y, chess_piece_type: int):
+        """
+        落子和提子都是异或同一个数, update和rollback各调一次即可
+        """
+        self.value ^= self._keys[chess_piece_type][x][y]
+        return self.value
+
+
+class TranspositionTable:
+    """
+    每个桶两个槽位: 一个保留搜索深度最大的结果, 另一个总是被覆盖
+    """
+
+    EXACT = 0
+    LOWER_BOUND = 1
+    UPPER_BOUND = 2
+
+    def __init__(self, size=1 << 14):
+        bucket_num = 1
+        while bucket_num < size:
+            bucket_num <<= 1
+        self._mask = bucket_num - 1
+        self._depth_slots = [None] * bucket_num
+        self._always_slots = [None] * bucket_num
+        self.hits = 0
+        self.misses = 0
+
+    def store(self, key, *, depth, score, bound, move=None):
+        index = key & self._mask
+        entry = (key, depth, score, bound, move)
+        old = self._depth_slots[index]
+        if old is None or old[0] == key or depth >= old[1]:
+            self._depth_slots[index] = entry
+        else:
+            self._always_slots[index] = entry
+
+    def probe(self, key):
+        """
+        返回(depth, score, bound, move), 没有命中时返回None
+        """
+        index = key & self._mask
+        for slots in (self._depth_slots, self._always_slots):
+            entry = slots[index]
+            if entry is not None and entry[0] == key:
+                self.hits += 1
+                return entry[1:]
+        self.misses += 1
+        return None
+
+    def clear(self):
+        self._depth_slots[:] = [None] * len(self._depth_slots)
+        self._always_slots[:] = [None] * len(self._always_slots)
+        self.hits, self.misses = 0, 0
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+from zobang.chess_board.chess_board import ChessBoard
+from zobang.chess_board.game_log import GameLogWriter
+from zobang.constant import ChessPieceType
+from zobang.strategy.action_message import ActionMessage
+from zobang.strategy.max_min_play import MaxMinPlay
+from zobang.strategy.pattern import opposite_piece_type
+
+
+class TextPlay:
+    """
+    终端里的人机对弈, 用chess_board_paint画棋盘, 不依赖tkinter.
+    X是白棋, O是黑棋, 白棋先走
+    """
+
+    def __init__(self, piece_type=ChessPieceType.WHITE_CHESS_PIECE,
+                 game_log=None, input_func=input, output_func=print,
+                 **engine_kwargs):
+        self.chess_board = ChessBoard()
+        self.piece_type = piece_type
+        self.opposite_piece_type = opposite_piece_type(piece_type)
+        self.peer_player = MaxMinPlay(chess_board=self.chess_board,
+                                      piece_type=self.opposite_piece_type,
+                                      **engine_kwargs)
+        self.game_log = None
+        if game_log is not None:
+            self.game_log = GameLogWriter(game_log)
+            self.game_log.attach(self.chess_board)
+        self.input = input_func
+        self.output = output_func
+
+    def __read_move(self):
+        """
+        返回(row, col), 输入q时返回None
+        """
+        board_len = self.chess_board.row_num
+        while True:
+            line = self.input(f'row col (0-{board_len - 1}, q to quit)> ')
+            if line.strip().lower() in ('q', 'quit'):
+                return None
+            try:
+                row, col = (int(v) for v in line.replace(',', ' ').split())
+            except ValueError:
+                self.output('please input two numbers')
+                continue
+            if not (0 <= row < board_len and 0 <= col < board_len):
+                self.output(f'({row}, {col}) is out of board')
+            elif not self.chess_board.no_piece_info.has(row, col):
+                self.output(f'({row}, {col}) is occupied')
+            else:
+                return row, col
+
+    def __finished(self):
+        return self.chess_board.no_piece_info.count() == 0
+
+    def run(self):
+        """
+        返回赢的一方, 和棋或中途退出返回None
+        """
+        if self.piece_type == ChessPieceType.BLACK_CHESS_PIECE:
+            # 人执黑时AI先在中心落子
+            mid = self.chess_board.row_num // 2
+            self.peer_player.update(mid, mid, self.opposite_piece_type)
+            self.output(f'AI: {mid} {mid}')
+        try:
+            return self.__loop()
+        finally:
+            self.peer_player.close()
+            if self.game_log is not None:
+                self.game_log.close()
+
+    def __loop(self):
+        while True:
+            self.chess_board.chess_board_paint()
+            move = self.__read_move()
+            if move is None:
+                return None
+            self.chess_board.update(move[0], move[1], self.piece_type)
+            if self.chess_board.piece_position_info(self.piece_type).is_win():
+                self.chess_board.chess_board_paint()
+                self.output('you win!')
+                return self.piece_type
+            if self.__finished():
+                self.output('draw')
+                return None
+            ret = self.peer_player.react(ActionMessage(row=move[0],
+                                                       col=move[1]))
+            msg = ret['msg']
+            self.output(f'AI: {msg.row} {msg.col}')
+            if ret['win']:
+                self.chess_board.chess_board_paint()
+                self.output('you lose!')
+                return self.opposite_piece_type
+            if self.__finished():
+                self.output('draw')
+                return None